@@ -0,0 +1,4 @@
+"""Benchmarks for the Allow2 integration.
+
+Run from the repository root, e.g. ``python -m benchmarks.bench_memory``.
+"""
@@ -0,0 +1,114 @@
+"""Anonymise a recorded Allow2 response for the payload corpus.
+
+Takes a pairing or check response body as recorded from the API and
+removes what identifies the family: user, pair and child IDs are
+renumbered, child names replaced by ``Child <n>``, tokens by a
+placeholder and credentials dropped. Activity entries, day types and
+every number and flag the integration decodes are kept as recorded, so
+the anonymised payload parses exactly like the original.
+
+    python -m benchmarks.anonymise recording.json > benchmarks/corpus/check_name.json
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from pathlib import Path
+from typing import Any
+
+from .payloads import ACTIVITY_NAMES
+
+# Keys of identifying values that are dropped
+_DROPPED = frozenset({"email", "user", "pass", "tz", "deviceName", "pairName"})
+# Keys of secrets that are replaced by a placeholder
+_SECRETS = frozenset({"token", "pairToken", "deviceToken"})
+# First ID of the renumbered children
+FIRST_CHILD_ID = 1001
+
+
+def anonymise(data: dict[str, Any]) -> dict[str, Any]:
+    """Return a pairing or check response without identifying values."""
+    children = data.get("children")
+    if isinstance(children, dict):
+        child_ids = [int(child_id) for child_id in children]
+    elif isinstance(children, list):
+        child_ids = [int(child["id"]) for child in children]
+    else:
+        child_ids = []
+    new_ids = {
+        child_id: FIRST_CHILD_ID + index for index, child_id in enumerate(child_ids)
+    }
+    return _anonymise(data, new_ids)
+
+
+def _anonymise(data: dict[str, Any], new_ids: dict[int, int]) -> dict[str, Any]:
+    """Anonymise a response object given the renumbered child IDs."""
+    result: dict[str, Any] = {}
+    for key, value in data.items():
+        if key in _DROPPED:
+            continue
+        if key in _SECRETS:
+            value = "anonymised"
+        elif key == "userId":
+            value = 1
+        elif key == "pairId":
+            value = 2
+        elif key == "childId" and isinstance(value, int):
+            value = new_ids.get(value, 0)
+        elif key == "children" and isinstance(value, dict):
+            value = {
+                str(new_ids[int(child_id)]): _child(
+                    child, new_ids[int(child_id)], new_ids
+                )
+                for child_id, child in value.items()
+            }
+        elif key == "children" and isinstance(value, list):
+            value = [
+                _child(child, new_ids[int(child["id"])], new_ids) for child in value
+            ]
+        elif key == "activities" and isinstance(value, dict):
+            value = {
+                activity_id: _activity(activity)
+                for activity_id, activity in value.items()
+            }
+        elif isinstance(value, dict):
+            value = _anonymise(value, new_ids)
+        result[key] = value
+    return result
+
+
+def _child(
+    child: dict[str, Any], child_id: int, new_ids: dict[int, int]
+) -> dict[str, Any]:
+    """Anonymise the entry of a child."""
+    result = _anonymise(child, new_ids)
+    if "id" in result:
+        result["id"] = child_id
+    if "name" in result:
+        result["name"] = f"Child {child_id - FIRST_CHILD_ID + 1}"
+    return result
+
+
+def _activity(activity: Any) -> Any:
+    """Anonymise the entry of an activity, which may be named by the parent."""
+    if not isinstance(activity, dict) or "name" not in activity:
+        return activity
+    activity_id = activity.get("id")
+    return {
+        **activity,
+        "name": ACTIVITY_NAMES.get(activity_id, f"Activity {activity_id}"),
+    }
+
+
+def main() -> None:
+    """Anonymise a recorded response and print it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("recording", type=Path)
+    args = parser.parse_args()
+
+    data = json.loads(args.recording.read_text())
+    print(json.dumps(anonymise(data), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+"""End-to-end performance of the integration against the stand-in server.
+
+Sets up a config entry with ``--children`` children in a Home Assistant
+test instance talking to the local stand-in server, which runs in a
+thread of its own so its work is not counted. For every child count it
+measures:
+
+- setup: time, event loop CPU time and requests of setting up the
+  entry, including the initial refresh
+- refresh: event loop CPU time of one refresh of every child, the
+  median of ``--refreshes`` refreshes
+- steady state: requests per minute of regular polling over
+  ``--minutes`` of simulated time, after a warm-up of one poll interval
+- memory: bytes allocated by setting up the entry and still held
+  afterwards, measured in a separate run under tracemalloc
+
+Time is simulated: whenever no request or executor job is in flight
+and nothing is ready to run, the event loop clock, ``time.time`` and ``dt_util.utcnow``
+jump to the next timer together, so an hour of polling takes seconds.
+
+Results are written as JSON to ``--output``, with the versions and
+options of the run, so runs of two releases can be compared.
+
+    python -m benchmarks.bench_e2e [--children 1 10 100 500] [--per-child]
+        [--latency 0.05] [--error-rate 0.01] [--output bench_e2e.json]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import logging
+import platform
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Awaitable, Iterator
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from functools import partial
+from pathlib import Path
+from typing import Any, TypeVar
+from unittest.mock import patch
+
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import event
+from homeassistant.loader import DATA_CUSTOM_COMPONENTS
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_test_home_assistant,
+)
+
+import custom_components.allow2 as integration
+from custom_components.allow2.api import Allow2API
+from custom_components.allow2.const import (
+    API_RATE_LIMIT,
+    API_RATE_LIMIT_BURST,
+    CONF_ACCOUNT_POLLING,
+    CONF_CHILDREN,
+    CONF_PAIR_ID,
+    CONF_PAIR_TOKEN,
+    CONF_USER_ID,
+    DATA_CIRCUIT_BREAKERS,
+    DATA_POLL_SCHEDULER,
+    DATA_RATE_LIMITERS,
+    DEFAULT_DEVICE_TOKEN,
+    DOMAIN,
+)
+from custom_components.allow2.coordinator import SCAN_INTERVAL
+from custom_components.allow2.ratelimit import TokenBucketLimiter
+from custom_components.allow2.resilience import CircuitBreaker
+from custom_components.allow2.scheduler import PollScheduler
+
+from .standin import StandInServer
+
+_T = TypeVar("_T")
+
+MANIFEST = Path(integration.__file__).with_name("manifest.json")
+
+
+class SimulatedTime:
+    """Clocks of a Home Assistant instance that skip ahead while idle."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.offset = 0.0
+        # Requests of the API client and executor jobs not done yet
+        self.in_flight = 0
+        self._real_time = time.time
+        self._real_utcnow = dt_util.utcnow
+
+    def time(self) -> float:
+        """Return the simulated wall clock."""
+        return self._real_time() + self.offset
+
+    def utcnow(self) -> datetime:
+        """Return the simulated current UTC time."""
+        return self._real_utcnow() + timedelta(seconds=self.offset)
+
+    @contextmanager
+    def patched(self) -> Iterator[None]:
+        """Run Home Assistant and the API client on the simulated clocks."""
+        loop = self.hass.loop
+        real_loop_time = loop.time
+        simulated = self
+
+        async def counted_send(
+            api: Allow2API, endpoint: str, payload: dict[str, Any]
+        ) -> bytes:
+            simulated.in_flight += 1
+            try:
+                return await real_send(api, endpoint, payload)
+            finally:
+                simulated._done()
+
+        def counted_run_in_executor(*args: Any) -> asyncio.Future[Any]:
+            future = real_run_in_executor(*args)
+            simulated.in_flight += 1
+            future.add_done_callback(lambda _future: simulated._done())
+            return future
+
+        real_send = Allow2API._send
+        real_run_in_executor = loop.run_in_executor
+        loop.time = lambda: real_loop_time() + self.offset  # type: ignore[method-assign]
+        loop.run_in_executor = counted_run_in_executor  # type: ignore[method-assign]
+        try:
+            with patch("time.time", self.time), patch.object(
+                dt_util, "utcnow", self.utcnow
+            ), patch.object(event, "time_tracker_utcnow", self.utcnow), patch.object(
+                event, "time_tracker_timestamp", self.time
+            ), patch.object(
+                Allow2API, "_send", counted_send
+            ):
+                yield
+        finally:
+            del loop.time
+            del loop.run_in_executor
+
+    def _done(self) -> None:
+        """Count a request or executor job as done."""
+        self.in_flight -= 1
+
+    async def run(self, awaitable: Awaitable[_T]) -> _T:
+        """Await ``awaitable``, skipping ahead to the next timer while idle."""
+        task = asyncio.ensure_future(awaitable)
+        while not task.done():
+            await self._settle()
+            if not task.done():
+                self._skip_to_next_timer()
+        return task.result()
+
+    async def advance(self, seconds: float) -> None:
+        """Let ``seconds`` of simulated time pass."""
+        loop = self.hass.loop
+        end = loop.time() + seconds
+        while True:
+            await self._settle()
+            when = self._next_timer()
+            if when is None or when > end:
+                break
+            self._skip_to_next_timer()
+        self.offset += max(0.0, end - loop.time())
+        await self._settle()
+
+    async def _settle(self) -> None:
+        """Wait until no request is in flight and no callback is ready."""
+        loop = self.hass.loop
+        idle = 0
+        while idle < 3:
+            if self.in_flight:
+                idle = 0
+                await asyncio.sleep(0.001)
+                continue
+            await asyncio.sleep(0)
+            idle = 0 if loop._ready else idle + 1  # type: ignore[attr-defined]
+
+    def _next_timer(self) -> float | None:
+        """Return the loop time of the next timer that is not cancelled."""
+        scheduled = self.hass.loop._scheduled  # type: ignore[attr-defined]
+        pending = [handle.when() for handle in scheduled if not handle.cancelled()]
+        return min(pending, default=None)
+
+    def _skip_to_next_timer(self) -> None:
+        """Move the clocks forward to the next timer."""
+        when = self._next_timer()
+        if when is not None:
+            self.offset += max(0.0, when - self.hass.loop.time())
+
+
+async def measure(
+    children: int,
+    account_polling: bool,
+    minutes: float,
+    refreshes: int,
+    latency: float,
+    error_rate: float,
+    seed: int,
+    memory: bool,
+) -> dict[str, Any]:
+    """Set up an entry with ``children`` children and measure it."""
+    server = StandInServer(
+        children=children, latency=latency, error_rate=error_rate, seed=seed
+    )
+    server.start_in_thread()
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            async with async_test_home_assistant(storage_dir=config_dir) as hass:
+                simulated = SimulatedTime(hass)
+                server.clock = simulated.time
+                with simulated.patched(), patch.object(
+                    integration, "Allow2API", partial(Allow2API, base_url=server.url)
+                ):
+                    if memory:
+                        result = await _measure_memory(
+                            hass, simulated, server, account_polling
+                        )
+                    else:
+                        result = await _measure_time(
+                            hass, simulated, server, account_polling, minutes, refreshes
+                        )
+                await hass.async_stop(force=True)
+    finally:
+        server.stop_thread()
+    return result
+
+
+async def _setup_entry(
+    hass: HomeAssistant,
+    simulated: SimulatedTime,
+    server: StandInServer,
+    account_polling: bool,
+) -> MockConfigEntry:
+    """Add and set up a config entry for the stand-in account."""
+    hass.data.pop(DATA_CUSTOM_COMPONENTS)
+    loop_time = hass.loop.time
+    host = "127.0.0.1"
+    # Clocks the integration takes at creation follow the simulated time
+    hass.data[DOMAIN] = {
+        DATA_POLL_SCHEDULER: PollScheduler(clock=loop_time),
+        DATA_RATE_LIMITERS: {
+            (DEFAULT_DEVICE_TOKEN, host): TokenBucketLimiter(
+                API_RATE_LIMIT, API_RATE_LIMIT_BURST, clock=loop_time
+            )
+        },
+        DATA_CIRCUIT_BREAKERS: {host: CircuitBreaker(clock=loop_time)},
+    }
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={
+            CONF_USER_ID: 1,
+            CONF_PAIR_ID: 2,
+            CONF_PAIR_TOKEN: "stand-in-token",
+            CONF_CHILDREN: [
+                {"id": child_id, "name": f"Child {child_id}"} for child_id in server.state
+            ],
+        },
+        options={CONF_ACCOUNT_POLLING: account_polling},
+    )
+    entry.add_to_hass(hass)
+    if not await simulated.run(hass.config_entries.async_setup(entry.entry_id)):
+        raise RuntimeError("Setting up the config entry failed")
+    await simulated.run(hass.async_block_till_done())
+    return entry
+
+
+async def _measure_time(
+    hass: HomeAssistant,
+    simulated: SimulatedTime,
+    server: StandInServer,
+    account_polling: bool,
+    minutes: float,
+    refreshes: int,
+) -> dict[str, Any]:
+    """Measure setup, refresh and steady state polling."""
+    loop = hass.loop
+    start, wall, cpu = loop.time(), time.perf_counter(), time.thread_time()
+    entry = await _setup_entry(hass, simulated, server, account_polling)
+    setup = {
+        "simulated_s": round(loop.time() - start, 3),
+        "wall_s": round(time.perf_counter() - wall, 3),
+        "cpu_s": round(time.thread_time() - cpu, 3),
+        "requests": server.requests,
+    }
+
+    data = hass.data[DOMAIN][entry.entry_id]
+    if data["account_coordinator"] is not None:
+        coordinators = [data["account_coordinator"]]
+    else:
+        coordinators = list(data["coordinators"].values())
+    cpu_times: list[float] = []
+    requests = server.requests
+    for _ in range(refreshes):
+        cpu = time.thread_time()
+        await simulated.run(
+            asyncio.gather(*(coordinator.async_refresh() for coordinator in coordinators))
+        )
+        cpu_times.append(time.thread_time() - cpu)
+    refresh = {
+        "cpu_ms": round(statistics.median(cpu_times) * 1000, 3),
+        "requests": (server.requests - requests) / refreshes,
+    }
+
+    # Polls move to their slots during the first interval
+    await simulated.advance(SCAN_INTERVAL.total_seconds())
+    requests, errors = server.requests, server.errors
+    await simulated.advance(minutes * 60)
+    steady_state = {
+        "minutes": minutes,
+        "requests": server.requests - requests,
+        "requests_per_minute": round((server.requests - requests) / minutes, 3),
+        "errors": server.errors - errors,
+    }
+
+    return {
+        "entities": len(hass.states.async_all()),
+        "setup": setup,
+        "refresh": refresh,
+        "steady_state": steady_state,
+        "api": data["api"].stats,
+    }
+
+
+async def _measure_memory(
+    hass: HomeAssistant,
+    simulated: SimulatedTime,
+    server: StandInServer,
+    account_polling: bool,
+) -> dict[str, Any]:
+    """Measure the memory allocated by setting up the entry."""
+    gc.collect()
+    tracemalloc.start()
+    await _setup_entry(hass, simulated, server, account_polling)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    children = len(server.state)
+    return {
+        "retained_bytes": retained,
+        "peak_bytes": peak,
+        "retained_per_child_bytes": retained // children,
+    }
+
+
+def main() -> None:
+    """Run the benchmark."""
+    logging.basicConfig(level=logging.ERROR)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--children", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument(
+        "--per-child", action="store_true", help="poll every child on its own"
+    )
+    parser.add_argument("--minutes", type=float, default=60.0, help="simulated")
+    parser.add_argument("--refreshes", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--output", type=Path, default=Path("bench_e2e.json"))
+    args = parser.parse_args()
+
+    options = {
+        "account_polling": not args.per_child,
+        "minutes": args.minutes,
+        "refreshes": args.refreshes,
+        "latency": args.latency,
+        "error_rate": args.error_rate,
+        "seed": args.seed,
+    }
+    results: dict[str, Any] = {}
+    print(
+        f"{'children':>8}  {'entities':>8}  {'setup s':>8}  {'setup cpu s':>11}"
+        f"  {'refresh cpu ms':>14}  {'req/min':>7}  {'retained KiB':>12}"
+    )
+    for children in args.children:
+        run = partial(
+            measure,
+            children,
+            not args.per_child,
+            args.minutes,
+            args.refreshes,
+            args.latency,
+            args.error_rate,
+            args.seed,
+        )
+        result = asyncio.run(run(memory=False))
+        if not args.no_memory:
+            result["memory"] = asyncio.run(run(memory=True))
+        results[str(children)] = result
+        retained = (
+            f"{result['memory']['retained_bytes'] / 1024:>12.0f}"
+            if "memory" in result
+            else f"{'':>12}"
+        )
+        print(
+            f"{children:>8}  {result['entities']:>8}"
+            f"  {result['setup']['simulated_s']:>8.2f}  {result['setup']['cpu_s']:>11.3f}"
+            f"  {result['refresh']['cpu_ms']:>14.2f}"
+            f"  {result['steady_state']['requests_per_minute']:>7.2f}  {retained}"
+        )
+
+    report = {
+        "benchmark": "e2e",
+        "integration_version": json.loads(MANIFEST.read_text())["version"],
+        "homeassistant_version": HA_VERSION,
+        "python_version": platform.python_version(),
+        "created": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "options": options,
+        "results": results,
+    }
+    args.output.write_text(json.dumps(report, indent=2) + "\n")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
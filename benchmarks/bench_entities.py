@@ -0,0 +1,97 @@
+"""Cost of computing entity state per refresh.
+
+Builds the sensors and binary sensors of a household of ``--children``
+children against a stand-in coordinator and times a refresh that
+updates every entity. Each update computes the state the way Home
+Assistant does when writing it, reading the availability, state and
+attribute properties of the entity. Lookups of the coordinator's
+activity status are counted along the way.
+
+    python -m benchmarks.bench_entities [--children 20] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+from typing import Any
+
+from custom_components.allow2.api import Allow2API, CheckResult
+from custom_components.allow2.binary_sensor import Allow2ActivityAllowedSensor
+from custom_components.allow2.const import ACTIVITIES
+from custom_components.allow2.sensor import Allow2RemainingTimeSensor
+
+from .payloads import make_check_payload
+
+
+class _Coordinator:
+    """Child coordinator stand-in counting activity status lookups."""
+
+    countdown = None
+    remaining_step = 60
+    is_stale = False
+    data_available = True
+
+    def __init__(self, data: dict[str, Any]) -> None:
+        self.data = data
+        self.lookups = 0
+
+    @property
+    def activities(self) -> dict[int, Any]:
+        self.lookups += 1
+        return self.data["activities"]
+
+
+def build(result: CheckResult) -> tuple[list[_Coordinator], list[Any]]:
+    """Return the coordinators and entities of the children of a check."""
+    coordinators: list[_Coordinator] = []
+    entities: list[Any] = []
+    for child_id, child in result.children.items():
+        coordinator = _Coordinator({"activities": child.activities})
+        coordinators.append(coordinator)
+        for activity_id, activity_name in ACTIVITIES.items():
+            for entity_class in (Allow2RemainingTimeSensor, Allow2ActivityAllowedSensor):
+                entity = entity_class(
+                    coordinator=coordinator,
+                    child_id=child_id,
+                    child_name=f"Child {child_id}",
+                    activity_id=activity_id,
+                    activity_name=activity_name,
+                    entry_id="bench",
+                )
+                entity.entity_id = f"sensor.bench_{child_id}_{activity_id}"
+                # Compute the state like a state write instead of writing it
+                entity.async_write_ha_state = entity._async_calculate_state
+                entities.append(entity)
+    return coordinators, entities
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--children", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    api = Allow2API(session=None)  # type: ignore[arg-type]
+    coordinators, entities = build(
+        api._parse_check_response(make_check_payload(args.children))
+    )
+    best = float("inf")
+    for _ in range(args.repeat):
+        for coordinator in coordinators:
+            coordinator.lookups = 0
+        start = time.perf_counter()
+        for entity in entities:
+            entity._handle_coordinator_update()
+        best = min(best, time.perf_counter() - start)
+    lookups = sum(coordinator.lookups for coordinator in coordinators)
+
+    print(f"children:                 {args.children}")
+    print(f"entities:                 {len(entities)}")
+    print(f"status lookups / refresh: {lookups}")
+    print(f"time / refresh:           {best * 1e6:.0f} us")
+    print(f"time / entity update:     {best * 1e6 / len(entities):.1f} us")
+
+
+if __name__ == "__main__":
+    main()
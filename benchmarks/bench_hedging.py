@@ -0,0 +1,115 @@
+"""Tail latency of unlogged checks with and without hedging.
+
+Runs checks against the local stand-in server with injected latency:
+most checks answer in tens of milliseconds, a few take up to a second
+and a small share stalls on a slow connection for ``--stall`` seconds.
+Reports latency percentiles and the extra requests hedging costs.
+
+    python -m benchmarks.bench_hedging [--requests 300] [--stall 2]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import aiohttp
+
+from custom_components.allow2.api import Allow2API
+from custom_components.allow2.hedging import HedgePolicy
+
+from .standin import StandInServer
+
+CHILD_ID = 1000
+
+
+class _SlowStandIn(StandInServer):
+    """Stand-in server answering checks with a random delay."""
+
+    def __init__(self, stall: float, rng: random.Random) -> None:
+        super().__init__(children=1)
+        self.stall = stall
+        self._rng = rng
+
+    def delay(self) -> float:
+        roll = self._rng.random()
+        if roll < 0.02:
+            return self.stall
+        if roll < 0.05:
+            return self._rng.uniform(0.2, 1.0)
+        return self._rng.lognormvariate(-3.5, 0.3)  # about 30 ms
+
+
+async def measure(
+    requests: int, concurrency: int, stall: float, percentile: int, seed: int
+) -> tuple[list[float], int, dict | None]:
+    """Return check latencies, server requests and hedge statistics."""
+    server = _SlowStandIn(stall, random.Random(seed))
+    await server.start()
+    policy = HedgePolicy(percentile) if percentile else None
+    latencies: list[float] = []
+    async with aiohttp.ClientSession() as session:
+        api = Allow2API(session, base_url=server.url, hedge_policy=policy)
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def check() -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                await api._post(
+                    "/serviceapi/check",
+                    {
+                        "userId": 1,
+                        "pairId": 2,
+                        "pairToken": "t",
+                        "childId": CHILD_ID,
+                        "activities": "1,2",
+                        "log": "false",
+                    },
+                    "check",
+                    retry=True,
+                    hedge=True,
+                )
+                latencies.append(time.perf_counter() - start)
+
+        await asyncio.gather(*(check() for _ in range(requests)))
+    served = server.requests
+    await server.stop()
+    return latencies, served, policy.stats if policy else None
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    """Return a percentile of values in milliseconds."""
+    return statistics.quantiles(values, n=100)[int(percent) - 1] * 1000
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--stall", type=float, default=2.0, help="seconds")
+    parser.add_argument("--percentile", type=int, default=95)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(
+        f"{'':<12}  {'p50 ms':>7}  {'p95 ms':>7}  {'p99 ms':>7}  {'max ms':>7}"
+        f"  {'requests':>8}"
+    )
+    for label, percentile in (("unhedged", 0), (f"hedged p{args.percentile}", args.percentile)):
+        latencies, served, stats = asyncio.run(
+            measure(args.requests, args.concurrency, args.stall, percentile, args.seed)
+        )
+        print(
+            f"{label:<12}  {_percentile(latencies, 50):>7.0f}"
+            f"  {_percentile(latencies, 95):>7.0f}  {_percentile(latencies, 99):>7.0f}"
+            f"  {max(latencies) * 1000:>7.0f}  {served:>8}"
+        )
+        if stats:
+            print(f"hedge stats: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Memory footprint of the parsed check result per child.
+
+Models what the child coordinators retain after a poll: each child's
+data dict, with and without the raw response kept for debugging.
+With ``keep_raw_response`` every child coordinator that polls on its
+own holds a full copy of the account-wide payload.
+
+    python -m benchmarks.bench_memory [--children 1 10 100]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import tracemalloc
+from typing import Any
+
+from custom_components.allow2.api import Allow2API
+
+from .payloads import make_check_payload
+
+
+def retained_per_child(children: int, keep_raw_response: bool) -> int:
+    """Return bytes retained per child after one per-child poll of each child."""
+    api = Allow2API(session=None, keep_raw_response=keep_raw_response)  # type: ignore[arg-type]
+    encoded = json.dumps(make_check_payload(children))
+
+    gc.collect()
+    tracemalloc.start()
+    retained: list[dict[str, Any]] = []
+    for _ in range(children):
+        result = api._parse_check_response(json.loads(encoded))
+        data: dict[str, Any] = {
+            "allowed": result.allowed,
+            "activities": result.activities,
+        }
+        if result.raw_response is not None:
+            data["raw"] = result.raw_response
+        retained.append(data)
+        del result
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current // children
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--children", type=int, nargs="+", default=[1, 10, 100])
+    args = parser.parse_args()
+
+    print(f"{'children':>8}  {'raw kept (B/child)':>18}  {'compact (B/child)':>17}")
+    for children in args.children:
+        print(
+            f"{children:>8}  {retained_per_child(children, True):>18}"
+            f"  {retained_per_child(children, False):>17}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""Parser and entity microbenchmarks over the recorded payload corpus.
+
+For every anonymised response in ``benchmarks/corpus`` measures:
+
+- decode: time from the response body to the parsed result, the
+  integration's path including JSON decoding
+- parse: time from the decoded JSON to the parsed result, with
+  ``Allow2API._parse_check_response`` or ``PairResult.from_response``
+- allocations: memory blocks still allocated after one parse, mostly
+  held by the result, and the peak traced memory while parsing
+- entities: time per entity of recomputing the state of every sensor
+  and binary sensor of the children after a refresh
+
+Times are the best of ``--repeat`` runs of process CPU time. They are
+reported as measured, and compared as ratios to the time the standard
+library's ``json.loads`` takes for the same body in the same run, which
+cancels out the speed of the machine.
+
+``--output`` writes the results as JSON; given a stored ``--baseline``,
+the run fails when a block count, peak or time ratio is more than
+``--threshold`` percent worse than in the baseline; ratios also need to
+be at least a microsecond worse. Payloads with a worse ratio are
+measured twice more before the run fails, keeping the best ratio, as
+single runs on a busy machine are often that much slower. Block counts
+and peaks depend on the Python version and ratios on the JSON decoder,
+so a baseline only compares with runs using the same ones.
+
+The comparison with ``bench_micro_baseline.json`` runs as the pytest
+test ``tests/test_bench_micro.py``, deselected by default and run in CI
+with ``pytest -m benchmark``, at a threshold of 50 percent for noisy
+runners. Regenerate the baseline after a change
+that is meant to change these metrics, or with a new Python version:
+
+    python -m benchmarks.bench_micro --output benchmarks/bench_micro_baseline.json
+    python -m benchmarks.bench_micro --baseline benchmarks/bench_micro_baseline.json
+        [--threshold 20] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import platform
+import sys
+import time
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from homeassistant.const import __version__ as HA_VERSION
+
+import custom_components.allow2 as integration
+from custom_components.allow2.api import Allow2API, PairResult, _decode_json, orjson
+
+from .bench_entities import build
+from .payloads import load_corpus
+
+MANIFEST = Path(integration.__file__).with_name("manifest.json")
+BASELINE = Path(__file__).with_name("bench_micro_baseline.json")
+# Time differences in microseconds too small to count as a regression
+MIN_TIME_CHANGE = 1.0
+JSON_DECODER = "orjson" if orjson is not None else "json"
+
+
+def best_us(func: Callable[[], Any], repeat: int) -> float:
+    """Return the best CPU time of a call in microseconds."""
+    timer = timeit.Timer(func, timer=time.process_time)
+    number, _ = timer.autorange()
+    return min(timer.repeat(repeat, number)) / number * 1e6
+
+
+def allocations(func: Callable[[], Any]) -> tuple[int, float]:
+    """Return the memory blocks held by the result of a call and its peak KiB."""
+    func()
+    gc.collect()
+    gc.disable()
+    try:
+        before = sys.getallocatedblocks()
+        result = func()
+        blocks = sys.getallocatedblocks() - before
+        del result
+        tracemalloc.start()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        gc.enable()
+    return blocks, peak / 1024
+
+
+def ratios(timings: dict[str, float], entities: int) -> dict[str, float]:
+    """Return times relative to decoding the body with ``json.loads``.
+
+    The entity ratio is of refreshing all entities of the payload.
+    """
+    reference = timings["json_us"]
+    result = {
+        "decode_ratio": timings["decode_us"] / reference,
+        "parse_ratio": timings["parse_us"] / reference,
+    }
+    if "entity_us" in timings:
+        result["entity_ratio"] = timings["entity_us"] * entities / reference
+    return result
+
+
+def measure_check(body: bytes, repeat: int) -> dict[str, Any]:
+    """Return the metrics of a check response."""
+    api = Allow2API(session=None)  # type: ignore[arg-type]
+    data = _decode_json(body)
+    blocks, peak = allocations(lambda: api._parse_check_response(data))
+
+    _, entities = build(api._parse_check_response(data))
+
+    def refresh() -> None:
+        for entity in entities:
+            entity._handle_coordinator_update()
+
+    timings = {
+        "json_us": best_us(lambda: json.loads(body), repeat),
+        "decode_us": best_us(
+            lambda: api._decode_check_response(body, None, None), repeat
+        ),
+        "parse_us": best_us(lambda: api._parse_check_response(data), repeat),
+        "entity_us": best_us(refresh, repeat) / max(1, len(entities)),
+    }
+    return {
+        "bytes": len(body),
+        "children": len(data.get("children", {})),
+        "entities": len(entities),
+        "metrics": {
+            "parse_blocks": blocks,
+            "parse_peak_kib": peak,
+            **ratios(timings, len(entities)),
+        },
+        "timings": timings,
+    }
+
+
+def measure_pair(body: bytes, repeat: int) -> dict[str, Any]:
+    """Return the metrics of a pairing response."""
+    data = _decode_json(body)
+    blocks, peak = allocations(lambda: PairResult.from_response(data))
+    timings = {
+        "json_us": best_us(lambda: json.loads(body), repeat),
+        "decode_us": best_us(
+            lambda: PairResult.from_response(_decode_json(body)), repeat
+        ),
+        "parse_us": best_us(lambda: PairResult.from_response(data), repeat),
+    }
+    return {
+        "bytes": len(body),
+        "children": len(data.get("children", [])),
+        "entities": 0,
+        "metrics": {
+            "parse_blocks": blocks,
+            "parse_peak_kib": peak,
+            **ratios(timings, 0),
+        },
+        "timings": timings,
+    }
+
+
+MEASURES: dict[str, Callable[[bytes, int], dict[str, Any]]] = {
+    "check": measure_check,
+    "pair": measure_pair,
+}
+
+
+def run(repeat: int) -> tuple[dict[str, dict[str, bytes]], dict[str, Any]]:
+    """Return the corpus and the results of measuring every payload in it."""
+    corpus = {kind: load_corpus(kind) for kind in MEASURES}
+    results: dict[str, Any] = {}
+    for kind, bodies in corpus.items():
+        for name in sorted(bodies, key=lambda name: len(bodies[name])):
+            results[name] = MEASURES[kind](bodies[name], repeat)
+    return corpus, results
+
+
+def comparable(baseline: dict[str, Any]) -> str | None:
+    """Return why a baseline does not compare with this run, or None."""
+    version = platform.python_version_tuple()[:2]
+    if baseline["python_version"].split(".")[:2] != list(version):
+        return f"baseline of Python {baseline['python_version']}"
+    if baseline.get("json_decoder") != JSON_DECODER:
+        return f"baseline decoded with {baseline.get('json_decoder')}"
+    return None
+
+
+def regressions(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[tuple[str, str]]:
+    """Return the payloads and metrics more than threshold percent worse."""
+    found = []
+    for name, expected in baseline["results"].items():
+        if name not in results:
+            found.append((name, "missing from the corpus"))
+            continue
+        for metric, base in expected["metrics"].items():
+            value = results[name]["metrics"].get(metric)
+            if value is None or base <= 0:
+                continue
+            if (
+                metric.endswith("_ratio")
+                and (value - base) * results[name]["timings"]["json_us"] < MIN_TIME_CHANGE
+            ):
+                continue
+            change = (value / base - 1) * 100
+            if change > threshold:
+                found.append(
+                    (name, f"{metric}: {base:.4g} -> {value:.4g} (+{change:.0f}%)")
+                )
+    return found
+
+
+def compare(
+    corpus: dict[str, dict[str, bytes]],
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    threshold: float,
+    repeat: int,
+) -> list[tuple[str, str]]:
+    """Return the regressions against a baseline.
+
+    Payloads with a regression are measured twice more, keeping the best
+    ratios in ``results``.
+    """
+    found = regressions(results, baseline, threshold)
+    for _ in range(2):
+        if not found:
+            break
+        for name in {name for name, _ in found}:
+            kind = name.split("_", 1)[0]
+            if name not in corpus.get(kind, {}):
+                continue
+            metrics = MEASURES[kind](corpus[kind][name], repeat)["metrics"]
+            best = results[name]["metrics"]
+            for metric, value in metrics.items():
+                if metric.endswith("_ratio"):
+                    best[metric] = min(best[metric], value)
+        found = regressions(results, baseline, threshold)
+    return found
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--baseline", type=Path)
+    parser.add_argument("--threshold", type=float, default=20.0, help="percent")
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    corpus, results = run(args.repeat)
+    print(
+        f"{'payload':<18}  {'bytes':>6}  {'json us':>8}  {'decode x':>8}  {'parse x':>7}"
+        f"  {'blocks':>6}  {'peak KiB':>8}  {'entity us':>9}  {'entities x':>10}"
+    )
+    for name, result in results.items():
+        metrics = result["metrics"]
+        timings = result["timings"]
+        entity = (
+            f"{timings['entity_us']:>9.2f}  {metrics['entity_ratio']:>10.2f}"
+            if "entity_us" in timings
+            else f"{'':>9}  {'':>10}"
+        )
+        print(
+            f"{name:<18}  {result['bytes']:>6}  {timings['json_us']:>8.1f}"
+            f"  {metrics['decode_ratio']:>8.2f}  {metrics['parse_ratio']:>7.2f}"
+            f"  {metrics['parse_blocks']:>6}  {metrics['parse_peak_kib']:>8.1f}"
+            f"  {entity}"
+        )
+
+    baseline = (
+        json.loads(args.baseline.read_text()) if args.baseline is not None else None
+    )
+    found: list[tuple[str, str]] = []
+    if baseline is not None:
+        if (reason := comparable(baseline)) is not None:
+            parser.exit(2, f"cannot compare with {args.baseline}: {reason}\n")
+        found = compare(corpus, results, baseline, args.threshold, args.repeat)
+
+    report = {
+        "benchmark": "micro",
+        "integration_version": json.loads(MANIFEST.read_text())["version"],
+        "homeassistant_version": HA_VERSION,
+        "python_version": platform.python_version(),
+        "json_decoder": JSON_DECODER,
+        "created": datetime.now().astimezone().isoformat(timespec="seconds"),
+        "options": {"repeat": args.repeat},
+        "results": results,
+    }
+    if args.output is not None:
+        args.output.write_text(json.dumps(report, indent=2) + "\n")
+        print(f"results written to {args.output}")
+
+    if args.baseline is not None:
+        if found:
+            print(f"regressions of more than {args.threshold:g}%:")
+            for name, regression in found:
+                print(f"  {name} {regression}")
+            sys.exit(1)
+        print(f"no regressions of more than {args.threshold:g}% against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
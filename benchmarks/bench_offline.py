@@ -0,0 +1,111 @@
+"""Accuracy of offline enforcement during a simulated API outage.
+
+Fetches a child from the local stand-in server, takes the server down
+and steps a simulated clock forward, comparing the offline engine's
+allowed state with the server's own state at every step. When the
+server comes back, the engine reconciles with a fresh fetch.
+
+    python -m benchmarks.bench_offline [--outage 7200] [--step 60]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+import aiohttp
+
+from custom_components.allow2.api import Allow2API, Allow2ConnectionError
+from custom_components.allow2.offline import OfflineEngine
+from custom_components.allow2.resilience import RetryPolicy
+
+from .standin import StandInServer
+
+CHILD_ID = 1000
+
+
+async def run(outage: int, step: int) -> None:
+    """Run the outage scenario."""
+    now = [time.time()]
+
+    def clock() -> float:
+        return now[0]
+
+    server = StandInServer(children=1, activities=4, clock=clock)
+    # Activity 1 is in use, 2 is blocked until a time block ends, 3 is
+    # allowed until a time block starts, 4 is idle
+    server.set_activity(CHILD_ID, 1, remaining=1800, in_use=True)
+    server.set_activity(
+        CHILD_ID, 2, time_block_allowed=False, time_block_ends=now[0] + 900
+    )
+    server.set_activity(CHILD_ID, 3, time_block_ends=now[0] + 1200)
+    await server.start()
+
+    engine = OfflineEngine(clock)
+    valid_until = now[0] + 24 * 3600
+    activity_ids = list(server.state[CHILD_ID])
+
+    async with aiohttp.ClientSession() as session:
+        api = Allow2API(
+            session, base_url=server.url, retry_policy=RetryPolicy(max_attempts=1)
+        )
+
+        async def fetch() -> dict:
+            result = await api.check(1, 2, "t", CHILD_ID, activity_ids, log=False)
+            return result.activities
+
+        # Two fetches a minute apart to detect the activity in use
+        engine.update(CHILD_ID, await fetch(), valid_until)
+        now[0] += 60
+        engine.update(CHILD_ID, await fetch(), valid_until)
+
+        server.outage = True
+        try:
+            await fetch()
+        except Allow2ConnectionError:
+            pass
+        else:
+            raise RuntimeError("Stand-in server did not simulate the outage")
+
+        steps = 0
+        wrong: dict[int, int] = dict.fromkeys(activity_ids, 0)
+        max_remaining_error = 0
+        for _ in range(outage // step):
+            now[0] += step
+            steps += 1
+            evaluated = engine.evaluate(CHILD_ID) or {}
+            for activity_id in activity_ids:
+                truth = server.status(CHILD_ID, activity_id)
+                local = evaluated[activity_id]
+                if local.allowed != truth["allowed"]:
+                    wrong[activity_id] += 1
+                if truth["remaining"] is not None and local.remaining_seconds is not None:
+                    max_remaining_error = max(
+                        max_remaining_error,
+                        abs(truth["remaining"] - local.remaining_seconds),
+                    )
+
+        server.outage = False
+        mismatches = engine.update(CHILD_ID, await fetch(), valid_until)
+        await server.stop()
+
+    print(f"outage {outage}s in {steps} steps of {step}s")
+    print(f"{'activity':>8}  {'wrong steps':>11}  {'accuracy':>8}")
+    for activity_id, count in wrong.items():
+        print(f"{activity_id:>8}  {count:>11}  {1 - count / steps:>8.1%}")
+    print(f"max remaining time error: {max_remaining_error}s")
+    print(f"mismatches at reconcile: {mismatches}")
+    print(f"engine stats: {engine.stats}")
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--outage", type=int, default=7200, help="seconds")
+    parser.add_argument("--step", type=int, default=60, help="seconds")
+    args = parser.parse_args()
+    asyncio.run(run(args.outage, args.step))
+
+
+if __name__ == "__main__":
+    main()
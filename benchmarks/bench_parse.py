@@ -0,0 +1,54 @@
+"""Check response decoding throughput for payloads of increasing size.
+
+Compares decoding the whole response with the standard library JSON
+module against the integration's path: the fastest available JSON
+backend and decoding only the requested child and activities.
+
+    python -m benchmarks.bench_parse [--children 1 10 100 500]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import timeit
+
+from custom_components.allow2.api import Allow2API, _json_loads
+
+from .payloads import make_check_payload
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--children", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--activities", type=int, default=6)
+    args = parser.parse_args()
+
+    api = Allow2API(session=None)  # type: ignore[arg-type]
+    activity_ids = list(range(1, args.activities + 1))
+
+    print(
+        f"{'children':>8}  {'bytes':>9}  {'full (us)':>10}"
+        f"  {'one child (us)':>14}  {'speedup':>7}"
+    )
+    for children in args.children:
+        body = json.dumps(make_check_payload(children, args.activities)).encode()
+        child_ids = [1000]
+
+        def full(body: bytes = body) -> None:
+            api._parse_check_response(json.loads(body))
+
+        def targeted(body: bytes = body, child_ids: list[int] = child_ids) -> None:
+            api._parse_check_response(_json_loads(body), activity_ids, child_ids)
+
+        number = max(10, 20000 // children)
+        full_us = min(timeit.repeat(full, number=number, repeat=5)) / number * 1e6
+        targeted_us = min(timeit.repeat(targeted, number=number, repeat=5)) / number * 1e6
+        print(
+            f"{children:>8}  {len(body):>9}  {full_us:>10.1f}"
+            f"  {targeted_us:>14.1f}  {full_us / targeted_us:>6.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Request rate smoothness of regular polls across many children.
+
+Simulates ``--entries`` config entries with ``--children`` children
+each polling per child every 5 minutes, all set up within a few
+seconds of each other. Request durations are random, with a small
+share of slow requests. Compares the default coordinator scheduling,
+where each poll runs a fixed delay after the previous one ended,
+against the shared poll scheduler's staggered, jittered slots.
+
+Reports the busiest second and 10 second window, the coefficient of
+variation of requests per 10 seconds (0 is perfectly even) and how far
+each child's polls drift per hour from a fixed 5 minute cadence.
+
+    python -m benchmarks.bench_polling [--entries 3] [--children 40] [--hours 2]
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import math
+import random
+import statistics
+from collections import Counter
+from datetime import timedelta
+
+from custom_components.allow2.scheduler import PollScheduler
+
+INTERVAL = 300.0
+# Seconds between the setup of two config entries
+ENTRY_SETUP_GAP = 2.0
+
+
+def _duration(rng: random.Random) -> float:
+    """Return the duration of a request in seconds."""
+    if rng.random() < 0.02:
+        return rng.uniform(3.0, 10.0)
+    return rng.lognormvariate(math.log(0.3), 0.4)
+
+
+def simulate(
+    entries: int, children: int, hours: float, staggered: bool, seed: int
+) -> tuple[list[float], list[float]]:
+    """Return request start times and the drift per hour of each child."""
+    rng = random.Random(seed)
+    clock = [0.0]
+    scheduler = PollScheduler(clock=lambda: clock[0], rng=random.Random(seed))
+    end = hours * 3600
+    starts: list[float] = []
+    # Regular poll start times of every child
+    polls: dict[tuple[int, int], list[float]] = {}
+
+    # (time, key) of the next poll of every child
+    queue: list[tuple[float, tuple[int, int]]] = []
+    for entry in range(entries):
+        setup = entry * ENTRY_SETUP_GAP
+        for child in range(children):
+            heapq.heappush(queue, (setup + rng.uniform(0, 0.5), (entry, child)))
+
+    while queue:
+        start, key = heapq.heappop(queue)
+        if start > end:
+            break
+        starts.append(start)
+        polls.setdefault(key, []).append(start)
+        finished = start + _duration(rng)
+        clock[0] = finished
+        if staggered:
+            delay = scheduler.delay(key, timedelta(seconds=INTERVAL)).total_seconds()
+            heapq.heappush(queue, (finished + delay, key))
+        else:
+            # DataUpdateCoordinator: whole seconds of the loop time plus a
+            # random fraction, then the interval after the refresh ended
+            microsecond = rng.uniform(0.05, 0.5)
+            heapq.heappush(queue, (int(finished) + microsecond + INTERVAL, key))
+
+    # Drift from the cadence set by the first regular poll
+    drift = [
+        (times[-1] - times[1] - (len(times) - 2) * INTERVAL) / hours
+        for times in polls.values()
+        if len(times) > 2
+    ]
+    return starts, drift
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=3)
+    parser.add_argument("--children", type=int, default=40)
+    parser.add_argument("--hours", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(
+        f"{'':<10}  {'requests':>8}  {'max/1s':>6}  {'max/10s':>7}  {'cv/10s':>6}"
+        f"  {'drift/h s':>9}"
+    )
+    for label, staggered in (("default", False), ("staggered", True)):
+        starts, drift = simulate(
+            args.entries, args.children, args.hours, staggered, args.seed
+        )
+        # Skip the first interval, when every child starts up at once
+        steady = [start for start in starts if start >= INTERVAL]
+        per_second = Counter(int(start) for start in steady)
+        per_window = Counter(int(start // 10) for start in steady)
+        windows = [
+            per_window.get(window, 0)
+            for window in range(int(INTERVAL // 10), int(args.hours * 360))
+        ]
+        cv = statistics.pstdev(windows) / statistics.mean(windows)
+        print(
+            f"{label:<10}  {len(steady):>8}  {max(per_second.values()):>6}"
+            f"  {max(windows):>7}  {cv:>6.2f}"
+            f"  {statistics.mean(drift):>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
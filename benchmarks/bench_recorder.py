@@ -0,0 +1,164 @@
+"""Recorder rows and bytes written per child per day.
+
+Replays a simulated day of one child against the real entity classes:
+the stand-in server's activities are polled every ``--poll`` seconds
+and the local countdown ticks every ``--tick`` seconds while Gaming is
+in use in the afternoon. A state is recorded whenever an entity's
+state or attributes change, the way the state machine deduplicates
+writes. Attributes are stored once per distinct recorded set, the way
+the recorder shares them between state rows.
+
+Compares exact remaining time with static attributes recorded (the
+previous behavior) against the remaining time step with static
+attributes unrecorded. Bytes count the state strings and attribute
+JSON, not the fixed per-row overhead of the database.
+
+    python -m benchmarks.bench_recorder [--step 60] [--poll 300] [--tick 10]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+from functools import partial
+from types import SimpleNamespace
+from typing import Any
+
+from custom_components.allow2.api import Allow2API
+from custom_components.allow2.binary_sensor import Allow2ActivityAllowedSensor
+from custom_components.allow2.const import ACTIVITIES
+from custom_components.allow2.countdown import CountdownEngine
+from custom_components.allow2.sensor import Allow2RemainingTimeSensor
+
+from .standin import StandInServer
+
+CHILD_ID = 1000
+DAY = 24 * 3600
+# Gaming is in use from 16:00 until its two hour quota runs out
+IN_USE_ACTIVITY = 2
+IN_USE_FROM = 16 * 3600
+
+
+class _Recorder:
+    """Count what the recorder would write for a set of entities."""
+
+    def __init__(self, record_static: bool) -> None:
+        self.record_static = record_static
+        self.state_rows = 0
+        self.state_bytes = 0
+        self.attribute_rows = 0
+        self.attribute_bytes = 0
+        self._last: dict[str, tuple[str, dict[str, Any]]] = {}
+        self._shared: set[str] = set()
+
+    def write(self, entity: Any) -> None:
+        """Record the current state of an entity if it changed."""
+        if isinstance(entity, Allow2RemainingTimeSensor):
+            state = str(entity.native_value)
+        else:
+            state = "on" if entity.is_on else "off"
+        attributes = entity.extra_state_attributes
+        if self._last.get(entity.unique_id) == (state, attributes):
+            return
+        self._last[entity.unique_id] = (state, attributes)
+
+        if not self.record_static:
+            attributes = {
+                key: value
+                for key, value in attributes.items()
+                if key not in entity._unrecorded_attributes
+            }
+        shared = json.dumps(attributes, separators=(",", ":"))
+        self.state_rows += 1
+        self.state_bytes += len(state)
+        if shared not in self._shared:
+            self._shared.add(shared)
+            self.attribute_rows += 1
+            self.attribute_bytes += len(shared)
+
+
+def simulate(step: int, record_static: bool, poll: int, tick: int) -> _Recorder:
+    """Replay one day of one child and return what was recorded."""
+    now = [0.0]
+
+    def clock() -> float:
+        return now[0]
+
+    server = StandInServer(children=1, activities=len(ACTIVITIES), clock=clock)
+    server.set_activity(CHILD_ID, IN_USE_ACTIVITY, remaining=7200)
+    api = Allow2API(session=None)  # type: ignore[arg-type]
+    countdown = CountdownEngine(clock)
+    coordinator = SimpleNamespace(
+        data=None,
+        activities={},
+        countdown=countdown,
+        remaining_step=step,
+        is_stale=False,
+        data_available=True,
+    )
+    recorder = _Recorder(record_static)
+    entities: list[Any] = []
+    for activity_id, activity_name in ACTIVITIES.items():
+        for entity_class in (Allow2RemainingTimeSensor, Allow2ActivityAllowedSensor):
+            entity = entity_class(
+                coordinator=coordinator,
+                child_id=CHILD_ID,
+                child_name="Child",
+                activity_id=activity_id,
+                activity_name=activity_name,
+                entry_id="bench",
+            )
+            # Record state writes instead of writing to the state machine
+            entity.async_write_ha_state = partial(recorder.write, entity)
+            if isinstance(entity, Allow2RemainingTimeSensor):
+                countdown.add_listener(
+                    CHILD_ID, activity_id, entity._handle_countdown_tick
+                )
+            entities.append(entity)
+
+    for second in range(0, DAY, tick):
+        now[0] = second
+        if second == IN_USE_FROM:
+            server.set_activity(CHILD_ID, IN_USE_ACTIVITY, in_use=True)
+        if second % poll == 0:
+            result = api._parse_check_response({
+                "allowed": True,
+                "activities": {
+                    str(activity_id): server.status(CHILD_ID, activity_id)
+                    for activity_id in ACTIVITIES
+                },
+            })
+            countdown.reconcile(CHILD_ID, result.activities)
+            coordinator.data = {"activities": result.activities}
+            coordinator.activities = result.activities
+            for entity in entities:
+                entity._handle_coordinator_update()
+        else:
+            countdown.tick()
+    return recorder
+
+
+def main() -> None:
+    """Run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--step", type=int, default=60)
+    parser.add_argument("--poll", type=int, default=300)
+    parser.add_argument("--tick", type=int, default=10)
+    args = parser.parse_args()
+
+    print(
+        f"{'per child per day':<30}  {'state rows':>10}  {'state B':>8}"
+        f"  {'attr rows':>9}  {'attr B':>7}"
+    )
+    for label, step, record_static in (
+        ("exact, static recorded", 0, True),
+        (f"step {args.step} s, static unrecorded", args.step, False),
+    ):
+        recorder = simulate(step, record_static, args.poll, args.tick)
+        print(
+            f"{label:<30}  {recorder.state_rows:>10}  {recorder.state_bytes:>8}"
+            f"  {recorder.attribute_rows:>9}  {recorder.attribute_bytes:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Synthetic Allow2 API payloads for benchmarks."""
+from __future__ import annotations
+
+import json
+import random
+from pathlib import Path
+from typing import Any
+
+# Anonymised recorded responses, see benchmarks/anonymise.py
+CORPUS = Path(__file__).parent / "corpus"
+
+ACTIVITY_NAMES = {
+    1: "Internet",
+    2: "Gaming",
+    3: "Social Media",
+    4: "Television",
+    5: "Screen Time",
+    6: "Messaging",
+}
+
+
+def make_activity(activity_id: int, rng: random.Random) -> dict[str, Any]:
+    """Return the check response entry of one activity."""
+    banned = rng.random() < 0.05
+    remaining = None if rng.random() < 0.2 else rng.randrange(0, 4 * 3600)
+    time_block_allowed = rng.random() < 0.85
+    return {
+        "id": activity_id,
+        "name": ACTIVITY_NAMES.get(activity_id, f"Activity {activity_id}"),
+        "allowed": not banned and time_block_allowed and remaining != 0,
+        "banned": banned,
+        "remaining": remaining,
+        "quota": None if remaining is None else 4 * 3600,
+        "timeBlockAllowed": time_block_allowed,
+    }
+
+
+def make_check_payload(
+    children: int, activities: int = 6, seed: int = 0
+) -> dict[str, Any]:
+    """Return an account-wide check response.
+
+    Args:
+        children: Number of children on the account
+        activities: Number of activities per child
+        seed: Seed for the generated values
+    """
+    rng = random.Random(seed)
+    activity_ids = range(1, activities + 1)
+    return {
+        "allowed": True,
+        "activities": {str(a): make_activity(a, rng) for a in activity_ids},
+        "children": {
+            str(1000 + child): {
+                "name": f"Child {child}",
+                "allowed": True,
+                "activities": {str(a): make_activity(a, rng) for a in activity_ids},
+            }
+            for child in range(children)
+        },
+        "dayTypes": {
+            "today": {"id": 1, "name": "School Day"},
+            "tomorrow": {"id": 2, "name": "Weekend"},
+        },
+        "subscription": {"active": True, "type": 1, "maxChildren": 0},
+    }
+
+
+def load_corpus(kind: str) -> dict[str, bytes]:
+    """Return the compact bodies of the recorded responses of a kind.
+
+    Args:
+        kind: "check" or "pair"
+    """
+    return {
+        path.stem: json.dumps(
+            json.loads(path.read_text()), separators=(",", ":"), ensure_ascii=False
+        ).encode()
+        for path in sorted(CORPUS.glob(f"{kind}_*.json"))
+    }
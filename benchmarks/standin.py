@@ -0,0 +1,261 @@
+"""Local stand-in for the Allow2 API.
+
+Serves ``/api/pairDevice`` and ``/serviceapi/check`` from an in-memory
+account whose activities count down while in use, so clients can be
+exercised without api.allow2.com. Setting ``outage`` makes the server
+answer every request with HTTP 503, simulating the API being down.
+Responses can be delayed by a random ``latency`` and a share of them,
+``error_rate``, fails with HTTP 503. With a ``seed`` the activities
+start out like a real account's: some banned, unlimited or outside
+their time block.
+
+    server = StandInServer(children=2)
+    await server.start()
+    api = Allow2API(session, base_url=server.url)
+    ...
+    server.outage = True
+    ...
+    await server.stop()
+
+``start_in_thread`` serves from an event loop of its own instead, to
+keep the server's work out of the event loop being measured.
+"""
+from __future__ import annotations
+
+import asyncio
+import random
+import threading
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import web
+
+from .payloads import ACTIVITY_NAMES, make_activity
+
+
+@dataclass
+class StandInActivity:
+    """Server side state of one activity of a child."""
+
+    activity_id: int
+    remaining: int | None
+    in_use: bool = False
+    banned: bool = False
+    time_block_allowed: bool = True
+    time_block_ends: float | None = None
+    updated: float = 0.0
+
+
+class StandInServer:
+    """In-memory Allow2 API server for local testing."""
+
+    def __init__(
+        self,
+        children: int = 2,
+        activities: int = 6,
+        remaining: int = 3600,
+        clock: Callable[[], float] = time.time,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int | None = None,
+    ) -> None:
+        """Initialize the server.
+
+        Args:
+            children: Number of children on the account, IDs from 1000
+            activities: Number of activities per child
+            remaining: Initial quota of every activity in seconds
+            clock: Wall clock of the server, shared with clients to
+                simulate the passing of time
+            host: Address to listen on
+            port: Port to listen on, 0 for any free port
+            latency: Median delay of a response in seconds
+            error_rate: Share of requests answered with HTTP 503
+            seed: Seed for latencies, errors and the initial state of
+                the activities, None to start every activity idle with
+                ``remaining`` seconds left
+        """
+        self.clock = clock
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.error_rate = error_rate
+        self.outage = False
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._rng = random.Random(seed)
+        self.state: dict[int, dict[int, StandInActivity]] = {
+            1000 + child: {
+                activity_id: self._initial_state(activity_id, remaining, seed is not None)
+                for activity_id in range(1, activities + 1)
+            }
+            for child in range(children)
+        }
+        self._runner: web.AppRunner | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+
+    def _initial_state(
+        self, activity_id: int, remaining: int, randomize: bool
+    ) -> StandInActivity:
+        """Return the initial state of an activity."""
+        if not randomize:
+            return StandInActivity(activity_id, remaining, updated=self.clock())
+        activity = make_activity(activity_id, self._rng)
+        return StandInActivity(
+            activity_id,
+            activity["remaining"],
+            banned=activity["banned"],
+            time_block_allowed=activity["timeBlockAllowed"],
+            updated=self.clock(),
+        )
+
+    @property
+    def url(self) -> str:
+        """Return the base URL of the server."""
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self) -> None:
+        """Start serving."""
+        app = web.Application(middlewares=[self._simulate])
+        app.router.add_post("/api/pairDevice", self._pair)
+        app.router.add_post("/serviceapi/check", self._check)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop serving."""
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def start_in_thread(self) -> None:
+        """Start serving from an event loop in a thread of its own."""
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="standin", daemon=True
+        )
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self.start(), self._loop).result()
+
+    def stop_thread(self) -> None:
+        """Stop serving and stop the thread started by ``start_in_thread``."""
+        if self._loop is None or self._thread is None:
+            return
+        asyncio.run_coroutine_threadsafe(self.stop(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+        self._loop = self._thread = None
+
+    def delay(self) -> float:
+        """Return the delay of the next response in seconds."""
+        if not self.latency:
+            return 0.0
+        return self._rng.lognormvariate(0, 0.5) * self.latency
+
+    def set_activity(self, child_id: int, activity_id: int, **changes: Any) -> None:
+        """Change the state of an activity, e.g. ``in_use=True``."""
+        activity = self._advance(child_id, activity_id)
+        for name, value in changes.items():
+            setattr(activity, name, value)
+
+    def status(self, child_id: int, activity_id: int) -> dict[str, Any]:
+        """Return the check response entry of an activity."""
+        activity = self._advance(child_id, activity_id)
+        if activity.time_block_ends is not None and self.clock() >= activity.time_block_ends:
+            activity.time_block_allowed = not activity.time_block_allowed
+            activity.time_block_ends = None
+        quota_left = activity.remaining is None or activity.remaining > 0
+        return {
+            "id": activity_id,
+            "name": ACTIVITY_NAMES.get(activity_id, f"Activity {activity_id}"),
+            "allowed": not activity.banned and activity.time_block_allowed and quota_left,
+            "banned": activity.banned,
+            "remaining": activity.remaining,
+            "timeBlockAllowed": activity.time_block_allowed,
+            "timeBlockEnds": activity.time_block_ends,
+        }
+
+    def _advance(self, child_id: int, activity_id: int) -> StandInActivity:
+        """Count down the quota of an activity in use up to now."""
+        activity = self.state[child_id][activity_id]
+        now = self.clock()
+        if activity.in_use and activity.remaining is not None:
+            activity.remaining = max(0, activity.remaining - int(now - activity.updated))
+        activity.updated = now
+        return activity
+
+    @web.middleware
+    async def _simulate(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Any],
+    ) -> web.StreamResponse:
+        """Count requests, delay them and inject errors and outages."""
+        self.requests += 1
+        self.in_flight += 1
+        try:
+            # Read the form first, the client may hang up on a slow request
+            await request.post()
+            if delay := self.delay():
+                await asyncio.sleep(delay)
+            if self.outage or (
+                self.error_rate and self._rng.random() < self.error_rate
+            ):
+                self.errors += 1
+                raise web.HTTPServiceUnavailable
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def _pair(self, _request: web.Request) -> web.Response:
+        """Handle a pairing request."""
+        return web.json_response({
+            "userId": 1,
+            "pairId": 2,
+            "token": "stand-in-token",
+            "children": [
+                {"id": child_id, "name": f"Child {child_id}"} for child_id in self.state
+            ],
+        })
+
+    async def _check(self, request: web.Request) -> web.Response:
+        """Handle a check request."""
+        return web.json_response(self.check_response(await request.post()))
+
+    def check_response(self, form: Mapping[str, Any]) -> dict[str, Any]:
+        """Return the response to the form of a check request."""
+        activity_ids = [int(a) for a in str(form.get("activities", "")).split(",") if a]
+        children = {
+            str(child_id): {
+                "name": f"Child {child_id}",
+                "allowed": True,
+                "activities": {
+                    str(activity_id): self.status(child_id, activity_id)
+                    for activity_id in activity_ids or activities
+                },
+            }
+            for child_id, activities in self.state.items()
+        }
+        body: dict[str, Any] = {
+            "allowed": True,
+            "children": children,
+            "dayTypes": {"today": {"id": 1, "name": "School Day"}},
+            "subscription": {},
+        }
+        if "childId" in form:
+            child = children.get(str(form["childId"]))
+            if child is None:
+                return {"error": "child_not_found"}
+            body["allowed"] = child["allowed"]
+            body["activities"] = child["activities"]
+        return body
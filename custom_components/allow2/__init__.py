@@ -12,87 +12,94 @@ After pairing, you can:
 from __future__ import annotations
 
 import logging
+import time
 from datetime import timedelta
 from typing import Any
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, Platform
+from homeassistant.core import Event, HomeAssistant, callback
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from homeassistant.helpers.update_coordinator import (
-    DataUpdateCoordinator,
-    UpdateFailed,
-)
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.typing import ConfigType
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
-from .api import Allow2API, Allow2AuthError, Allow2ConnectionError
+from .api import Allow2API, CheckResult
+from .catalog import ActivityCatalog
 from .const import (
     ACTIVITIES,
+    CONF_ACCOUNT_POLLING,
+    CONF_ACTIVITY_REFRESH_INTERVAL,
+    CONF_CHECK_CACHE_TTL,
+    CONF_CHILD_ACTIVITIES,
+    CONF_COUNTDOWN_INTERVAL,
+    CONF_DEDICATED_SESSION,
     CONF_DEVICE_NAME,
     CONF_DEVICE_TOKEN,
+    CONF_HEDGE_PERCENTILE,
+    CONF_KEEP_RAW_RESPONSE,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_MIN_POLL_INTERVAL,
+    CONF_OFFLINE_ENFORCEMENT,
     CONF_PAIR_ID,
     CONF_PAIR_TOKEN,
+    CONF_QUOTA_LOW_THRESHOLD,
+    CONF_REMAINING_TIME_STEP,
+    CONF_SETUP_CONCURRENCY,
     CONF_USER_ID,
+    DATA_CIRCUIT_BREAKERS,
+    DATA_POLL_SCHEDULER,
+    DATA_RATE_LIMITERS,
+    DEFAULT_ACCOUNT_POLLING,
+    DEFAULT_ACTIVITY_REFRESH_INTERVAL,
+    DEFAULT_CHECK_CACHE_TTL,
+    DEFAULT_COUNTDOWN_INTERVAL,
+    DEFAULT_DEDICATED_SESSION,
     DEFAULT_DEVICE_NAME,
     DEFAULT_DEVICE_TOKEN,
+    DEFAULT_HEDGE_PERCENTILE,
+    DEFAULT_KEEP_RAW_RESPONSE,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DEFAULT_OFFLINE_ENFORCEMENT,
+    DEFAULT_QUOTA_LOW_THRESHOLD,
+    DEFAULT_REMAINING_TIME_STEP,
+    DEFAULT_SETUP_CONCURRENCY,
     DOMAIN,
+    EVENT_DEBOUNCE,
+)
+from .coordinator import (
+    SCAN_INTERVAL,
+    Allow2AccountCoordinator,
+    Allow2DataUpdateCoordinator,
+    async_first_refresh,
 )
+from .countdown import CountdownEngine
+from .events import TransitionDetector
+from .hedging import HedgePolicy
+from .offline import OfflineEngine
+from .ratelimit import PRIORITY_BACKGROUND
+from .reconciler import RECONCILE_INTERVAL, Allow2ChildReconciler
+from .scheduler import PollScheduler
+from .services import async_setup_services
+from .session import KEEPALIVE_MARGIN, ConnectionStats, create_session
+from .storage import Allow2SnapshotStore
+from .usage import USAGE_LOG_INTERVAL, UsageLogQueue, async_remove_usage
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS: list[Platform] = [Platform.SENSOR, Platform.BINARY_SENSOR]
 
-# Update interval for checking quotas
-SCAN_INTERVAL = timedelta(minutes=5)
-
-
-class Allow2DataUpdateCoordinator(DataUpdateCoordinator):
-    """Coordinator for fetching Allow2 data for a specific child."""
-
-    def __init__(
-        self,
-        hass: HomeAssistant,
-        api: Allow2API,
-        user_id: int,
-        pair_id: int,
-        pair_token: str,
-        child_id: int,
-        child_name: str,
-        timezone: str,
-    ) -> None:
-        """Initialize the coordinator."""
-        super().__init__(
-            hass,
-            _LOGGER,
-            name=f"Allow2 {child_name}",
-            update_interval=SCAN_INTERVAL,
-        )
-        self.api = api
-        self.user_id = user_id
-        self.pair_id = pair_id
-        self.pair_token = pair_token
-        self.child_id = child_id
-        self.child_name = child_name
-        self.timezone = timezone
-
-    async def _async_update_data(self) -> dict[str, Any]:
-        """Fetch data from Allow2."""
-        try:
-            result = await self.api.check(
-                user_id=self.user_id,
-                pair_id=self.pair_id,
-                pair_token=self.pair_token,
-                child_id=self.child_id,
-                activities=list(ACTIVITIES.keys()),
-                timezone=self.timezone,
-                log=False,  # Don't log polling checks
-            )
-            return {
-                "allowed": result.allowed,
-                "activities": result.activities,
-                "raw": result.raw_response,
-            }
-        except (Allow2ConnectionError, Allow2AuthError) as err:
-            raise UpdateFailed(f"Error fetching Allow2 data: {err}") from err
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, _config: ConfigType) -> bool:
+    """Set up the Allow2 services."""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -103,17 +110,140 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """
     hass.data.setdefault(DOMAIN, {})
 
+    # In account polling mode a single coordinator fetches all children
+    # in one request and the per-child coordinators do not poll.
+    account_polling = entry.options.get(CONF_ACCOUNT_POLLING, DEFAULT_ACCOUNT_POLLING)
+    max_concurrency = entry.options.get(CONF_SETUP_CONCURRENCY, DEFAULT_SETUP_CONCURRENCY)
+
+    # A dedicated session keeps connections alive between regular polls
+    # and allows as many connections as children are fetched at once
+    connections: ConnectionStats | None = None
+    if entry.options.get(CONF_DEDICATED_SESSION, DEFAULT_DEDICATED_SESSION):
+        connections = ConnectionStats()
+        session = create_session(
+            SCAN_INTERVAL.total_seconds() + KEEPALIVE_MARGIN, max_concurrency, connections
+        )
+        # Also closes the session when a later step of the setup fails and
+        # the setup is retried, so each attempt does not leak a connector
+        entry.async_on_unload(session.close)
+
+        async def async_close_session(_event: Event) -> None:
+            """Close the session when Home Assistant stops."""
+            await session.close()
+
+        entry.async_on_unload(
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, async_close_session)
+        )
+    else:
+        session = async_get_clientsession(hass)
+
+    # Unlogged checks slower than this percentile of recent checks are hedged
+    hedge_percentile = entry.options.get(
+        CONF_HEDGE_PERCENTILE, DEFAULT_HEDGE_PERCENTILE
+    )
+
     # Create API client with stored credentials
-    session = async_get_clientsession(hass)
     api = Allow2API(
         session=session,
         device_token=entry.data.get(CONF_DEVICE_TOKEN, DEFAULT_DEVICE_TOKEN),
         device_name=entry.data.get(CONF_DEVICE_NAME, DEFAULT_DEVICE_NAME),
+        keep_raw_response=entry.options.get(
+            CONF_KEEP_RAW_RESPONSE, DEFAULT_KEEP_RAW_RESPONSE
+        ),
+        # Entries share one circuit breaker per API host
+        circuit_breakers=hass.data[DOMAIN].setdefault(DATA_CIRCUIT_BREAKERS, {}),
+        cache_ttl=entry.options.get(CONF_CHECK_CACHE_TTL, DEFAULT_CHECK_CACHE_TTL),
+        hedge_policy=HedgePolicy(hedge_percentile) if hedge_percentile else None,
+        # Entries using the same device token share one rate limit per host
+        rate_limiters=hass.data[DOMAIN].setdefault(DATA_RATE_LIMITERS, {}),
     )
 
     # Get timezone from Home Assistant
     timezone = str(hass.config.time_zone)
 
+    # Bounds for the adaptive poll interval
+    min_interval = timedelta(
+        seconds=entry.options.get(CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL)
+    )
+    max_interval = timedelta(
+        seconds=entry.options.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL)
+    )
+
+    # Local countdown of remaining time between polls
+    countdown_interval = entry.options.get(
+        CONF_COUNTDOWN_INTERVAL, DEFAULT_COUNTDOWN_INTERVAL
+    )
+    countdown = CountdownEngine() if countdown_interval else None
+    remaining_step = entry.options.get(
+        CONF_REMAINING_TIME_STEP, DEFAULT_REMAINING_TIME_STEP
+    )
+
+    # Activities each child has rules for, discovered from the checks
+    # and kept with the snapshots, unless configured per child
+    catalog = ActivityCatalog(
+        ACTIVITIES,
+        entry.options.get(
+            CONF_ACTIVITY_REFRESH_INTERVAL, DEFAULT_ACTIVITY_REFRESH_INTERVAL
+        ),
+        {
+            int(child_id): activity_ids
+            for child_id, activity_ids in entry.options.get(
+                CONF_CHILD_ACTIVITIES, {}
+            ).items()
+        },
+    )
+
+    # Last good data of each child, restored before the first refresh
+    max_staleness = timedelta(
+        seconds=entry.options.get(CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS)
+    )
+    snapshots = Allow2SnapshotStore(hass, entry.entry_id, catalog)
+
+    # Local evaluation of cached time blocks and quotas during outages
+    offline = (
+        OfflineEngine()
+        if entry.options.get(CONF_OFFLINE_ENFORCEMENT, DEFAULT_OFFLINE_ENFORCEMENT)
+        else None
+    )
+    restored = await snapshots.async_load()
+
+    # Transition events, shared by all children of the entry
+    quota_threshold = entry.options.get(
+        CONF_QUOTA_LOW_THRESHOLD, DEFAULT_QUOTA_LOW_THRESHOLD
+    )
+    events = TransitionDetector(quota_threshold, EVENT_DEBOUNCE)
+
+    # Regular polls of all entries are spread over the poll interval
+    poll_scheduler: PollScheduler = hass.data[DOMAIN].setdefault(
+        DATA_POLL_SCHEDULER, PollScheduler()
+    )
+
+    def create_coordinator(
+        child_id: int, child_name: str
+    ) -> Allow2DataUpdateCoordinator:
+        """Create the coordinator of a child."""
+        return Allow2DataUpdateCoordinator(
+            hass,
+            api=api,
+            user_id=entry.data[CONF_USER_ID],
+            pair_id=entry.data[CONF_PAIR_ID],
+            pair_token=entry.data[CONF_PAIR_TOKEN],
+            child_id=child_id,
+            child_name=child_name,
+            timezone=timezone,
+            update_interval=None if account_polling else SCAN_INTERVAL,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            countdown=countdown,
+            offline=offline,
+            events=events,
+            snapshots=snapshots,
+            catalog=catalog,
+            max_staleness=max_staleness,
+            remaining_step=remaining_step,
+            poll_scheduler=poll_scheduler,
+        )
+
     # Create coordinators for each child
     children: list[dict[str, Any]] = entry.data.get("children", [])
     coordinators: dict[int, Allow2DataUpdateCoordinator] = {}
@@ -125,29 +255,118 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         if not child_id:
             continue
 
-        coordinator = Allow2DataUpdateCoordinator(
+        coordinator = create_coordinator(child_id, child_name)
+        if child_id in restored:
+            coordinator.async_restore(*restored[child_id])
+        coordinators[child_id] = coordinator
+
+    account_coordinator: Allow2AccountCoordinator | None = None
+    if account_polling and coordinators:
+        account_coordinator = Allow2AccountCoordinator(
             hass,
             api=api,
+            user_id=entry.data[CONF_USER_ID],
+            pair_id=entry.data[CONF_PAIR_ID],
+            pair_token=entry.data[CONF_PAIR_TOKEN],
+            timezone=timezone,
+            children=coordinators,
+            max_concurrency=max_concurrency,
+            min_interval=min_interval,
+            max_interval=max_interval,
+            quota_threshold=quota_threshold,
+            poll_scheduler=poll_scheduler,
+            countdown=countdown,
+        )
+
+        # No entity listens to the account coordinator directly, so
+        # register a listener to keep its scheduled polling running.
+        entry.async_on_unload(account_coordinator.async_add_listener(lambda: None))
+
+    # Children added to, removed from or renamed in the account later
+    # are reconciled without reloading the entry
+    reconciler = Allow2ChildReconciler(
+        hass, entry, api, coordinators, create_coordinator, snapshots
+    )
+    reconciler.account = account_coordinator
+
+    async def async_log_usage(child_id: int, activity_ids: list[int]) -> CheckResult:
+        """Log usage of a child's activities with a logged check."""
+        result = await api.check(
             user_id=entry.data[CONF_USER_ID],
             pair_id=entry.data[CONF_PAIR_ID],
             pair_token=entry.data[CONF_PAIR_TOKEN],
             child_id=child_id,
-            child_name=child_name,
+            activities=activity_ids,
             timezone=timezone,
+            log=True,
+            decode_children=(),
+            priority=PRIORITY_BACKGROUND,
         )
+        # The check returns fresh status of the logged activities
+        if (coordinator := coordinators.get(child_id)) is not None:
+            coordinator.async_set_checked_activities(result.activities)
+        return result
 
-        # Fetch initial data
-        await coordinator.async_config_entry_first_refresh()
-        coordinators[child_id] = coordinator
+    # Usage reported through the log_usage service, sent in batches
+    usage = UsageLogQueue(hass, entry.entry_id, async_log_usage)
+    await usage.async_load()
+
+    @callback
+    def async_child_changed(child_id: int, added: bool) -> None:
+        """Drop the pending usage of a child removed from the account."""
+        if not added:
+            usage.async_remove_child(child_id)
+
+    entry.async_on_unload(reconciler.add_listener(async_child_changed))
+
+    # Fetch initial data. Children whose first fetch fails come up
+    # unavailable and retry instead of failing the whole entry. When
+    # every child was restored from a snapshot, entities are set up with
+    # the restored data right away and revalidated in the background.
+    setup_stats: dict[str, Any] = {
+        "children": len(coordinators),
+        "restored": [
+            child_id
+            for child_id, coordinator in coordinators.items()
+            if coordinator.restored
+        ],
+        "max_concurrency": max_concurrency,
+    }
+    initial_refresh = _async_initial_refresh(
+        [account_coordinator] if account_coordinator else list(coordinators.values()),
+        coordinators,
+        max_concurrency,
+        setup_stats,
+    )
+    if coordinators and len(setup_stats["restored"]) == len(coordinators):
+        entry.async_create_background_task(
+            hass, initial_refresh, f"Allow2 initial refresh {entry.entry_id}"
+        )
+    else:
+        await initial_refresh
 
     # Store entry data for platforms
     hass.data[DOMAIN][entry.entry_id] = {
         "api": api,
+        "connections": connections,
         "user_id": entry.data[CONF_USER_ID],
         "pair_id": entry.data[CONF_PAIR_ID],
         "pair_token": entry.data[CONF_PAIR_TOKEN],
         "children": children,
         "coordinators": coordinators,
+        "account_coordinator": account_coordinator,
+        "countdown": countdown,
+        "offline": offline,
+        "events": events,
+        "snapshots": snapshots,
+        "catalog": catalog,
+        "reconciler": reconciler,
+        "usage": usage,
+        "poll_scheduler": poll_scheduler,
+        "setup_stats": setup_stats,
+        # Options the entry was set up with, to tell option changes
+        # from entry data updates of the reconciler
+        "options": dict(entry.options),
     }
 
     _LOGGER.info(
@@ -159,18 +378,78 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     # Set up platforms
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    if countdown is not None:
+        entry.async_on_unload(
+            async_track_time_interval(
+                hass,
+                lambda _now: countdown.tick(),
+                timedelta(seconds=countdown_interval),
+            )
+        )
+
+    # Compare the children with the account periodically. Changes are
+    # rare, so the first comparison waits for the interval too.
+    entry.async_on_unload(
+        async_track_time_interval(hass, reconciler.async_reconcile, RECONCILE_INTERVAL)
+    )
+
+    entry.async_on_unload(
+        async_track_time_interval(hass, usage.async_flush, USAGE_LOG_INTERVAL)
+    )
+
+    # Apply option changes by reloading the entry
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
     return True
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        # Write pending snapshots before a reload loads them again
+        await data["snapshots"].async_save()
+        # Send the usage reported so far, keeping what could not be sent
+        await data["usage"].async_flush()
+        await data["usage"].async_save()
 
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored snapshots and usage of a removed config entry."""
+    await Allow2SnapshotStore(hass, entry.entry_id).async_remove()
+    await async_remove_usage(hass, entry.entry_id)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    """Reload config entry when its options changed."""
+    data = hass.data[DOMAIN].get(entry.entry_id)
+    if data is not None and data["options"] == dict(entry.options):
+        # Children are reconciled in place
+        return
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
+async def _async_initial_refresh(
+    refresh: list[DataUpdateCoordinator],
+    coordinators: dict[int, Allow2DataUpdateCoordinator],
+    max_concurrency: int,
+    setup_stats: dict[str, Any],
+) -> None:
+    """Run the initial refresh and record its timing in ``setup_stats``."""
+    start = time.monotonic()
+    await async_first_refresh(refresh, max_concurrency)
+    setup_stats["duration"] = round(time.monotonic() - start, 3)
+    setup_stats["failed"] = [
+        child_id
+        for child_id, coordinator in coordinators.items()
+        if not coordinator.last_update_success or coordinator.data is None
+    ]
+    _LOGGER.info(
+        "Initial Allow2 refresh of %d children took %.2fs (%d failed, %d restored)",
+        setup_stats["children"],
+        setup_stats["duration"],
+        len(setup_stats["failed"]),
+        len(setup_stats["restored"]),
+    )
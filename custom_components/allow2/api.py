@@ -2,24 +2,63 @@
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
-from dataclasses import dataclass
-from typing import Any
+import time
+from collections.abc import Awaitable, Callable, Collection, Hashable, Iterable
+from dataclasses import dataclass, field
+from typing import Any, Final, TypeVar
+from urllib.parse import urlsplit
 
 import aiohttp
-from aiohttp import ClientError, ClientResponseError, ClientTimeout
+from aiohttp import ClientError, ClientTimeout
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
 
 from .const import (
     API_BASE_URL,
     API_CHECK_ENDPOINT,
+    API_CONNECT_TIMEOUT,
     API_PAIR_ENDPOINT,
-    API_TIMEOUT,
+    API_RATE_LIMIT,
+    API_RATE_LIMIT_BURST,
+    API_READ_TIMEOUT,
+    API_TOTAL_TIMEOUT,
     DEFAULT_DEVICE_NAME,
     DEFAULT_DEVICE_TOKEN,
 )
+from .hedging import HedgePolicy
+from .ratelimit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+    RateLimitExceeded,
+    TokenBucketLimiter,
+)
+from .resilience import CircuitBreaker, RetryPolicy, parse_retry_after
 
 _LOGGER = logging.getLogger(__name__)
 
+# Responses larger than this are decoded in the executor
+LARGE_RESPONSE_BYTES: Final = 256 * 1024
+
+# How ActivityStatus fields after activity_id and name are decoded from
+# an activity of the check response: (response key, default). A missing
+# timeBlockAllowed is inferred by _infer_time_block_allowed.
+_ACTIVITY_SCHEMA: Final = (
+    ("allowed", False),
+    ("banned", False),
+    ("remaining", None),
+    ("timeBlockAllowed", None),
+    ("timeBlockEnds", None),
+)
+
+_json_loads = orjson.loads if orjson is not None else json.loads
+
+_T = TypeVar("_T")
+
 
 @dataclass
 class PairResult:
@@ -41,19 +80,26 @@ class PairResult:
         )
 
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class CheckResult:
-    """Result from quota check."""
+    """Result from quota check.
+
+    The raw response is only kept when the client was created with
+    ``keep_raw_response``, as it holds the status of every child.
+    ``child_names`` holds the name of every child in the response, also
+    of children that were not decoded.
+    """
 
     allowed: bool
     activities: dict[int, ActivityStatus]
     children: dict[int, ChildStatus]
     day_types: dict[str, Any]
     subscription: dict[str, Any]
-    raw_response: dict[str, Any]
+    raw_response: dict[str, Any] | None = None
+    child_names: dict[int, str] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(slots=True)
 class ActivityStatus:
     """Status for a single activity."""
 
@@ -63,9 +109,11 @@ class ActivityStatus:
     banned: bool
     remaining_seconds: int | None
     time_block_allowed: bool
+    # Unix time the current time block ends, when the API reports it
+    time_block_ends: float | None = None
 
 
-@dataclass
+@dataclass(slots=True)
 class ChildStatus:
     """Status for a single child."""
 
@@ -87,10 +135,27 @@ class Allow2ConnectionError(Allow2Error):
     """Connection error."""
 
 
+class Allow2CircuitOpenError(Allow2ConnectionError):
+    """Request rejected without being sent because the circuit is open."""
+
+
+class Allow2RateLimitError(Allow2ConnectionError):
+    """Request shed by the client-side rate limiter without being sent."""
+
+
 class Allow2ResponseError(Allow2Error):
     """Invalid response error."""
 
 
+class _TransientError(Exception):
+    """Request failure that may succeed when retried."""
+
+    def __init__(self, message: str, retry_after: float | None = None) -> None:
+        """Initialize the error."""
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class Allow2API:
     """Allow2 API client.
 
@@ -108,6 +173,13 @@ class Allow2API:
         session: aiohttp.ClientSession,
         device_token: str = DEFAULT_DEVICE_TOKEN,
         device_name: str = DEFAULT_DEVICE_NAME,
+        keep_raw_response: bool = False,
+        retry_policy: RetryPolicy | None = None,
+        circuit_breakers: dict[str, CircuitBreaker] | None = None,
+        cache_ttl: float = 0,
+        rate_limiters: dict[tuple[str, str], TokenBucketLimiter] | None = None,
+        base_url: str = API_BASE_URL,
+        hedge_policy: HedgePolicy | None = None,
     ) -> None:
         """Initialize the Allow2 API client.
 
@@ -115,17 +187,77 @@ class Allow2API:
             session: aiohttp client session for making requests
             device_token: Device token for Allow2 (default is Home Assistant token)
             device_name: Name to display in Allow2 dashboard
+            keep_raw_response: Keep the raw check response in CheckResult
+                (for debugging)
+            retry_policy: Retry policy for transient failures
+            circuit_breakers: Circuit breakers by host, shared between
+                clients talking to the same host
+            cache_ttl: Seconds to serve repeated unlogged checks from a
+                cache, 0 to only coalesce concurrent identical checks
+            rate_limiters: Rate limiters by device token and host, shared
+                between clients, or None to not limit the request rate
+            base_url: API base URL, e.g. of a local stand-in server
+            hedge_policy: Policy for hedging unlogged checks, or None to
+                never hedge
         """
         self._session = session
         self._device_token = device_token
         self._device_name = device_name
-        self._timeout = ClientTimeout(total=API_TIMEOUT)
+        self._keep_raw_response = keep_raw_response
+        # The total timeout is generous, so a slow pool or body does not
+        # fail a request that keeps making progress, but a response that
+        # trickles in does not hold a request forever
+        self._timeout = ClientTimeout(
+            total=API_TOTAL_TIMEOUT,
+            connect=API_CONNECT_TIMEOUT,
+            sock_read=API_READ_TIMEOUT,
+        )
+        self._retry_policy = retry_policy or RetryPolicy()
+        self._base_url = base_url
+        self._hedge = hedge_policy
+        self._host = urlsplit(base_url).hostname or base_url
+        if circuit_breakers is None:
+            circuit_breakers = {}
+        self._breaker = circuit_breakers.setdefault(self._host, CircuitBreaker())
+        self._limiter: TokenBucketLimiter | None = None
+        if rate_limiters is not None:
+            self._limiter = rate_limiters.setdefault(
+                (device_token, self._host),
+                TokenBucketLimiter(API_RATE_LIMIT, API_RATE_LIMIT_BURST),
+            )
+        self._requests = 0
+        self._retries = 0
+        self._failures = 0
+        self._cache_ttl = cache_ttl
+        self._cache: dict[Hashable, tuple[float, Any]] = {}
+        self._inflight: dict[Hashable, asyncio.Future[Any]] = {}
+        self._cache_hits = 0
+        self._cache_misses = 0
+        self._coalesced = 0
 
     @property
     def device_token(self) -> str:
         """Return the device token."""
         return self._device_token
 
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return request, retry, circuit and rate limit statistics."""
+        return {
+            "requests": self._requests,
+            "retries": self._retries,
+            "failures": self._failures,
+            "circuit": {self._host: self._breaker.stats},
+            "rate_limit": self._limiter.stats if self._limiter is not None else None,
+            "hedging": self._hedge.stats if self._hedge is not None else None,
+            "cache": {
+                "ttl": self._cache_ttl,
+                "hits": self._cache_hits,
+                "misses": self._cache_misses,
+                "coalesced": self._coalesced,
+            },
+        }
+
     async def pair(self, email: str, password: str) -> PairResult:
         """Pair this device with an Allow2 account.
 
@@ -145,7 +277,6 @@ class Allow2API:
             Allow2ConnectionError: If connection fails
             Allow2ResponseError: If response is invalid
         """
-        url = f"{API_BASE_URL}{API_PAIR_ENDPOINT}"
         payload = {
             "user": email,
             "pass": password,
@@ -155,62 +286,46 @@ class Allow2API:
 
         _LOGGER.debug("Pairing device with Allow2: %s", self._device_name)
 
-        try:
-            async with self._session.post(
-                url,
-                data=payload,
-                timeout=self._timeout,
-            ) as response:
-                data = await response.json()
-
-                _LOGGER.debug("Pair response status: %d", response.status)
-
-                # Check for API-level errors in response
-                if "error" in data:
-                    error_msg = data.get("error", "Unknown error")
-                    error_code = data.get("errorCode", 0)
-                    _LOGGER.error(
-                        "Allow2 pairing failed: %s (code: %d)",
-                        error_msg,
-                        error_code,
-                    )
-                    raise Allow2AuthError(error_msg)
-
-                # Validate required fields
-                required_fields = ["userId", "pairId", "token"]
-                missing = [f for f in required_fields if f not in data]
-                if missing:
-                    _LOGGER.error("Missing fields in pair response: %s", missing)
-                    raise Allow2ResponseError(
-                        f"Missing required fields: {', '.join(missing)}"
-                    )
-
-                return PairResult.from_response(data)
+        # Pairing is user initiated, so failures are reported right away
+        body = await self._post(
+            API_PAIR_ENDPOINT, payload, "pairing", retry=False, priority=PRIORITY_USER
+        )
+        data = _decode_json(body)
+
+        # Check for API-level errors in response
+        if "error" in data:
+            error_msg = data.get("error", "Unknown error")
+            error_code = data.get("errorCode", 0)
+            _LOGGER.error(
+                "Allow2 pairing failed: %s (code: %d)",
+                error_msg,
+                error_code,
+            )
+            raise Allow2AuthError(error_msg)
+
+        # Validate required fields
+        required_fields = ["userId", "pairId", "token"]
+        missing = [f for f in required_fields if f not in data]
+        if missing:
+            _LOGGER.error("Missing fields in pair response: %s", missing)
+            raise Allow2ResponseError(
+                f"Missing required fields: {', '.join(missing)}"
+            )
 
-        except aiohttp.ContentTypeError as err:
-            _LOGGER.error("Invalid response content type: %s", err)
-            raise Allow2ResponseError("Invalid response format") from err
-        except ClientResponseError as err:
-            _LOGGER.error("HTTP error during pairing: %s", err)
-            if err.status in (401, 403):
-                raise Allow2AuthError("Invalid credentials") from err
-            raise Allow2ConnectionError(f"HTTP error: {err.status}") from err
-        except ClientError as err:
-            _LOGGER.error("Connection error during pairing: %s", err)
-            raise Allow2ConnectionError(str(err)) from err
-        except TimeoutError as err:
-            _LOGGER.error("Timeout during pairing")
-            raise Allow2ConnectionError("Request timed out") from err
+        return PairResult.from_response(data)
 
     async def check(
         self,
         user_id: int,
         pair_id: int,
         pair_token: str,
-        child_id: int,
+        child_id: int | None,
         activities: list[int],
         timezone: str = "UTC",
         log: bool = True,
+        decode_children: Collection[int] | None = None,
+        priority: int = PRIORITY_USER,
+        max_age: float | None = None,
     ) -> CheckResult:
         """Check quota/allowance for a child and activities.
 
@@ -220,10 +335,17 @@ class Allow2API:
             user_id: User ID from pairing
             pair_id: Pair ID from pairing
             pair_token: Pair token from pairing
-            child_id: ID of the child to check
+            child_id: ID of the child to check, or None to check all
+                children of the account in one request (see
+                CheckResult.children)
             activities: List of activity IDs to check
             timezone: Timezone for the check (e.g., "America/New_York")
             log: Whether to log this check in Allow2 dashboard
+            decode_children: IDs of the children to decode from the
+                response's children map, or None to decode all of them
+            priority: Rate limiter priority, PRIORITY_BACKGROUND for polling
+            max_age: Seconds a cached result of an unlogged check may be
+                old, None to accept any result within the cache TTL
 
         Returns:
             CheckResult with allowed status and activity details
@@ -233,113 +355,153 @@ class Allow2API:
             Allow2ConnectionError: If connection fails
             Allow2ResponseError: If response is invalid
         """
-        url = f"{API_BASE_URL}{API_CHECK_ENDPOINT}"
         payload = {
             "userId": user_id,
             "pairId": pair_id,
             "pairToken": pair_token,
             "deviceToken": self._device_token,
             "tz": timezone,
-            "childId": child_id,
             "activities": ",".join(str(a) for a in activities),
             "log": "true" if log else "false",
         }
+        if child_id is not None:
+            payload["childId"] = child_id
 
-        _LOGGER.debug(
-            "Checking quota for child %d, activities: %s",
+        if log:
+            return await self._check(payload, activities, decode_children, priority)
+
+        # Unlogged checks have no side effects, so identical ones are shared
+        key = (
+            "check",
+            user_id,
+            pair_id,
             child_id,
+            tuple(activities),
+            timezone,
+            None if decode_children is None else frozenset(decode_children),
+        )
+        return await self._single_flight(
+            key,
+            lambda: self._check(payload, activities, decode_children, priority),
+            max_age,
+        )
+
+    async def _check(
+        self,
+        payload: dict[str, Any],
+        activities: list[int],
+        decode_children: Collection[int] | None,
+        priority: int,
+    ) -> CheckResult:
+        """Send a check request and decode the response."""
+        _LOGGER.debug(
+            "Checking quota for child %s, activities: %s",
+            payload.get("childId"),
             activities,
         )
 
-        try:
-            async with self._session.post(
-                url,
-                data=payload,
-                timeout=self._timeout,
-            ) as response:
-                data = await response.json()
-
-                _LOGGER.debug("Check response status: %d", response.status)
-
-                # Check for API-level errors
-                if "error" in data:
-                    error_msg = data.get("error", "Unknown error")
-                    _LOGGER.error("Allow2 check failed: %s", error_msg)
-                    raise Allow2AuthError(error_msg)
-
-                return self._parse_check_response(data)
-
-        except aiohttp.ContentTypeError as err:
-            _LOGGER.error("Invalid response content type: %s", err)
-            raise Allow2ResponseError("Invalid response format") from err
-        except ClientResponseError as err:
-            _LOGGER.error("HTTP error during check: %s", err)
-            if err.status in (401, 403):
-                raise Allow2AuthError("Invalid credentials") from err
-            raise Allow2ConnectionError(f"HTTP error: {err.status}") from err
-        except ClientError as err:
-            _LOGGER.error("Connection error during check: %s", err)
-            raise Allow2ConnectionError(str(err)) from err
-        except TimeoutError as err:
-            _LOGGER.error("Timeout during check")
-            raise Allow2ConnectionError("Request timed out") from err
+        # Logged checks are not retried or hedged so usage is never
+        # recorded twice
+        retry = payload["log"] == "false"
+        body = await self._post(
+            API_CHECK_ENDPOINT,
+            payload,
+            "check",
+            retry=retry,
+            priority=priority,
+            hedge=retry,
+        )
+
+        if len(body) > LARGE_RESPONSE_BYTES:
+            return await asyncio.get_running_loop().run_in_executor(
+                None, self._decode_check_response, body, activities, decode_children
+            )
+        return self._decode_check_response(body, activities, decode_children)
+
+    def _decode_check_response(
+        self,
+        body: bytes,
+        activity_ids: Iterable[int] | None,
+        child_ids: Iterable[int] | None,
+    ) -> CheckResult:
+        """Decode a raw check response body into a CheckResult.
 
-    def _parse_check_response(self, data: dict[str, Any]) -> CheckResult:
+        Raises:
+            Allow2AuthError: If the response reports an error
+            Allow2ResponseError: If the body is not a JSON object
+        """
+        data = _decode_json(body)
+
+        # Check for API-level errors
+        if "error" in data:
+            error_msg = data.get("error", "Unknown error")
+            _LOGGER.error("Allow2 check failed: %s", error_msg)
+            raise Allow2AuthError(error_msg)
+
+        return self._parse_check_response(data, activity_ids, child_ids)
+
+    def _parse_check_response(
+        self,
+        data: dict[str, Any],
+        activity_ids: Iterable[int] | None = None,
+        child_ids: Iterable[int] | None = None,
+    ) -> CheckResult:
         """Parse the check API response into a CheckResult.
 
+        Only the requested activities and children are decoded; the
+        rest of the response is skipped. Children and activities that are
+        missing or not JSON objects are left out.
+
         Args:
             data: Raw API response dictionary
+            activity_ids: Activities to decode, or None for all
+            child_ids: Children to decode, or None for all
 
         Returns:
             Parsed CheckResult
         """
-        # Parse overall allowed status
-        allowed = data.get("allowed", False)
-
-        # Parse activities
-        activities_data = data.get("activities", {})
-        activities = {}
-        for activity_id_str, activity_info in activities_data.items():
-            activity_id = int(activity_id_str)
-            activities[activity_id] = ActivityStatus(
-                activity_id=activity_id,
-                name=activity_info.get("name", f"Activity {activity_id}"),
-                allowed=activity_info.get("allowed", False),
-                banned=activity_info.get("banned", False),
-                remaining_seconds=activity_info.get("remaining"),
-                time_block_allowed=activity_info.get("timeBlockAllowed", False),
-            )
+        # Response keys are strings, so look requested IDs up by string
+        activity_keys = (
+            None
+            if activity_ids is None
+            else tuple((activity_id, str(activity_id)) for activity_id in activity_ids)
+        )
+
+        children_data: dict[str, Any] = _object(data.get("children"))
+        if child_ids is None:
+            child_items = [
+                (int(child_id_str), child_info)
+                for child_id_str, child_info in children_data.items()
+            ]
+        else:
+            child_items = [
+                (child_id, children_data.get(str(child_id))) for child_id in child_ids
+            ]
 
-        # Parse children status
-        children_data = data.get("children", {})
         children = {}
-        for child_id_str, child_info in children_data.items():
-            child_id = int(child_id_str)
-            child_activities = {}
-            for act_id_str, act_info in child_info.get("activities", {}).items():
-                act_id = int(act_id_str)
-                child_activities[act_id] = ActivityStatus(
-                    activity_id=act_id,
-                    name=act_info.get("name", f"Activity {act_id}"),
-                    allowed=act_info.get("allowed", False),
-                    banned=act_info.get("banned", False),
-                    remaining_seconds=act_info.get("remaining"),
-                    time_block_allowed=act_info.get("timeBlockAllowed", False),
-                )
+        for child_id, child_info in child_items:
+            if not isinstance(child_info, dict):
+                continue
             children[child_id] = ChildStatus(
                 child_id=child_id,
-                name=child_info.get("name", f"Child {child_id}"),
+                name=child_info.get("name") or f"Child {child_id}",
                 allowed=child_info.get("allowed", False),
-                activities=child_activities,
+                activities=_decode_activities(
+                    _object(child_info.get("activities")), activity_keys
+                ),
             )
 
         return CheckResult(
-            allowed=allowed,
-            activities=activities,
+            allowed=data.get("allowed", False),
+            activities=_decode_activities(_object(data.get("activities")), activity_keys),
             children=children,
             day_types=data.get("dayTypes", {}),
             subscription=data.get("subscription", {}),
-            raw_response=data,
+            raw_response=data if self._keep_raw_response else None,
+            child_names={
+                int(child_id_str): _object(child_info).get("name") or f"Child {child_id_str}"
+                for child_id_str, child_info in children_data.items()
+            },
         )
 
     async def get_children(
@@ -361,7 +523,6 @@ class Allow2API:
         Returns:
             List of children with their IDs and names
         """
-        url = f"{API_BASE_URL}{API_CHECK_ENDPOINT}"
         payload = {
             "userId": user_id,
             "pairId": pair_id,
@@ -371,26 +532,320 @@ class Allow2API:
             "log": "false",
         }
 
+        return await self._single_flight(
+            ("children", user_id, pair_id), lambda: self._get_children(payload)
+        )
+
+    async def _get_children(self, payload: dict[str, Any]) -> list[dict[str, Any]]:
+        """Send a check request and return the children in the response."""
+        body = await self._post(
+            API_CHECK_ENDPOINT,
+            payload,
+            "getting children",
+            retry=True,
+            priority=PRIORITY_BACKGROUND,
+        )
+        data = _decode_json(body)
+
+        if "error" in data:
+            raise Allow2AuthError(data.get("error", "Unknown error"))
+
+        children = []
+        for child_id_str, child_info in data.get("children", {}).items():
+            children.append({
+                "id": int(child_id_str),
+                "name": child_info.get("name", f"Child {child_id_str}"),
+            })
+
+        return children
+
+    async def _single_flight(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable[_T]],
+        max_age: float | None = None,
+    ) -> _T:
+        """Share one request between concurrent callers with the same key.
+
+        While a request for ``key`` is in flight, further callers wait for
+        its result instead of sending their own. With a cache TTL, the
+        result is also served to callers within the TTL, unless it is
+        older than ``max_age`` seconds.
+        """
+        if self._cache_ttl:
+            cached = self._cache.get(key)
+            now = time.monotonic()
+            if (
+                cached is not None
+                and cached[0] > now
+                and (max_age is None or now - (cached[0] - self._cache_ttl) <= max_age)
+            ):
+                self._cache_hits += 1
+                return cached[1]
+
+        if (future := self._inflight.get(key)) is not None:
+            self._coalesced += 1
+            return await asyncio.shield(future)
+
+        self._cache_misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await fetch()
+        except asyncio.CancelledError:
+            future.set_exception(Allow2ConnectionError("Request cancelled"))
+            raise
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(result)
+            if self._cache_ttl:
+                now = time.monotonic()
+                self._cache = {
+                    cache_key: entry
+                    for cache_key, entry in self._cache.items()
+                    if entry[0] > now
+                }
+                self._cache[key] = (now + self._cache_ttl, result)
+            return result
+        finally:
+            del self._inflight[key]
+            if future.done() and not future.cancelled():
+                # Mark the exception as retrieved when nobody else waited
+                future.exception()
+
+    async def _post(
+        self,
+        endpoint: str,
+        payload: dict[str, Any],
+        action: str,
+        retry: bool,
+        priority: int = PRIORITY_USER,
+        hedge: bool = False,
+    ) -> bytes:
+        """POST a form to the Allow2 API and return the response body.
+
+        Connection errors, timeouts, HTTP 429 and 5xx responses are
+        transient. With ``retry`` they are retried with jittered
+        exponential backoff, honouring Retry-After. Every attempt goes
+        through the host's circuit breaker, so while the API is down
+        requests fail fast instead of waiting for the timeout. With a rate
+        limiter, every attempt first waits for a token; retries queue
+        behind user requests. With ``hedge`` and a hedge policy, a slow
+        attempt is raced against a second copy of the request.
+
+        Args:
+            endpoint: API endpoint path
+            payload: Form data to send
+            action: Description of the request for log messages
+            retry: Whether transient failures may be retried
+            priority: Rate limiter priority of the first attempt
+            hedge: Whether the request is idempotent and may be hedged
+
+        Raises:
+            Allow2AuthError: If the API rejects the credentials
+            Allow2CircuitOpenError: If the circuit for the host is open
+            Allow2RateLimitError: If the rate limiter shed the request
+            Allow2ConnectionError: If the request failed
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+            if self._limiter is not None:
+                try:
+                    await self._limiter.acquire(
+                        priority if attempt == 1 else PRIORITY_BACKGROUND
+                    )
+                except RateLimitExceeded as err:
+                    self._failures += 1
+                    _LOGGER.warning("Rate limit exceeded during %s: %s", action, err)
+                    raise Allow2RateLimitError(str(err)) from err
+
+            if not self._breaker.allow_request():
+                self._failures += 1
+                raise Allow2CircuitOpenError(
+                    f"Allow2 API unavailable, retrying in {self._breaker.retry_in:.0f}s"
+                )
+
+            self._requests += 1
+            try:
+                if hedge and self._hedge is not None:
+                    body = await self._send_hedged(endpoint, payload, self._hedge)
+                else:
+                    body = await self._send(endpoint, payload)
+            except _TransientError as err:
+                self._breaker.record_failure(err.retry_after)
+                delay = self._retry_policy.delay(attempt, err.retry_after) if retry else None
+                if delay is None:
+                    self._failures += 1
+                    _LOGGER.error("Error during %s: %s", action, err)
+                    raise Allow2ConnectionError(str(err)) from err
+                self._retries += 1
+                _LOGGER.debug(
+                    "Error during %s: %s, retrying in %.1fs", action, err, delay
+                )
+                await asyncio.sleep(delay)
+            except Allow2AuthError:
+                # The host answered, so it is not a reason to open the circuit
+                self._breaker.record_success()
+                self._failures += 1
+                _LOGGER.error("Authentication failed during %s", action)
+                raise
+            except BaseException:
+                self._breaker.abandon()
+                raise
+            else:
+                self._breaker.record_success()
+                return body
+
+    async def _send_hedged(
+        self, endpoint: str, payload: dict[str, Any], policy: HedgePolicy
+    ) -> bytes:
+        """Send a request, and a second copy if the first is slow.
+
+        The first successful response wins and the other request is
+        cancelled. The copy goes out on another connection of the pool,
+        and only when the rate limiter has a token to spare.
+
+        Raises:
+            Allow2AuthError: On HTTP 401 or 403
+            _TransientError: If every sent copy failed
+        """
+        loop = asyncio.get_running_loop()
+        delay = policy.delay()
+        if delay is None:
+            # Not enough latencies yet to tell a slow request
+            start = loop.time()
+            body = await self._send(endpoint, payload)
+            policy.record_latency(loop.time() - start)
+            return body
+
+        started = {asyncio.ensure_future(self._send(endpoint, payload)): loop.time()}
+        primary = next(iter(started))
+        pending = set(started)
+        try:
+            done, _ = await asyncio.wait(pending, timeout=delay)
+            if not done:
+                sent = self._limiter is None or self._limiter.try_acquire()
+                policy.record_hedge(sent)
+                if sent:
+                    self._requests += 1
+                    hedge = asyncio.ensure_future(self._send(endpoint, payload))
+                    started[hedge] = loop.time()
+                    pending.add(hedge)
+
+            error: BaseException | None = None
+            while pending:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        policy.record_latency(loop.time() - started[task])
+                        if task is not primary:
+                            policy.record_hedge_win()
+                        return task.result()
+                    if not isinstance(task.exception(), _TransientError):
+                        raise task.exception()  # type: ignore[misc]
+                    # The first error is raised if every copy fails
+                    error = error or task.exception()
+            raise error  # type: ignore[misc]
+        finally:
+            for task in pending:
+                # A lower bound of the loser's latency keeps the tail sampled
+                policy.record_latency(loop.time() - started[task])
+                task.cancel()
+
+    async def _send(self, endpoint: str, payload: dict[str, Any]) -> bytes:
+        """Send a single request and return the response body.
+
+        Raises:
+            Allow2AuthError: On HTTP 401 or 403
+            _TransientError: If the request may succeed when retried
+        """
         try:
             async with self._session.post(
-                url,
+                f"{self._base_url}{endpoint}",
                 data=payload,
                 timeout=self._timeout,
             ) as response:
-                data = await response.json()
+                _LOGGER.debug("%s response status: %d", endpoint, response.status)
+
+                if response.status in (401, 403):
+                    raise Allow2AuthError("Invalid credentials")
+                if response.status == 429 or response.status >= 500:
+                    raise _TransientError(
+                        f"HTTP error: {response.status}",
+                        parse_retry_after(response.headers.get("Retry-After")),
+                    )
 
-                if "error" in data:
-                    raise Allow2AuthError(data.get("error", "Unknown error"))
+                return await response.read()
+
+        except ClientError as err:
+            raise _TransientError(str(err) or type(err).__name__) from err
+        except TimeoutError as err:
+            raise _TransientError("Request timed out") from err
 
-                children = []
-                for child_id_str, child_info in data.get("children", {}).items():
-                    children.append({
-                        "id": int(child_id_str),
-                        "name": child_info.get("name", f"Child {child_id_str}"),
-                    })
 
-                return children
+def _decode_json(body: bytes) -> dict[str, Any]:
+    """Decode a JSON object response body.
 
-        except (ClientError, TimeoutError) as err:
-            _LOGGER.error("Error getting children: %s", err)
-            raise Allow2ConnectionError(str(err)) from err
+    Raises:
+        Allow2ResponseError: If the body is not a JSON object
+    """
+    try:
+        data = _json_loads(body)
+    except ValueError as err:
+        _LOGGER.error("Invalid response from Allow2: %s", err)
+        raise Allow2ResponseError("Invalid response format") from err
+
+    if not isinstance(data, dict):
+        raise Allow2ResponseError("Invalid response format")
+    return data
+
+
+def _object(value: Any) -> dict[str, Any]:
+    """Return a JSON object of a response, or an empty one if it is not an object."""
+    return value if isinstance(value, dict) else {}
+
+
+def _decode_activities(
+    activities_data: dict[str, Any],
+    activity_keys: tuple[tuple[int, str], ...] | None,
+) -> dict[int, ActivityStatus]:
+    """Decode activities of a check response following _ACTIVITY_SCHEMA.
+
+    Args:
+        activities_data: Activities keyed by activity ID string
+        activity_keys: (activity ID, response key) pairs to decode, or
+            None to decode every activity in the response
+    """
+    if activity_keys is None:
+        items: Iterable[tuple[int, Any]] = (
+            (int(key), info) for key, info in activities_data.items()
+        )
+    else:
+        items = ((activity_id, activities_data.get(key)) for activity_id, key in activity_keys)
+
+    activities = {}
+    for activity_id, info in items:
+        if not isinstance(info, dict):
+            continue
+        get = info.get
+        fields = [get(key, default) for key, default in _ACTIVITY_SCHEMA]
+        if fields[3] is None:
+            fields[3] = _infer_time_block_allowed(*fields[:3])
+        activities[activity_id] = ActivityStatus(
+            activity_id, get("name") or f"Activity {activity_id}", *fields
+        )
+    return activities
+
+
+def _infer_time_block_allowed(allowed: bool, banned: bool, remaining: int | None) -> bool:
+    """Return whether a time block allows an activity, from the verdict.
+
+    Responses without ``timeBlockAllowed`` only blame a time block for
+    a block that neither a ban nor a used up quota explains.
+    """
+    return allowed or banned or remaining == 0
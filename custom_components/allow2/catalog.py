@@ -0,0 +1,279 @@
+"""Discovery of the activities each child has rules for.
+
+Allow2 knows more activities than most families restrict. Rather than
+checking and creating entities for every known activity of every
+child, the catalog periodically requests all known activities once and
+keeps those a child actually has rules for: a quota, a ban or a time
+block. Between discoveries only the kept activities are requested.
+
+An activity limited only by a schedule looks unrestricted while it is
+checked inside its allowed window, and the daily discovery runs at
+about the same time every day. So an activity seen with rules once is
+kept for good, and one without rules is only dropped after it was seen
+without rules in every period of the day. Until then it is kept, and
+the child is discovered again in each period of the day not seen yet.
+Activities can also be configured per child, which disables discovery
+for that child.
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+
+from .api import ActivityStatus
+
+# Hours of each period of the day an activity without rules must be
+# seen in before it is dropped
+PERIOD_HOURS = 4
+PERIODS = 24 // PERIOD_HOURS
+
+ActivityListener = Callable[[int, dict[int, str], list[int]], None]
+
+
+@dataclass
+class _ChildActivities:
+    """Discovered activities of one child."""
+
+    discovered_at: float | None = None
+    # Activities seen with rules in any discovery
+    restricted: set[int] = field(default_factory=set)
+    # Periods of the day each other activity was seen without rules in
+    unrestricted: dict[int, set[int]] = field(default_factory=dict)
+
+    def kept(self) -> list[int]:
+        """Return the IDs of the kept activities."""
+        return sorted({*self.restricted, *self.undecided()})
+
+    def undecided(self) -> list[int]:
+        """Return the IDs of activities not yet seen without rules all day."""
+        return [
+            activity_id
+            for activity_id, periods in self.unrestricted.items()
+            if activity_id not in self.restricted and len(periods) < PERIODS
+        ]
+
+
+class ActivityCatalog:
+    """Discover and track the activities of each child."""
+
+    def __init__(
+        self,
+        known: Mapping[int, str],
+        refresh_interval: float,
+        configured: Mapping[int, Iterable[int]] | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        """Initialize the catalog.
+
+        Args:
+            known: Names of all known activities by ID, the activities
+                requested when discovering
+            refresh_interval: Seconds between discoveries, 0 to only
+                discover once
+            configured: Activity IDs by child ID for children whose
+                activities are set by the user
+            clock: Wall clock in seconds since the epoch
+        """
+        self._names = dict(known)
+        self._known = list(known)
+        self.refresh_interval = refresh_interval
+        self._configured = {
+            child_id: list(activity_ids)
+            for child_id, activity_ids in (configured or {}).items()
+            if activity_ids
+        }
+        self._clock = clock
+        self._children: dict[int, _ChildActivities] = {}
+        self._listeners: list[ActivityListener] = []
+        self._discoveries = 0
+        self._added = 0
+        self._removed = 0
+
+    @property
+    def names(self) -> dict[int, str]:
+        """Return the names of all activities seen or known by ID."""
+        return dict(self._names)
+
+    def activities(self, child_id: int) -> dict[int, str]:
+        """Return the names of the activities of a child by ID.
+
+        Until a child has been discovered, all known activities are
+        returned.
+        """
+        if child_id in self._configured:
+            activity_ids: Iterable[int] = self._configured[child_id]
+        else:
+            child = self._children.get(child_id)
+            activity_ids = (
+                child.kept()
+                if child is not None and child.discovered_at is not None
+                else self._known
+            )
+        return {
+            activity_id: self._names.get(activity_id, f"Activity {activity_id}")
+            for activity_id in activity_ids
+        }
+
+    def due(self, child_id: int) -> bool:
+        """Return True if the activities of a child should be discovered.
+
+        Besides every ``refresh_interval``, a child is discovered in each
+        period of the day in which some undecided activity was not seen.
+        """
+        if child_id in self._configured:
+            return False
+        child = self._children.get(child_id)
+        if child is None or child.discovered_at is None:
+            return True
+        period = self._period()
+        if any(
+            period not in child.unrestricted[activity_id]
+            for activity_id in child.undecided()
+        ):
+            return True
+        return (
+            self.refresh_interval > 0
+            and self._clock() - child.discovered_at >= self.refresh_interval
+        )
+
+    def requested(self, child_id: int) -> list[int]:
+        """Return the activity IDs to check for a child."""
+        if self.due(child_id):
+            return list(self._known)
+        return list(self.activities(child_id))
+
+    def update(
+        self, child_id: int, activities: Mapping[int, ActivityStatus]
+    ) -> None:
+        """Discover the activities of a child from a check of all of them.
+
+        Listeners are notified of added and removed activities.
+        """
+        if child_id in self._configured:
+            return
+
+        for activity_id, activity in activities.items():
+            if activity.name:
+                self._names[activity_id] = activity.name
+
+        child = self._children.setdefault(child_id, _ChildActivities())
+        previous = set(self.activities(child_id))
+        period = self._period()
+        for activity_id, activity in activities.items():
+            if _has_rules(activity):
+                child.restricted.add(activity_id)
+                child.unrestricted.pop(activity_id, None)
+            elif activity_id not in child.restricted:
+                child.unrestricted.setdefault(activity_id, set()).add(period)
+        child.discovered_at = self._clock()
+        self._discoveries += 1
+
+        current = self.activities(child_id)
+        added = {
+            activity_id: name
+            for activity_id, name in current.items()
+            if activity_id not in previous
+        }
+        removed = [activity_id for activity_id in previous if activity_id not in current]
+        self._added += len(added)
+        self._removed += len(removed)
+        if added or removed:
+            for listener in list(self._listeners):
+                listener(child_id, added, removed)
+
+    def add_listener(self, listener: ActivityListener) -> Callable[[], None]:
+        """Listen for added and removed activities.
+
+        The listener is called with the child ID, the names of added
+        activities by ID and the IDs of removed activities. Returns a
+        function to remove it.
+        """
+        self._listeners.append(listener)
+
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the discovered activities for storage."""
+        return {
+            "names": {str(activity_id): name for activity_id, name in self._names.items()},
+            "children": {
+                str(child_id): {
+                    "discovered_at": child.discovered_at,
+                    "restricted": sorted(child.restricted),
+                    "unrestricted": {
+                        str(activity_id): sorted(periods)
+                        for activity_id, periods in child.unrestricted.items()
+                    },
+                }
+                for child_id, child in self._children.items()
+            },
+        }
+
+    def restore(self, data: Mapping[str, Any]) -> None:
+        """Restore discovered activities from storage.
+
+        Activities kept by the earlier format, which counted discoveries
+        without rules in ``misses``, are restored as restricted.
+        """
+        for activity_id, name in data.get("names", {}).items():
+            self._names[int(activity_id)] = name
+        for child_id, child in data.get("children", {}).items():
+            self._children[int(child_id)] = _ChildActivities(
+                child.get("discovered_at"),
+                {
+                    int(activity_id)
+                    for activity_id in (
+                        *child.get("restricted", ()),
+                        *child.get("misses", {}),
+                    )
+                },
+                {
+                    int(activity_id): set(periods)
+                    for activity_id, periods in child.get("unrestricted", {}).items()
+                },
+            )
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return discovery statistics."""
+        return {
+            "refresh_interval": self.refresh_interval,
+            "discoveries": self._discoveries,
+            "added": self._added,
+            "removed": self._removed,
+            "children": {
+                str(child_id): {
+                    "activities": list(self.activities(child_id)),
+                    "undecided": (
+                        self._children[child_id].undecided()
+                        if child_id in self._children
+                        else []
+                    ),
+                    "configured": child_id in self._configured,
+                }
+                for child_id in {*self._children, *self._configured}
+            },
+        }
+
+    def _period(self) -> int:
+        """Return the current period of the local day."""
+        moment = dt_util.as_local(dt_util.utc_from_timestamp(self._clock()))
+        return moment.hour // PERIOD_HOURS
+
+
+def _has_rules(activity: ActivityStatus) -> bool:
+    """Return True if a quota, ban or time block applies to an activity."""
+    return (
+        activity.remaining_seconds is not None
+        or activity.banned
+        or not activity.allowed
+        or not activity.time_block_allowed
+        or activity.time_block_ends is not None
+    )
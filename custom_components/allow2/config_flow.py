@@ -10,6 +10,7 @@ from homeassistant import config_entries
 from homeassistant.const import CONF_EMAIL, CONF_PASSWORD
 from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import (
@@ -20,17 +21,48 @@ from .api import (
     PairResult,
 )
 from .const import (
+    ACTIVITIES,
+    CONF_ACCOUNT_POLLING,
+    CONF_ACTIVITY_REFRESH_INTERVAL,
+    CONF_CHECK_CACHE_TTL,
+    CONF_CHILD_ACTIVITIES,
     CONF_CHILDREN,
+    CONF_COUNTDOWN_INTERVAL,
+    CONF_DEDICATED_SESSION,
     CONF_DEVICE_NAME,
     CONF_DEVICE_TOKEN,
+    CONF_HEDGE_PERCENTILE,
+    CONF_KEEP_RAW_RESPONSE,
+    CONF_MAX_POLL_INTERVAL,
+    CONF_MAX_STALENESS,
+    CONF_MIN_POLL_INTERVAL,
+    CONF_OFFLINE_ENFORCEMENT,
     CONF_PAIR_ID,
     CONF_PAIR_TOKEN,
+    CONF_QUOTA_LOW_THRESHOLD,
+    CONF_REMAINING_TIME_STEP,
+    CONF_SETUP_CONCURRENCY,
     CONF_USER_ID,
+    DEFAULT_ACCOUNT_POLLING,
+    DEFAULT_ACTIVITY_REFRESH_INTERVAL,
+    DEFAULT_CHECK_CACHE_TTL,
+    DEFAULT_COUNTDOWN_INTERVAL,
+    DEFAULT_DEDICATED_SESSION,
     DEFAULT_DEVICE_NAME,
     DEFAULT_DEVICE_TOKEN,
+    DEFAULT_HEDGE_PERCENTILE,
+    DEFAULT_KEEP_RAW_RESPONSE,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DEFAULT_OFFLINE_ENFORCEMENT,
+    DEFAULT_QUOTA_LOW_THRESHOLD,
+    DEFAULT_REMAINING_TIME_STEP,
+    DEFAULT_SETUP_CONCURRENCY,
     DOMAIN,
     ERROR_AUTH_FAILED,
     ERROR_CANNOT_CONNECT,
+    ERROR_INVALID_POLL_INTERVAL,
     ERROR_INVALID_RESPONSE,
     ERROR_UNKNOWN,
 )
@@ -151,13 +183,15 @@ class Allow2ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 class Allow2OptionsFlow(config_entries.OptionsFlow):
     """Handle Allow2 options.
 
-    Options flow allows users to update the device name
-    and re-pair if needed.
+    Options flow allows users to update the device name, choose
+    between account-wide and per-child polling, choose the activities
+    of each child, and re-pair if needed.
     """
 
     def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
         """Initialize options flow."""
         self._config_entry = config_entry
+        self._options: dict[str, Any] = {}
 
     async def async_step_init(
         self, user_input: dict[str, Any] | None = None
@@ -166,8 +200,13 @@ class Allow2OptionsFlow(config_entries.OptionsFlow):
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            # Update options
-            return self.async_create_entry(title="", data=user_input)
+            if user_input.get(
+                CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+            ) > user_input.get(CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL):
+                errors["base"] = ERROR_INVALID_POLL_INTERVAL
+            else:
+                self._options = user_input
+                return await self.async_step_activities()
 
         # Show current settings
         return self.async_show_form(
@@ -180,7 +219,149 @@ class Allow2OptionsFlow(config_entries.OptionsFlow):
                             CONF_DEVICE_NAME, DEFAULT_DEVICE_NAME
                         ),
                     ): str,
+                    vol.Optional(
+                        CONF_ACCOUNT_POLLING,
+                        default=self._config_entry.options.get(
+                            CONF_ACCOUNT_POLLING, DEFAULT_ACCOUNT_POLLING
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_SETUP_CONCURRENCY,
+                        default=self._config_entry.options.get(
+                            CONF_SETUP_CONCURRENCY, DEFAULT_SETUP_CONCURRENCY
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=1, max=32)),
+                    vol.Optional(
+                        CONF_MIN_POLL_INTERVAL,
+                        default=self._config_entry.options.get(
+                            CONF_MIN_POLL_INTERVAL, DEFAULT_MIN_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=10, max=3600)),
+                    vol.Optional(
+                        CONF_MAX_POLL_INTERVAL,
+                        default=self._config_entry.options.get(
+                            CONF_MAX_POLL_INTERVAL, DEFAULT_MAX_POLL_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=60, max=86400)),
+                    vol.Optional(
+                        CONF_COUNTDOWN_INTERVAL,
+                        default=self._config_entry.options.get(
+                            CONF_COUNTDOWN_INTERVAL, DEFAULT_COUNTDOWN_INTERVAL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=300)),
+                    vol.Optional(
+                        CONF_KEEP_RAW_RESPONSE,
+                        default=self._config_entry.options.get(
+                            CONF_KEEP_RAW_RESPONSE, DEFAULT_KEEP_RAW_RESPONSE
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_CHECK_CACHE_TTL,
+                        default=self._config_entry.options.get(
+                            CONF_CHECK_CACHE_TTL, DEFAULT_CHECK_CACHE_TTL
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=60)),
+                    vol.Optional(
+                        CONF_DEDICATED_SESSION,
+                        default=self._config_entry.options.get(
+                            CONF_DEDICATED_SESSION, DEFAULT_DEDICATED_SESSION
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_HEDGE_PERCENTILE,
+                        default=self._config_entry.options.get(
+                            CONF_HEDGE_PERCENTILE, DEFAULT_HEDGE_PERCENTILE
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=99)),
+                    vol.Optional(
+                        CONF_MAX_STALENESS,
+                        default=self._config_entry.options.get(
+                            CONF_MAX_STALENESS, DEFAULT_MAX_STALENESS
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=86400)),
+                    vol.Optional(
+                        CONF_OFFLINE_ENFORCEMENT,
+                        default=self._config_entry.options.get(
+                            CONF_OFFLINE_ENFORCEMENT, DEFAULT_OFFLINE_ENFORCEMENT
+                        ),
+                    ): bool,
+                    vol.Optional(
+                        CONF_QUOTA_LOW_THRESHOLD,
+                        default=self._config_entry.options.get(
+                            CONF_QUOTA_LOW_THRESHOLD, DEFAULT_QUOTA_LOW_THRESHOLD
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=7200)),
+                    vol.Optional(
+                        CONF_REMAINING_TIME_STEP,
+                        default=self._config_entry.options.get(
+                            CONF_REMAINING_TIME_STEP, DEFAULT_REMAINING_TIME_STEP
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=900)),
+                    vol.Optional(
+                        CONF_ACTIVITY_REFRESH_INTERVAL,
+                        default=self._config_entry.options.get(
+                            CONF_ACTIVITY_REFRESH_INTERVAL,
+                            DEFAULT_ACTIVITY_REFRESH_INTERVAL,
+                        ),
+                    ): vol.All(vol.Coerce(int), vol.Range(min=0, max=604800)),
                 }
             ),
             errors=errors,
         )
+
+    async def async_step_activities(
+        self, user_input: dict[str, Any] | None = None
+    ) -> FlowResult:
+        """Choose the activities of each child.
+
+        Children without a selection get the activities they have rules
+        for, discovered from the checks.
+        """
+        # One field per child, labelled with the child's name
+        fields: dict[str, int] = {}
+        for child in self._config_entry.data.get(CONF_CHILDREN, []):
+            name = child.get("name") or f"Child {child['id']}"
+            fields[name if name not in fields else f"{name} ({child['id']})"] = child["id"]
+
+        if user_input is not None or not fields:
+            user_input = user_input or {}
+            # Update options
+            self._options[CONF_CHILD_ACTIVITIES] = {
+                str(child_id): [int(activity_id) for activity_id in user_input[field]]
+                for field, child_id in fields.items()
+                if user_input.get(field)
+            }
+            return self.async_create_entry(title="", data=self._options)
+
+        configured = self._config_entry.options.get(CONF_CHILD_ACTIVITIES, {})
+        # Activities discovered by the loaded entry, and those configured
+        data = self.hass.data.get(DOMAIN, {}).get(self._config_entry.entry_id)
+        names = data["catalog"].names if data is not None else ACTIVITIES
+        activities = {
+            str(activity_id): names.get(activity_id, f"Activity {activity_id}")
+            for activity_id in sorted(
+                {
+                    *names,
+                    *(
+                        int(activity_id)
+                        for activity_ids in configured.values()
+                        for activity_id in activity_ids
+                    ),
+                }
+            )
+        }
+        return self.async_show_form(
+            step_id="activities",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        field,
+                        default=[
+                            str(activity_id)
+                            for activity_id in configured.get(str(child_id), [])
+                        ],
+                    ): cv.multi_select(activities)
+                    for field, child_id in fields.items()
+                }
+            ),
+        )
@@ -12,6 +12,11 @@ API_CHECK_ENDPOINT: Final = "/serviceapi/check"
 DEFAULT_DEVICE_TOKEN: Final = "mtG8xbFR1cuJkuXn"
 DEFAULT_DEVICE_NAME: Final = "Home Assistant"
 
+# Keys in hass.data[DOMAIN] shared by all config entries
+DATA_CIRCUIT_BREAKERS: Final = "circuit_breakers"
+DATA_RATE_LIMITERS: Final = "rate_limiters"
+DATA_POLL_SCHEDULER: Final = "poll_scheduler"
+
 # Configuration keys
 CONF_USER_ID: Final = "user_id"
 CONF_PAIR_ID: Final = "pair_id"
@@ -21,6 +26,37 @@ CONF_DEVICE_NAME: Final = "device_name"
 CONF_TIMEZONE: Final = "timezone"
 CONF_CHILDREN: Final = "children"
 
+# Options
+CONF_ACCOUNT_POLLING: Final = "account_polling"
+DEFAULT_ACCOUNT_POLLING: Final = True
+CONF_SETUP_CONCURRENCY: Final = "setup_concurrency"
+DEFAULT_SETUP_CONCURRENCY: Final = 4
+CONF_MIN_POLL_INTERVAL: Final = "min_poll_interval"
+DEFAULT_MIN_POLL_INTERVAL: Final = 30  # seconds
+CONF_MAX_POLL_INTERVAL: Final = "max_poll_interval"
+DEFAULT_MAX_POLL_INTERVAL: Final = 3600  # seconds
+CONF_COUNTDOWN_INTERVAL: Final = "countdown_interval"
+DEFAULT_COUNTDOWN_INTERVAL: Final = 10  # seconds, 0 disables the local countdown
+CONF_KEEP_RAW_RESPONSE: Final = "keep_raw_response"
+DEFAULT_KEEP_RAW_RESPONSE: Final = False
+CONF_CHECK_CACHE_TTL: Final = "check_cache_ttl"
+DEFAULT_CHECK_CACHE_TTL: Final = 0  # seconds, 0 only coalesces concurrent checks
+CONF_DEDICATED_SESSION: Final = "dedicated_session"
+DEFAULT_DEDICATED_SESSION: Final = True
+CONF_HEDGE_PERCENTILE: Final = "hedge_percentile"
+DEFAULT_HEDGE_PERCENTILE: Final = 95  # 0 disables hedged checks
+CONF_MAX_STALENESS: Final = "max_staleness"
+DEFAULT_MAX_STALENESS: Final = 3600  # seconds, 0 disables serving stale data
+CONF_OFFLINE_ENFORCEMENT: Final = "offline_enforcement"
+DEFAULT_OFFLINE_ENFORCEMENT: Final = True
+CONF_QUOTA_LOW_THRESHOLD: Final = "quota_low_threshold"
+DEFAULT_QUOTA_LOW_THRESHOLD: Final = 600  # seconds, 0 disables quota low events
+CONF_REMAINING_TIME_STEP: Final = "remaining_time_step"
+DEFAULT_REMAINING_TIME_STEP: Final = 60  # seconds, 0 reports remaining time exactly
+CONF_ACTIVITY_REFRESH_INTERVAL: Final = "activity_refresh_interval"
+DEFAULT_ACTIVITY_REFRESH_INTERVAL: Final = 86400  # seconds, 0 only discovers once
+CONF_CHILD_ACTIVITIES: Final = "child_activities"  # activity IDs by child ID
+
 # Activity IDs (Allow2 standard activities)
 ACTIVITY_INTERNET: Final = 1
 ACTIVITY_GAMING: Final = 2
@@ -38,12 +74,32 @@ ACTIVITIES: Final = {
     ACTIVITY_MESSAGING: "Messaging",
 }
 
+# Events fired on activity transitions
+EVENT_ACTIVITY_ALLOWED: Final = "allow2_activity_allowed"
+EVENT_ACTIVITY_BLOCKED: Final = "allow2_activity_blocked"
+EVENT_ACTIVITY_BANNED: Final = "allow2_activity_banned"
+EVENT_ACTIVITY_UNBANNED: Final = "allow2_activity_unbanned"
+EVENT_TIME_BLOCK_ENTERED: Final = "allow2_time_block_entered"
+EVENT_TIME_BLOCK_LEFT: Final = "allow2_time_block_left"
+EVENT_QUOTA_LOW: Final = "allow2_quota_low"
+
+# Minimum seconds between two events of the same kind for an activity
+EVENT_DEBOUNCE: Final = 30
+
 # Error messages
 ERROR_AUTH_FAILED: Final = "auth_failed"
 ERROR_CANNOT_CONNECT: Final = "cannot_connect"
 ERROR_UNKNOWN: Final = "unknown"
 ERROR_INVALID_RESPONSE: Final = "invalid_response"
 ERROR_ALREADY_PAIRED: Final = "already_paired"
+ERROR_INVALID_POLL_INTERVAL: Final = "invalid_poll_interval"
+
+# Timeouts for API requests (seconds): getting a connection, including
+# the TLS handshake, waiting for data once connected, and the whole request
+API_CONNECT_TIMEOUT: Final = 10
+API_READ_TIMEOUT: Final = 30
+API_TOTAL_TIMEOUT: Final = 60
 
-# Timeout for API requests (seconds)
-API_TIMEOUT: Final = 30
+# Client-side rate limit per device token and API host (requests per second)
+API_RATE_LIMIT: Final = 1.0
+API_RATE_LIMIT_BURST: Final = 10
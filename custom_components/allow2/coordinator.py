@@ -0,0 +1,959 @@
+"""Data update coordinators for the Allow2 integration."""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Collection, Iterable, Mapping
+from datetime import datetime, timedelta
+from typing import Any, TypeVar
+
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import (
+    async_call_later,
+    async_track_point_in_utc_time,
+)
+from homeassistant.helpers.update_coordinator import (
+    DataUpdateCoordinator,
+    UpdateFailed,
+)
+from homeassistant.util import dt as dt_util
+
+from .api import (
+    ActivityStatus,
+    Allow2API,
+    Allow2AuthError,
+    Allow2ConnectionError,
+    ChildStatus,
+)
+from .catalog import ActivityCatalog
+from .const import (
+    ACTIVITIES,
+    DEFAULT_MAX_POLL_INTERVAL,
+    DEFAULT_MAX_STALENESS,
+    DEFAULT_MIN_POLL_INTERVAL,
+    DEFAULT_SETUP_CONCURRENCY,
+)
+from .countdown import CountdownEngine
+from .events import Transition, TransitionDetector
+from .offline import OfflineEngine
+from .ratelimit import PRIORITY_BACKGROUND, PRIORITY_USER
+from .scheduler import PollScheduler, next_poll_interval, next_transition
+from .storage import Allow2SnapshotStore
+
+_LOGGER = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
+# Update interval for checking quotas
+SCAN_INTERVAL = timedelta(minutes=5)
+
+
+class TransitionWakeup:
+    """One-shot refresh of a coordinator at a predicted status transition.
+
+    Re-verifying at the predicted moment, rather than on the next
+    regular poll, gets time block and quota transitions to entities
+    within seconds while regular polling stays infrequent.
+    """
+
+    def __init__(
+        self,
+        coordinator: DataUpdateCoordinator,
+        min_interval: timedelta,
+        countdown: CountdownEngine | None = None,
+        quota_threshold: int = 0,
+    ) -> None:
+        """Initialize the wakeup.
+
+        Args:
+            coordinator: Coordinator to refresh
+            min_interval: Shortest delay until a wakeup, so a transition
+                predicted again and again does not poll faster than the
+                minimum poll interval
+            countdown: Local countdown telling which activities are in
+                use, or None to not predict quotas running out
+            quota_threshold: Remaining seconds below which a quota is
+                low, to also wake up when a quota becomes low
+        """
+        self._coordinator = coordinator
+        self._min_interval = min_interval
+        self._countdown = countdown
+        self._quota_threshold = quota_threshold
+        self._unsub: CALLBACK_TYPE | None = None
+        self.scheduled: datetime | None = None
+        self.fired = 0
+
+    @callback
+    def async_schedule(
+        self, children: Mapping[int, Collection[ActivityStatus]]
+    ) -> None:
+        """Schedule the wakeup at the next predicted transition, if any.
+
+        Args:
+            children: Last fetched activity status by child ID
+        """
+        self.async_cancel()
+        now = dt_util.utcnow()
+        scheduled: datetime | None = None
+        for child_id, activities in children.items():
+            transition = next_transition(
+                activities,
+                now,
+                self._quota_threshold,
+                _in_use(self._countdown, child_id, activities),
+            )
+            if transition is not None and (scheduled is None or transition < scheduled):
+                scheduled = transition
+        if scheduled is None:
+            return
+        self.scheduled = max(scheduled, now + self._min_interval)
+        self._unsub = async_track_point_in_utc_time(
+            self._coordinator.hass, self._async_wakeup, self.scheduled
+        )
+
+    @callback
+    def async_cancel(self) -> None:
+        """Cancel the scheduled wakeup."""
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+        self.scheduled = None
+
+    @callback
+    def _async_wakeup(self, _now: datetime) -> None:
+        """Refresh the coordinator at the predicted transition."""
+        self._unsub = None
+        self.scheduled = None
+        self.fired += 1
+        self._coordinator.hass.async_create_background_task(
+            self._coordinator.async_refresh(),
+            f"{self._coordinator.name} transition wakeup",
+        )
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return wakeup statistics."""
+        return {
+            "next": self.scheduled.isoformat() if self.scheduled else None,
+            "fired": self.fired,
+        }
+
+
+class Allow2DataUpdateCoordinator(DataUpdateCoordinator):
+    """Coordinator for fetching Allow2 data for a specific child.
+
+    In account polling mode this coordinator does not poll on its own.
+    The account coordinator pushes the child's slice of each check
+    response into it, and refresh requests are forwarded to the account.
+
+    The last good data is kept in the snapshot store. After a restart it
+    is restored before the first check, and when a refresh fails it is
+    still served as stale data until it is older than ``max_staleness``.
+    With an offline engine, stale data is evaluated locally instead, so
+    time blocks and quotas keep being enforced during an outage.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: Allow2API,
+        user_id: int,
+        pair_id: int,
+        pair_token: str,
+        child_id: int,
+        child_name: str,
+        timezone: str,
+        update_interval: timedelta | None = SCAN_INTERVAL,
+        min_interval: timedelta = timedelta(seconds=DEFAULT_MIN_POLL_INTERVAL),
+        max_interval: timedelta = timedelta(seconds=DEFAULT_MAX_POLL_INTERVAL),
+        countdown: CountdownEngine | None = None,
+        offline: OfflineEngine | None = None,
+        events: TransitionDetector | None = None,
+        snapshots: Allow2SnapshotStore | None = None,
+        catalog: ActivityCatalog | None = None,
+        max_staleness: timedelta = timedelta(seconds=DEFAULT_MAX_STALENESS),
+        remaining_step: int = 0,
+        poll_scheduler: PollScheduler | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"Allow2 {child_name}",
+            update_interval=update_interval,
+        )
+        self.api = api
+        self.user_id = user_id
+        self.pair_id = pair_id
+        self.pair_token = pair_token
+        self.child_id = child_id
+        self.child_name = child_name
+        self.timezone = timezone
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.countdown = countdown
+        self.offline = offline
+        self.events = events
+        self.snapshots = snapshots
+        self.catalog = catalog
+        self.max_staleness = max_staleness
+        # Regular polls run in a slot of the shared scheduler, every
+        # poll_interval; update_interval is the delay until the next one
+        self.poll_scheduler = poll_scheduler
+        self.poll_interval: timedelta | None = update_interval
+        self.poll_key = (user_id, pair_id, child_id)
+        # Granularity of remaining time shown by entities
+        self.remaining_step = remaining_step
+        self.account: Allow2AccountCoordinator | None = None
+        # When the current data was fetched, and whether it was restored
+        # from the snapshot store rather than fetched since startup
+        self.last_fetched: datetime | None = None
+        # When the status of each activity was fetched, later than
+        # last_fetched for activities checked since
+        self.fetched_at: dict[int, datetime] = {}
+        self.restored = False
+        self._unsub_stale_update: CALLBACK_TYPE | None = None
+        self._unsub_event_flush: CALLBACK_TYPE | None = None
+        self.wakeup = TransitionWakeup(
+            self,
+            min_interval,
+            countdown,
+            events.quota_threshold if events is not None else 0,
+        )
+        # Rate limiter priority of the next fetch, raised by refresh requests
+        self.priority = PRIORITY_BACKGROUND
+        # Activities whose status changed in the pending update, None for all
+        self._changed_activities: set[int] | None = None
+        # Activity status shared by all entities until the next update
+        self._activities: dict[int, ActivityStatus] | None = None
+        self.listener_stats: dict[str, int] = {
+            "last_written": 0,
+            "last_skipped": 0,
+            "written": 0,
+            "skipped": 0,
+        }
+        # Checks of the check service answered from the data or by Allow2,
+        # and the total seconds they took
+        self._check_hits = 0
+        self._check_misses = 0
+        self._check_failed = 0
+        self._check_hit_time = 0.0
+        self._check_miss_time = 0.0
+        self._check_max_miss_time = 0.0
+
+    async def async_fetch(self, priority: int = PRIORITY_BACKGROUND) -> dict[str, Any]:
+        """Fetch this child's data with a dedicated check request.
+
+        Raises:
+            Allow2AuthError: If credentials are invalid
+            Allow2ConnectionError: If connection fails
+        """
+        activities = self.requested_activities
+        if not activities:
+            # No activity of this child has rules
+            return {"allowed": True, "activities": {}}
+        result = await self.api.check(
+            user_id=self.user_id,
+            pair_id=self.pair_id,
+            pair_token=self.pair_token,
+            child_id=self.child_id,
+            activities=activities,
+            timezone=self.timezone,
+            log=False,  # Don't log polling checks
+            decode_children=(),
+            priority=priority,
+        )
+        data = {
+            "allowed": result.allowed,
+            "activities": result.activities,
+        }
+        if result.raw_response is not None:
+            data["raw"] = result.raw_response
+        return data
+
+    async def async_check(
+        self, activity_ids: list[int], max_age: timedelta
+    ) -> tuple[dict[int, ActivityStatus], datetime, bool]:
+        """Return the status of activities, checking Allow2 if the data is too old.
+
+        Activities fetched less than ``max_age`` ago answer the check
+        without a request. Otherwise only the given activities are checked, and
+        the result updates the data. Without current data all activities
+        of the child are checked, so the result replaces the stale data.
+
+        Returns:
+            Status by activity ID, when it was fetched and whether it
+            was answered from the data
+
+        Raises:
+            Allow2AuthError: If credentials are invalid
+            Allow2ConnectionError: If connection fails
+        """
+        start = time.monotonic()
+        now = dt_util.utcnow()
+        if (
+            self.data is not None
+            and not self.is_stale
+            and all(
+                activity_id in self.activities
+                and activity_id in self.fetched_at
+                and now - self.fetched_at[activity_id] < max_age
+                for activity_id in activity_ids
+            )
+        ):
+            activities = {
+                activity_id: self.activities[activity_id] for activity_id in activity_ids
+            }
+            self._check_hits += 1
+            self._check_hit_time += time.monotonic() - start
+            fetched = min(self.fetched_at[activity_id] for activity_id in activity_ids)
+            return activities, fetched, True
+
+        self._check_misses += 1
+        replace = self.data is None or self.is_stale
+        try:
+            result = await self.api.check(
+                user_id=self.user_id,
+                pair_id=self.pair_id,
+                pair_token=self.pair_token,
+                child_id=self.child_id,
+                activities=(
+                    sorted({*activity_ids, *self.requested_activities})
+                    if replace
+                    else activity_ids
+                ),
+                timezone=self.timezone,
+                log=False,
+                decode_children=(),
+                priority=PRIORITY_USER,
+                max_age=max_age.total_seconds(),
+            )
+        except (Allow2ConnectionError, Allow2AuthError):
+            self._check_failed += 1
+            raise
+        finally:
+            elapsed = time.monotonic() - start
+            self._check_miss_time += elapsed
+            self._check_max_miss_time = max(self._check_max_miss_time, elapsed)
+        activities = {
+            activity_id: result.activities[activity_id]
+            for activity_id in activity_ids
+            if activity_id in result.activities
+        }
+        if replace:
+            if self.update_interval is not None:
+                # Setting data reschedules the next poll, keep it in its slot
+                self.update_interval = _poll_delay(self)
+            self.async_set_fetched_data(
+                {"allowed": result.allowed, "activities": result.activities}
+            )
+        else:
+            self.async_set_checked_activities(result.activities)
+        return activities, dt_util.utcnow(), False
+
+    @property
+    def check_stats(self) -> dict[str, Any]:
+        """Return statistics of the checks of the check service."""
+        checks = self._check_hits + self._check_misses
+        return {
+            "hits": self._check_hits,
+            "misses": self._check_misses,
+            "failed": self._check_failed,
+            "hit_ratio": round(self._check_hits / checks, 3) if checks else None,
+            "mean_hit_ms": (
+                round(self._check_hit_time / self._check_hits * 1000, 3)
+                if self._check_hits
+                else None
+            ),
+            "mean_miss_ms": (
+                round(self._check_miss_time / self._check_misses * 1000, 1)
+                if self._check_misses
+                else None
+            ),
+            "max_miss_ms": round(self._check_max_miss_time * 1000, 1),
+        }
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Fetch data from Allow2."""
+        priority, self.priority = self.priority, PRIORITY_BACKGROUND
+        try:
+            data = await self.async_fetch(priority)
+        except (Allow2ConnectionError, Allow2AuthError) as err:
+            raise UpdateFailed(f"Error fetching Allow2 data: {err}") from err
+
+        self._process_data(data)
+        if self.update_interval is not None:
+            activities = data["activities"].values()
+            self.poll_interval = next_poll_interval(
+                activities,
+                SCAN_INTERVAL,
+                self.min_interval,
+                self.max_interval,
+                _in_use(self.countdown, self.child_id, activities),
+            )
+            self.update_interval = _poll_delay(self)
+            self.wakeup.async_schedule({self.child_id: activities})
+        return data
+
+    @property
+    def requested_activities(self) -> list[int]:
+        """Return the activity IDs to check, all known ones when discovering."""
+        if self.catalog is None:
+            return list(ACTIVITIES)
+        return self.catalog.requested(self.child_id)
+
+    @property
+    def is_stale(self) -> bool:
+        """Return True if the data is not from the latest refresh."""
+        return self.data is not None and (self.restored or not self.last_update_success)
+
+    @property
+    def data_available(self) -> bool:
+        """Return True if the data may be shown, even if it is stale.
+
+        Stale data is shown until it is older than ``max_staleness``, or
+        with offline enforcement for as long as it can be evaluated.
+        """
+        if not self.is_stale:
+            return self.last_update_success
+        if self.evaluated_locally:
+            return True
+        return (
+            self.last_fetched is not None
+            and dt_util.utcnow() - self.last_fetched <= self.max_staleness
+        )
+
+    @property
+    def evaluated_locally(self) -> bool:
+        """Return True if stale data is evaluated by the offline engine."""
+        return (
+            self.is_stale
+            and self.offline is not None
+            and self.offline.can_evaluate(self.child_id)
+        )
+
+    @property
+    def activities(self) -> dict[int, ActivityStatus]:
+        """Return the activity status, evaluated locally while data is stale.
+
+        The status is computed once per listener update and shared by
+        all entities of the child.
+        """
+        if self._activities is None:
+            self._activities = self._evaluate_activities()
+        return self._activities
+
+    def _evaluate_activities(self) -> dict[int, ActivityStatus]:
+        """Return the current activity status."""
+        if not self.data:
+            return {}
+        if self.evaluated_locally:
+            activities = self.offline.evaluate(self.child_id)
+            if activities is not None:
+                return activities
+        return self.data["activities"]
+
+    @callback
+    def async_restore(self, fetched: datetime, data: dict[str, Any]) -> bool:
+        """Restore data from a snapshot until the first refresh completes.
+
+        Returns:
+            True if the snapshot was restored, False if it is too old
+        """
+        if dt_util.utcnow() - fetched > self.max_staleness:
+            return False
+        data["activities"] = self._own_activities(data["activities"])
+        if self.countdown is not None:
+            self.countdown.reconcile(self.child_id, data["activities"])
+        if self.offline is not None:
+            self.offline.update(
+                self.child_id, data["activities"], _end_of_day(fetched).timestamp()
+            )
+        self.data = data
+        self._activities = None
+        self.last_fetched = fetched
+        self.fetched_at = dict.fromkeys(data["activities"], fetched)
+        self.restored = True
+        if self.events is not None:
+            # Changes since the snapshot are reported after the first refresh
+            self.events.observe(self.child_id, self.activities)
+        self._async_schedule_stale_update()
+        return True
+
+    @callback
+    def _async_schedule_stale_update(self) -> None:
+        """Schedule updating listeners while stale data is shown.
+
+        Listeners are updated when the data becomes too old to show and,
+        with offline enforcement, when a locally evaluated status may
+        change.
+        """
+        if self._unsub_stale_update is not None or self.last_fetched is None:
+            return
+        delay = (
+            self.last_fetched + self.max_staleness - dt_util.utcnow()
+        ).total_seconds()
+        if self.offline is not None:
+            transition = self.offline.next_transition(self.child_id)
+            if transition is not None:
+                delay = transition if delay <= 0 else min(delay, transition)
+        if delay <= 0:
+            return
+        self._unsub_stale_update = async_call_later(
+            self.hass, delay, self._async_stale_update
+        )
+
+    @callback
+    def _async_cancel_stale_update(self) -> None:
+        """Cancel the scheduled stale data update."""
+        if self._unsub_stale_update is not None:
+            self._unsub_stale_update()
+            self._unsub_stale_update = None
+
+    @callback
+    def _async_stale_update(self, _now: datetime) -> None:
+        """Update entities showing stale data."""
+        self._unsub_stale_update = None
+        self.async_update_listeners()
+
+    async def async_shutdown(self) -> None:
+        """Cancel scheduled calls, and ignore new runs."""
+        self._async_cancel_stale_update()
+        if self._unsub_event_flush is not None:
+            self._unsub_event_flush()
+            self._unsub_event_flush = None
+        self.wakeup.async_cancel()
+        if self.poll_scheduler is not None:
+            self.poll_scheduler.release(self.poll_key)
+        await super().async_shutdown()
+
+    @callback
+    def async_set_fetched_data(self, data: dict[str, Any]) -> None:
+        """Set data fetched on this child's behalf by the account coordinator."""
+        self._process_data(data)
+        self.async_set_updated_data(data)
+
+    @callback
+    def async_set_checked_activities(
+        self, activities: dict[int, ActivityStatus]
+    ) -> None:
+        """Apply the activities returned by a check of some of them.
+
+        The others keep their last fetched status.
+        """
+        if self.data is None or self.is_stale:
+            return
+        merged = {**self.data["activities"], **activities}
+        if self.update_interval is not None:
+            # Setting data reschedules the next poll, keep it in its slot
+            self.update_interval = _poll_delay(self)
+        data = {
+            "allowed": all(activity.allowed for activity in merged.values()),
+            "activities": merged,
+        }
+        self._process_data(data, activities)
+        self.async_set_updated_data(data)
+
+    def _process_data(
+        self,
+        data: dict[str, Any],
+        checked: Mapping[int, ActivityStatus] | None = None,
+    ) -> None:
+        """Feed freshly fetched data to the local engines.
+
+        Args:
+            data: Data of the child
+            checked: Activities of ``data`` that were fetched, when the
+                others kept their earlier status; None when all were
+        """
+        if (
+            checked is None
+            and self.catalog is not None
+            and self.catalog.due(self.child_id)
+        ):
+            # Only a check of all activities tells which ones have no rules
+            self.catalog.update(self.child_id, data["activities"])
+        # A discovery or another child's check may cover more activities
+        data["activities"] = self._own_activities(data["activities"])
+        fetched = dt_util.utcnow()
+        if self.countdown is not None:
+            # Earlier status would look like a quota that stopped counting down
+            self.countdown.reconcile(
+                self.child_id, data["activities"] if checked is None else checked
+            )
+        if self.offline is not None:
+            self.offline.update(
+                self.child_id,
+                data["activities"],
+                _end_of_day(dt_util.now()).timestamp(),
+            )
+        self._changed_activities = self._diff_activities(data)
+        if checked is None:
+            self.last_fetched = fetched
+            self.fetched_at = dict.fromkeys(data["activities"], fetched)
+        else:
+            self.fetched_at.update(
+                dict.fromkeys(
+                    (activity_id for activity_id in checked if activity_id in data["activities"]),
+                    fetched,
+                )
+            )
+        self.restored = False
+        self._async_cancel_stale_update()
+        if self.snapshots is not None:
+            self.snapshots.async_update(self.child_id, self.last_fetched, data)
+
+    def _own_activities(
+        self, activities: dict[int, ActivityStatus]
+    ) -> dict[int, ActivityStatus]:
+        """Return the status of the activities this child has in the catalog."""
+        if self.catalog is None:
+            return activities
+        return {
+            activity_id: activities[activity_id]
+            for activity_id in self.catalog.activities(self.child_id)
+            if activity_id in activities
+        }
+
+    def _diff_activities(self, data: dict[str, Any]) -> set[int] | None:
+        """Return the activities whose status differs from the current data.
+
+        Returns None when every listener has to be notified, because
+        there is no previous data or availability or staleness is about
+        to change.
+        """
+        if self.data is None or self.is_stale:
+            return None
+
+        previous: dict[int, ActivityStatus] = self.data["activities"]
+        current: dict[int, ActivityStatus] = data["activities"]
+        return {
+            activity_id
+            for activity_id in previous.keys() | current.keys()
+            if previous.get(activity_id) != current.get(activity_id)
+        }
+
+    @callback
+    def async_update_listeners(self) -> None:
+        """Update listeners whose activity changed since the last update.
+
+        Entities register with their activity ID as context. Listeners
+        without a context are always updated.
+        """
+        changed = self._changed_activities
+        self._changed_activities = None
+        self._activities = None
+        if self.is_stale:
+            self._async_schedule_stale_update()
+        if self.events is not None and self.data_available:
+            self._async_fire_events(self.events.observe(self.child_id, self.activities))
+
+        written = skipped = 0
+        for update_callback, context in list(self._listeners.values()):
+            if changed is not None and context is not None and context not in changed:
+                skipped += 1
+                continue
+            written += 1
+            update_callback()
+
+        self.listener_stats["last_written"] = written
+        self.listener_stats["last_skipped"] = skipped
+        self.listener_stats["written"] += written
+        self.listener_stats["skipped"] += skipped
+        if skipped:
+            self.logger.debug(
+                "%s: updated %d entities, skipped %d unchanged",
+                self.name,
+                written,
+                skipped,
+            )
+
+    @callback
+    def _async_fire_events(self, transitions: list[Transition]) -> None:
+        """Fire an event per transition and schedule held back ones."""
+        for transition in transitions:
+            activity = transition.activity
+            self.hass.bus.async_fire(
+                transition.event_type,
+                {
+                    "child_id": self.child_id,
+                    "child_name": self.child_name,
+                    "activity_id": activity.activity_id,
+                    "activity_name": activity.name,
+                    "remaining_seconds": activity.remaining_seconds,
+                    "evaluated_locally": self.evaluated_locally,
+                },
+            )
+
+        if self._unsub_event_flush is None and self.events is not None:
+            delay = self.events.next_flush(self.child_id)
+            if delay is not None:
+                self._unsub_event_flush = async_call_later(
+                    self.hass, delay, self._async_flush_events
+                )
+
+    @callback
+    def _async_flush_events(self, _now: datetime) -> None:
+        """Fire transitions held back by the debounce window."""
+        self._unsub_event_flush = None
+        self._async_fire_events(self.events.flush(self.child_id))
+
+    async def async_request_refresh(self) -> None:
+        """Request a refresh, through the account coordinator if there is one.
+
+        Refresh requests come from users, so the fetch is sent ahead of
+        background polling.
+        """
+        if self.account is not None:
+            await self.account.async_request_refresh()
+            return
+        self.priority = PRIORITY_USER
+        await super().async_request_refresh()
+
+
+class Allow2AccountCoordinator(DataUpdateCoordinator):
+    """Coordinator fetching every child of an account in one check request.
+
+    The check response carries a ``children`` map with the status of
+    each child. The slice for each child is handed to that child's
+    coordinator, so entities keep listening to their own child. A
+    dedicated per-child request is only made when the response omits
+    data for a child.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api: Allow2API,
+        user_id: int,
+        pair_id: int,
+        pair_token: str,
+        timezone: str,
+        children: dict[int, Allow2DataUpdateCoordinator],
+        max_concurrency: int = DEFAULT_SETUP_CONCURRENCY,
+        min_interval: timedelta = timedelta(seconds=DEFAULT_MIN_POLL_INTERVAL),
+        max_interval: timedelta = timedelta(seconds=DEFAULT_MAX_POLL_INTERVAL),
+        quota_threshold: int = 0,
+        poll_scheduler: PollScheduler | None = None,
+        countdown: CountdownEngine | None = None,
+    ) -> None:
+        """Initialize the coordinator."""
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=f"Allow2 account {user_id}",
+            update_interval=SCAN_INTERVAL,
+        )
+        self.api = api
+        self.user_id = user_id
+        self.pair_id = pair_id
+        self.pair_token = pair_token
+        self.timezone = timezone
+        self.children = children
+        self.max_concurrency = max_concurrency
+        self.raw_response: dict[str, Any] | None = None
+        # Names of all children of the account by ID, from the last check
+        self.child_names: dict[int, str] | None = None
+        # Children missing from the account whose own check failed, most
+        # likely removed; they are not fetched again until they return
+        self.absent: set[int] = set()
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.countdown = countdown
+        self.poll_scheduler = poll_scheduler
+        self.poll_interval: timedelta | None = SCAN_INTERVAL
+        self.poll_key = (user_id, pair_id, None)
+        self.priority = PRIORITY_BACKGROUND
+        self.wakeup = TransitionWakeup(self, min_interval, countdown, quota_threshold)
+
+        for coordinator in children.values():
+            coordinator.account = self
+
+    async def async_shutdown(self) -> None:
+        """Cancel scheduled calls, and ignore new runs."""
+        self.wakeup.async_cancel()
+        if self.poll_scheduler is not None:
+            self.poll_scheduler.release(self.poll_key)
+        await super().async_shutdown()
+
+    async def async_request_refresh(self) -> None:
+        """Request a refresh ahead of background polling."""
+        self.priority = PRIORITY_USER
+        await super().async_request_refresh()
+
+    async def _async_update_data(self) -> dict[int, dict[str, Any]]:
+        """Fetch data for all children and distribute it."""
+        priority, self.priority = self.priority, PRIORITY_BACKGROUND
+        # Children discovering their activities need all known ones
+        requested = {
+            child_id: coordinator.requested_activities
+            for child_id, coordinator in self.children.items()
+        }
+        activities = sorted({
+            activity_id
+            for activity_ids in requested.values()
+            for activity_id in activity_ids
+        })
+        if not activities:
+            # No activity of any child has rules
+            data = {
+                child_id: {"allowed": True, "activities": {}} for child_id in self.children
+            }
+            for child_id, child_data in data.items():
+                self.children[child_id].async_set_fetched_data(child_data)
+            self.poll_interval = self.max_interval
+            self.update_interval = _poll_delay(self)
+            return data
+        try:
+            result = await self.api.check(
+                user_id=self.user_id,
+                pair_id=self.pair_id,
+                pair_token=self.pair_token,
+                child_id=None,
+                activities=activities,
+                timezone=self.timezone,
+                log=False,  # Don't log polling checks
+                decode_children=self.children.keys(),
+                priority=priority,
+            )
+        except (Allow2ConnectionError, Allow2AuthError) as err:
+            for coordinator in self.children.values():
+                coordinator.async_set_update_error(err)
+            raise UpdateFailed(f"Error fetching Allow2 data: {err}") from err
+
+        self.raw_response = result.raw_response
+        self.child_names = result.child_names
+        self.absent &= {
+            child_id for child_id in self.children if child_id not in result.children
+        }
+        data: dict[int, dict[str, Any]] = {}
+        missing: list[Allow2DataUpdateCoordinator] = []
+
+        for child_id, coordinator in self.children.items():
+            if child_id in self.absent:
+                # Left to the reconciler to remove
+                continue
+            child = result.children.get(child_id)
+            if child is None or not _has_activities(child, requested[child_id]):
+                missing.append(coordinator)
+                continue
+            data[child_id] = {
+                "allowed": child.allowed,
+                "activities": child.activities,
+            }
+
+        if missing:
+            _LOGGER.debug(
+                "Check response omitted %d of %d children, fetching them individually",
+                len(missing),
+                len(self.children),
+            )
+            results = await async_gather_bounded(
+                self.max_concurrency,
+                [coordinator.async_fetch(priority) for coordinator in missing],
+            )
+            for coordinator, child_data in zip(missing, results):
+                if isinstance(child_data, (Allow2ConnectionError, Allow2AuthError)):
+                    if coordinator.child_id not in result.children:
+                        self.absent.add(coordinator.child_id)
+                    coordinator.async_set_update_error(child_data)
+                    continue
+                if isinstance(child_data, BaseException):
+                    raise child_data
+                data[coordinator.child_id] = child_data
+
+        for child_id, child_data in data.items():
+            self.children[child_id].async_set_fetched_data(child_data)
+
+        # One request covers all children, so poll and wake up for the
+        # most urgent one
+        children = {
+            child_id: child_data["activities"].values()
+            for child_id, child_data in data.items()
+        }
+        self.poll_interval = min(
+            (
+                next_poll_interval(
+                    activities,
+                    SCAN_INTERVAL,
+                    self.min_interval,
+                    self.max_interval,
+                    _in_use(self.countdown, child_id, activities),
+                )
+                for child_id, activities in children.items()
+            ),
+            default=self.max_interval,
+        )
+        self.update_interval = _poll_delay(self)
+        self.wakeup.async_schedule(children)
+
+        return data
+
+
+def _poll_delay(
+    coordinator: Allow2DataUpdateCoordinator | Allow2AccountCoordinator,
+) -> timedelta:
+    """Return the delay until a coordinator's next regular poll."""
+    if coordinator.poll_scheduler is None:
+        return coordinator.poll_interval
+    return coordinator.poll_scheduler.delay(
+        coordinator.poll_key, coordinator.poll_interval
+    )
+
+
+def _in_use(
+    countdown: CountdownEngine | None,
+    child_id: int,
+    activities: Iterable[ActivityStatus],
+) -> Collection[int]:
+    """Return the IDs of a child's activities whose quota is counting down."""
+    if countdown is None:
+        return ()
+    return {
+        activity.activity_id
+        for activity in activities
+        if countdown.in_use(child_id, activity.activity_id)
+    }
+
+
+def _end_of_day(moment: datetime) -> datetime:
+    """Return the next local midnight after ``moment``."""
+    return dt_util.start_of_local_day(dt_util.as_local(moment) + timedelta(days=1))
+
+
+def _has_activities(child: ChildStatus, activity_ids: Iterable[int]) -> bool:
+    """Return True if the child status covers every requested activity."""
+    return all(activity_id in child.activities for activity_id in activity_ids)
+
+
+async def async_gather_bounded(
+    limit: int, aws: list[Awaitable[_T]]
+) -> list[_T | BaseException]:
+    """Await all awaitables with at most ``limit`` running at once.
+
+    Exceptions are returned in place of results, like
+    ``asyncio.gather(..., return_exceptions=True)``.
+    """
+    semaphore = asyncio.Semaphore(max(1, limit))
+
+    async def _run(aw: Awaitable[_T]) -> _T:
+        async with semaphore:
+            return await aw
+
+    return await asyncio.gather(*(_run(aw) for aw in aws), return_exceptions=True)
+
+
+async def async_first_refresh(
+    coordinators: list[DataUpdateCoordinator], max_concurrency: int
+) -> None:
+    """Run the initial refresh of coordinators concurrently.
+
+    Unlike ``async_config_entry_first_refresh``, a failing coordinator
+    does not abort setup. It stays unavailable and retries on its
+    regular schedule once its entities subscribe.
+    """
+    await async_gather_bounded(
+        max_concurrency,
+        [coordinator.async_refresh() for coordinator in coordinators],
+    )
@@ -0,0 +1,155 @@
+"""Local countdown of remaining time between polls.
+
+The server only reports remaining time when it is polled. For
+activities that are in use, the countdown engine projects the value
+forward locally so sensors tick down between polls. Every fetch
+reconciles the projection with the server value and records the drift
+that had to be corrected.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from .api import ActivityStatus
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _Countdown:
+    """Countdown state for one activity of one child."""
+
+    remaining: int | None
+    fetched_at: float
+    in_use: bool = False
+
+
+class CountdownEngine:
+    """Project remaining time of in-use activities between polls.
+
+    An activity is considered in use when the server reported less
+    remaining time than on the previous fetch while it stayed allowed.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        """Initialize the engine."""
+        self._clock = clock
+        self._countdowns: dict[tuple[int, int], _Countdown] = {}
+        self._listeners: dict[tuple[int, int], list[Callable[[], None]]] = {}
+        self._reconciles = 0
+        self._corrections = 0
+        self._total_drift = 0
+        self._last_drift: dict[tuple[int, int], int] = {}
+
+    def reconcile(
+        self, child_id: int, activities: Mapping[int, ActivityStatus]
+    ) -> dict[int, int]:
+        """Replace projections with freshly fetched server values.
+
+        Returns:
+            Drift in seconds per activity whose projection was corrected,
+            positive when the server reported more time than projected
+        """
+        now = self._clock()
+        drift: dict[int, int] = {}
+        self._reconciles += 1
+
+        for activity_id, activity in activities.items():
+            key = (child_id, activity_id)
+            previous = self._countdowns.get(key)
+            remaining = activity.remaining_seconds
+            in_use = False
+
+            if previous is not None and previous.remaining is not None and remaining is not None:
+                if previous.in_use:
+                    projected = self._project(previous, now)
+                    if projected is not None and projected != remaining:
+                        drift[activity_id] = remaining - projected
+                in_use = (
+                    remaining < previous.remaining
+                    and activity.allowed
+                    and not activity.banned
+                )
+
+            self._countdowns[key] = _Countdown(remaining, now, in_use)
+
+        if drift:
+            self._corrections += len(drift)
+            self._total_drift += sum(abs(value) for value in drift.values())
+            for activity_id, value in drift.items():
+                self._last_drift[(child_id, activity_id)] = value
+            _LOGGER.debug("Corrected countdown drift for child %d: %s", child_id, drift)
+
+        return drift
+
+    def remaining(self, child_id: int, activity_id: int) -> int | None:
+        """Return the projected remaining time for an activity."""
+        countdown = self._countdowns.get((child_id, activity_id))
+        if countdown is None:
+            return None
+        if not countdown.in_use:
+            return countdown.remaining
+        return self._project(countdown, self._clock())
+
+    def in_use(self, child_id: int, activity_id: int) -> bool:
+        """Return True if the activity is counting down."""
+        countdown = self._countdowns.get((child_id, activity_id))
+        return countdown is not None and countdown.in_use
+
+    def add_listener(
+        self, child_id: int, activity_id: int, update_callback: Callable[[], None]
+    ) -> Callable[[], None]:
+        """Listen for ticks of an activity. Returns a function to remove it."""
+        listeners = self._listeners.setdefault((child_id, activity_id), [])
+        listeners.append(update_callback)
+
+        def remove_listener() -> None:
+            listeners.remove(update_callback)
+
+        return remove_listener
+
+    def tick(self) -> None:
+        """Notify listeners of activities that are counting down."""
+        for key, listeners in self._listeners.items():
+            countdown = self._countdowns.get(key)
+            if countdown is None or not countdown.in_use:
+                continue
+            for update_callback in list(listeners):
+                update_callback()
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return reconciliation statistics."""
+        return {
+            "reconciles": self._reconciles,
+            "corrections": self._corrections,
+            "total_drift": self._total_drift,
+            "in_use": [list(key) for key, value in self._countdowns.items() if value.in_use],
+            "last_drift": {
+                f"{child_id}/{activity_id}": value
+                for (child_id, activity_id), value in self._last_drift.items()
+            },
+        }
+
+    @staticmethod
+    def _project(countdown: _Countdown, now: float) -> int | None:
+        """Project a countdown forward to ``now``."""
+        if countdown.remaining is None:
+            return None
+        elapsed = int(now - countdown.fetched_at)
+        return max(0, countdown.remaining - elapsed)
+
+
+def round_remaining(remaining: int | None, step: int) -> int | None:
+    """Round remaining time up to a multiple of ``step`` seconds.
+
+    Rounding up keeps 0 meaning the quota is used up. A step of 0
+    returns the remaining time unchanged.
+    """
+    if remaining is None or step <= 0:
+        return remaining
+    return -(-remaining // step) * step
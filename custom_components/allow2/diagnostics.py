@@ -0,0 +1,109 @@
+"""Diagnostics support for the Allow2 integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_EMAIL
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PAIR_TOKEN, DOMAIN
+
+# Credentials and the names of the children
+TO_REDACT = {CONF_EMAIL, CONF_PAIR_TOKEN, "name"}
+
+# Raw check responses also hold the IDs and credentials of the account
+RAW_RESPONSE_TO_REDACT = TO_REDACT | {
+    "userId",
+    "pairId",
+    "childId",
+    "parentId",
+    "pairToken",
+    "deviceToken",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    account_coordinator = data["account_coordinator"]
+
+    diagnostics: dict[str, Any] = {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "setup": data["setup_stats"],
+        "api": data["api"].stats,
+        "connections": data["connections"].stats if data["connections"] else None,
+        "coordinators": {
+            child_id: {
+                "last_update_success": coordinator.last_update_success,
+                "update_interval": (
+                    coordinator.poll_interval.total_seconds()
+                    if coordinator.update_interval and coordinator.poll_interval
+                    else None
+                ),
+                "next_poll_in": (
+                    coordinator.update_interval.total_seconds()
+                    if coordinator.update_interval
+                    else None
+                ),
+                "listeners": coordinator.listener_stats,
+                "checks": coordinator.check_stats,
+                "last_fetched": (
+                    coordinator.last_fetched.isoformat()
+                    if coordinator.last_fetched
+                    else None
+                ),
+                "stale": coordinator.is_stale,
+                "evaluated_locally": coordinator.evaluated_locally,
+                "wakeup": coordinator.wakeup.stats,
+            }
+            for child_id, coordinator in data["coordinators"].items()
+        },
+        "account": (
+            {
+                "last_update_success": account_coordinator.last_update_success,
+                "update_interval": (
+                    account_coordinator.poll_interval.total_seconds()
+                    if account_coordinator.poll_interval
+                    else None
+                ),
+                "next_poll_in": (
+                    account_coordinator.update_interval.total_seconds()
+                    if account_coordinator.update_interval
+                    else None
+                ),
+                "wakeup": account_coordinator.wakeup.stats,
+            }
+            if account_coordinator is not None
+            else None
+        ),
+        "countdown": data["countdown"].stats if data["countdown"] else None,
+        "offline": data["offline"].stats if data["offline"] else None,
+        "events": data["events"].stats,
+        "activities": data["catalog"].stats,
+        "children": data["reconciler"].stats,
+        "polling": data["poll_scheduler"].stats,
+        "usage": data["usage"].stats,
+    }
+
+    # Raw responses are only kept when the debug option is enabled
+    if account_coordinator is not None and account_coordinator.raw_response:
+        diagnostics["raw_response"] = async_redact_data(
+            account_coordinator.raw_response, RAW_RESPONSE_TO_REDACT
+        )
+    else:
+        raw = {
+            child_id: async_redact_data(coordinator.data["raw"], RAW_RESPONSE_TO_REDACT)
+            for child_id, coordinator in data["coordinators"].items()
+            if coordinator.data and "raw" in coordinator.data
+        }
+        if raw:
+            diagnostics["raw_response"] = raw
+
+    return diagnostics
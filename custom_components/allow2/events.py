@@ -0,0 +1,180 @@
+"""Detection of semantic activity transitions for Allow2 events.
+
+Entities write state on every poll and countdown tick, even when only
+the remaining time changed. The transition detector reduces the status
+stream of each (child, activity) to a handful of meaningful changes,
+so automations can trigger on one event instead of watching entities.
+
+Each transition kind is tracked separately. A change is only reported
+when it differs from the last reported state of its kind, and a kind
+reported less than ``debounce`` seconds ago is held back until the
+window has passed. A change that reverts within the window is never
+reported.
+"""
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field
+from typing import Any, NamedTuple
+
+from .api import ActivityStatus
+from .const import (
+    EVENT_ACTIVITY_ALLOWED,
+    EVENT_ACTIVITY_BANNED,
+    EVENT_ACTIVITY_BLOCKED,
+    EVENT_ACTIVITY_UNBANNED,
+    EVENT_QUOTA_LOW,
+    EVENT_TIME_BLOCK_ENTERED,
+    EVENT_TIME_BLOCK_LEFT,
+)
+
+# Event fired when a kind of state turns True or False, None for no event
+_EVENTS: dict[str, tuple[str | None, str | None]] = {
+    "allowed": (EVENT_ACTIVITY_ALLOWED, EVENT_ACTIVITY_BLOCKED),
+    "banned": (EVENT_ACTIVITY_BANNED, EVENT_ACTIVITY_UNBANNED),
+    "time_block": (EVENT_TIME_BLOCK_ENTERED, EVENT_TIME_BLOCK_LEFT),
+    "quota_low": (EVENT_QUOTA_LOW, None),
+}
+
+
+class Transition(NamedTuple):
+    """A transition of one activity of a child."""
+
+    event_type: str
+    child_id: int
+    activity: ActivityStatus
+
+
+@dataclass
+class _ActivityState:
+    """Observed and reported state of one activity of a child."""
+
+    activity: ActivityStatus
+    observed: dict[str, bool]
+    reported: dict[str, bool]
+    reported_at: dict[str, float] = field(default_factory=dict)
+
+
+class TransitionDetector:
+    """Detect allowed, banned, time block and low quota transitions."""
+
+    def __init__(
+        self,
+        quota_threshold: int = 0,
+        debounce: float = 0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the detector.
+
+        Args:
+            quota_threshold: Remaining seconds below which a quota is
+                low, 0 to not report low quotas
+            debounce: Minimum seconds between two reports of the same
+                kind for an activity
+            clock: Monotonic clock in seconds
+        """
+        self.quota_threshold = quota_threshold
+        self.debounce = debounce
+        self._clock = clock
+        self._states: dict[tuple[int, int], _ActivityState] = {}
+        self._reported: dict[str, int] = {}
+        self._suppressed = 0
+
+    def observe(
+        self, child_id: int, activities: Mapping[int, ActivityStatus]
+    ) -> list[Transition]:
+        """Observe the current status of a child's activities.
+
+        The first observation of an activity only records its state.
+
+        Returns:
+            Transitions to report
+        """
+        now = self._clock()
+        transitions: list[Transition] = []
+        for activity_id, activity in activities.items():
+            observed = self._classify(activity)
+            state = self._states.get((child_id, activity_id))
+            if state is None:
+                self._states[(child_id, activity_id)] = _ActivityState(
+                    activity, observed, dict(observed)
+                )
+                continue
+            # Held back changes that reverted within the window
+            self._suppressed += sum(
+                1
+                for kind, value in observed.items()
+                if state.observed[kind] != state.reported[kind]
+                and value == state.reported[kind]
+            )
+            state.activity = activity
+            state.observed = observed
+            transitions.extend(self._report(child_id, state, now))
+        return transitions
+
+    def flush(self, child_id: int) -> list[Transition]:
+        """Report held back transitions of a child whose window has passed."""
+        now = self._clock()
+        transitions: list[Transition] = []
+        for (state_child_id, _), state in self._states.items():
+            if state_child_id == child_id:
+                transitions.extend(self._report(child_id, state, now))
+        return transitions
+
+    def next_flush(self, child_id: int) -> float | None:
+        """Return seconds until a held back transition of a child is due."""
+        due: float | None = None
+        now = self._clock()
+        for (state_child_id, _), state in self._states.items():
+            if state_child_id != child_id:
+                continue
+            for kind, value in state.observed.items():
+                if value == state.reported[kind]:
+                    continue
+                delay = state.reported_at.get(kind, now) + self.debounce - now
+                due = delay if due is None else min(due, delay)
+        return None if due is None else max(due, 0)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return reporting statistics."""
+        return {
+            "quota_threshold": self.quota_threshold,
+            "debounce": self.debounce,
+            "reported": dict(self._reported),
+            "suppressed": self._suppressed,
+        }
+
+    def _classify(self, activity: ActivityStatus) -> dict[str, bool]:
+        """Return the state of each transition kind of an activity."""
+        remaining = activity.remaining_seconds
+        return {
+            "allowed": activity.allowed and not activity.banned,
+            "banned": activity.banned,
+            "time_block": not activity.time_block_allowed,
+            "quota_low": (
+                self.quota_threshold > 0
+                and remaining is not None
+                and remaining < self.quota_threshold
+            ),
+        }
+
+    def _report(
+        self, child_id: int, state: _ActivityState, now: float
+    ) -> list[Transition]:
+        """Report changes of an activity that are out of their window."""
+        transitions: list[Transition] = []
+        for kind, value in state.observed.items():
+            if value == state.reported[kind]:
+                continue
+            reported_at = state.reported_at.get(kind)
+            if reported_at is not None and now - reported_at < self.debounce:
+                continue
+            state.reported[kind] = value
+            state.reported_at[kind] = now
+            event_type = _EVENTS[kind][0 if value else 1]
+            if event_type is not None:
+                self._reported[event_type] = self._reported.get(event_type, 0) + 1
+                transitions.append(Transition(event_type, child_id, state.activity))
+        return transitions
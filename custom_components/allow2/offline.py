@@ -0,0 +1,186 @@
+"""Local evaluation of activity status while the Allow2 API is unreachable.
+
+Each good fetch caches the status of a child's activities together
+with the end of the day it applies to. During an outage the engine
+evaluates the cached rules locally: time blocks flip when they end,
+and the quota of activities in use is counted down until it runs out.
+When connectivity returns, the local results are compared with the
+server and the disagreements are counted.
+
+Quotas and time blocks of the next day are not known in advance, so
+local evaluation stops at the end of the day the data was fetched.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass, field, replace
+from typing import Any
+
+from .api import ActivityStatus
+from .countdown import CountdownEngine
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass
+class _CachedStatus:
+    """Last fetched status of one child."""
+
+    activities: dict[int, ActivityStatus]
+    valid_until: float
+    # Allowed state of each activity last evaluated locally
+    evaluated: dict[int, bool] = field(default_factory=dict)
+
+
+class OfflineEngine:
+    """Evaluate cached schedule and quota data of children locally."""
+
+    def __init__(self, clock: Callable[[], float] = time.time) -> None:
+        """Initialize the engine.
+
+        Args:
+            clock: Wall clock in seconds since the epoch, the time base
+                of time block ends
+        """
+        self._clock = clock
+        self._countdown = CountdownEngine(clock)
+        self._cache: dict[int, _CachedStatus] = {}
+        self._evaluations = 0
+        self._reconciles = 0
+        self._mismatches = 0
+        self._last_mismatches: dict[int, list[int]] = {}
+
+    def update(
+        self,
+        child_id: int,
+        activities: Mapping[int, ActivityStatus],
+        valid_until: float,
+    ) -> list[int]:
+        """Cache freshly fetched status of a child.
+
+        Args:
+            child_id: ID of the child
+            activities: Fetched activity status
+            valid_until: Time after which the status says nothing about
+                the current day, usually the next local midnight
+
+        Returns:
+            IDs of activities whose locally evaluated allowed state
+            differed from the server, when the child was evaluated
+            locally since the previous fetch
+        """
+        self._countdown.reconcile(child_id, activities)
+        previous = self._cache.get(child_id)
+        self._cache[child_id] = _CachedStatus(dict(activities), valid_until)
+
+        if previous is None or not previous.evaluated:
+            return []
+
+        self._reconciles += 1
+        mismatches = [
+            activity_id
+            for activity_id, allowed in previous.evaluated.items()
+            if activity_id in activities and activities[activity_id].allowed != allowed
+        ]
+        if mismatches:
+            self._mismatches += len(mismatches)
+            self._last_mismatches[child_id] = mismatches
+            _LOGGER.debug(
+                "Offline evaluation of child %d disagreed with the server for %s",
+                child_id,
+                mismatches,
+            )
+        return mismatches
+
+    def can_evaluate(self, child_id: int) -> bool:
+        """Return True if cached data of the child still applies."""
+        cached = self._cache.get(child_id)
+        return cached is not None and self._clock() < cached.valid_until
+
+    def evaluate(self, child_id: int) -> dict[int, ActivityStatus] | None:
+        """Return the locally evaluated activity status of a child.
+
+        Returns:
+            Activity status by activity ID, or None if no cached data
+            applies to the current day
+        """
+        cached = self._cache.get(child_id)
+        now = self._clock()
+        if cached is None or now >= cached.valid_until:
+            return None
+
+        self._evaluations += 1
+        activities: dict[int, ActivityStatus] = {}
+        for activity_id, activity in cached.activities.items():
+            status = self._evaluate_activity(child_id, activity, now)
+            cached.evaluated[activity_id] = status.allowed
+            activities[activity_id] = status
+        return activities
+
+    def next_transition(self, child_id: int) -> float | None:
+        """Return seconds until a locally evaluated status may change.
+
+        This is the earliest of a time block ending, the quota of an
+        activity in use running out and the cached data expiring.
+        """
+        cached = self._cache.get(child_id)
+        now = self._clock()
+        if cached is None or now >= cached.valid_until:
+            return None
+
+        transitions = [cached.valid_until - now]
+        for activity_id, activity in cached.activities.items():
+            if activity.time_block_ends is not None and activity.time_block_ends > now:
+                transitions.append(activity.time_block_ends - now)
+            if self._countdown.in_use(child_id, activity_id):
+                remaining = self._countdown.remaining(child_id, activity_id)
+                if remaining:
+                    transitions.append(remaining)
+        return min(transitions)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return evaluation and reconciliation statistics."""
+        return {
+            "children": len(self._cache),
+            "evaluations": self._evaluations,
+            "reconciles": self._reconciles,
+            "mismatches": self._mismatches,
+            "last_mismatches": {
+                str(child_id): mismatches
+                for child_id, mismatches in self._last_mismatches.items()
+            },
+        }
+
+    def _evaluate_activity(
+        self, child_id: int, activity: ActivityStatus, now: float
+    ) -> ActivityStatus:
+        """Evaluate one cached activity at ``now``."""
+        time_block_allowed = activity.time_block_allowed
+        time_block_ends = activity.time_block_ends
+        block_ended = time_block_ends is not None and now >= time_block_ends
+        if block_ended:
+            # The block ended; when the next one ends is not known
+            time_block_allowed = not time_block_allowed
+            time_block_ends = None
+
+        remaining = self._countdown.remaining(child_id, activity.activity_id)
+        quota_left = remaining is None or remaining > 0
+
+        if activity.banned or not quota_left:
+            allowed = False
+        elif block_ended:
+            allowed = time_block_allowed
+        else:
+            # Only a known change overrides the verdict of the server
+            allowed = activity.allowed
+
+        return replace(
+            activity,
+            allowed=allowed,
+            remaining_seconds=remaining,
+            time_block_allowed=time_block_allowed,
+            time_block_ends=time_block_ends,
+        )
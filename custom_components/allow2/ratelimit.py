@@ -0,0 +1,159 @@
+"""Client-side rate limiting for the Allow2 API client."""
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import Callable
+from typing import Any
+
+# Request priorities, lower values are served first
+PRIORITY_USER = 0
+PRIORITY_BACKGROUND = 1
+
+
+class RateLimitExceeded(Exception):
+    """Request shed because the limiter queue is full."""
+
+
+class TokenBucketLimiter:
+    """Token bucket limiting the request rate to one API host.
+
+    Requests take a token when one is available and otherwise wait in a
+    priority queue, so user initiated requests are sent before
+    background polling. When the queue is full, background requests are
+    shed instead of queued, and a user request displaces the most
+    recently queued background request.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int,
+        max_queue: int = 50,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the limiter.
+
+        Args:
+            rate: Tokens added per second
+            burst: Maximum number of tokens, i.e. requests sent at once
+            max_queue: Maximum number of requests waiting for a token
+            clock: Monotonic clock in seconds
+        """
+        self.rate = rate
+        self.burst = burst
+        self.max_queue = max_queue
+        self._clock = clock
+        self._tokens = float(burst)
+        self._updated = clock()
+        self._queue: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self._acquired = 0
+        self._shed = 0
+        self._max_depth = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._waited = 0
+
+    @property
+    def queue_depth(self) -> int:
+        """Return the number of requests waiting for a token."""
+        return sum(1 for _, _, future in self._queue if not future.done())
+
+    async def acquire(self, priority: int = PRIORITY_BACKGROUND) -> None:
+        """Wait for a token.
+
+        Raises:
+            RateLimitExceeded: If the request was shed
+        """
+        self._refill()
+        if not self._queue and self._tokens >= 1:
+            self._tokens -= 1
+            self._acquired += 1
+            return
+
+        if self.queue_depth >= self.max_queue and not self._make_room(priority):
+            self._shed += 1
+            raise RateLimitExceeded("Too many queued Allow2 requests")
+
+        future: asyncio.Future[None] = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), future))
+        self._max_depth = max(self._max_depth, self.queue_depth)
+        self._schedule()
+
+        start = self._clock()
+        await future
+        wait = self._clock() - start
+        self._waited += 1
+        self._total_wait += wait
+        self._max_wait = max(self._max_wait, wait)
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available without waiting."""
+        self._refill()
+        if self._queue or self._tokens < 1:
+            return False
+        self._tokens -= 1
+        self._acquired += 1
+        return True
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return limiter statistics."""
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "tokens": round(self._tokens, 2),
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self._max_depth,
+            "acquired": self._acquired,
+            "shed": self._shed,
+            "queued": self._waited,
+            "average_wait": round(self._total_wait / self._waited, 3) if self._waited else 0.0,
+            "max_wait": round(self._max_wait, 3),
+        }
+
+    def _refill(self) -> None:
+        """Add the tokens accrued since the last refill."""
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _make_room(self, priority: int) -> bool:
+        """Shed the newest queued request with lower priority than ``priority``."""
+        candidates = [
+            item for item in self._queue if item[0] > priority and not item[2].done()
+        ]
+        if not candidates:
+            return False
+        victim = max(candidates, key=lambda item: (item[0], item[1]))
+        victim[2].set_exception(RateLimitExceeded("Shed for a higher priority request"))
+        self._shed += 1
+        return True
+
+    def _schedule(self) -> None:
+        """Schedule handing out the next token to the queue."""
+        if self._timer is not None or not self._queue:
+            return
+        delay = max(0.0, (1 - self._tokens) / self.rate)
+        self._timer = asyncio.get_running_loop().call_later(delay, self._release)
+
+    def _release(self) -> None:
+        """Hand out available tokens to queued requests in priority order."""
+        self._timer = None
+        self._refill()
+        while self._queue and self._tokens >= 1:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                # Cancelled or shed while waiting
+                continue
+            self._tokens -= 1
+            self._acquired += 1
+            future.set_result(None)
+        # Drop requests cancelled or shed while waiting at the head
+        while self._queue and self._queue[0][2].done():
+            heapq.heappop(self._queue)
+        self._schedule()
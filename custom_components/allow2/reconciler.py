@@ -0,0 +1,248 @@
+"""Reconciliation of a config entry's children with the Allow2 account.
+
+The children of an account are captured when pairing. Children added,
+removed or renamed in Allow2 later are picked up here, without
+reloading the entry: only the affected coordinators, devices and
+entities are created or removed, and the entry data is updated.
+
+In account polling mode every poll already returns all children of
+the account, so they are reconciled from the last poll without a
+request of their own. Only per-child polling asks the API for them.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta
+from typing import Any, Final
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import device_registry as dr
+from homeassistant.util import dt as dt_util
+
+from .api import Allow2API, Allow2AuthError, Allow2ConnectionError
+from .const import CONF_CHILDREN, CONF_PAIR_ID, CONF_PAIR_TOKEN, CONF_USER_ID, DOMAIN
+from .coordinator import (
+    SCAN_INTERVAL,
+    Allow2AccountCoordinator,
+    Allow2DataUpdateCoordinator,
+)
+from .storage import Allow2SnapshotStore
+
+_LOGGER = logging.getLogger(__name__)
+
+# Interval between comparisons of the children with the account
+RECONCILE_INTERVAL: Final = timedelta(hours=1)
+
+ChildListener = Callable[[int, bool], None]
+
+
+class Allow2ChildReconciler:
+    """Keep the children of a config entry in line with the account."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry: ConfigEntry,
+        api: Allow2API,
+        coordinators: dict[int, Allow2DataUpdateCoordinator],
+        create_coordinator: Callable[[int, str], Allow2DataUpdateCoordinator],
+        snapshots: Allow2SnapshotStore,
+    ) -> None:
+        """Initialize the reconciler.
+
+        Args:
+            hass: Home Assistant instance
+            entry: Config entry of the account
+            api: API client of the entry
+            coordinators: Child coordinators of the entry by child ID,
+                updated in place
+            create_coordinator: Factory of the coordinator of a child,
+                taking its ID and name
+            snapshots: Snapshot store of the entry
+        """
+        self.hass = hass
+        self.entry = entry
+        self.api = api
+        self.coordinators = coordinators
+        self.account: Allow2AccountCoordinator | None = None
+        self._create_coordinator = create_coordinator
+        self._snapshots = snapshots
+        self._listeners: list[ChildListener] = []
+        self._lock = asyncio.Lock()
+        self._runs = 0
+        self._added = 0
+        self._removed = 0
+        self._renamed = 0
+        self._last_run: datetime | None = None
+
+    def add_listener(self, listener: ChildListener) -> Callable[[], None]:
+        """Listen for added and removed children.
+
+        The listener is called with the child ID and True when the
+        child was added, False when it is about to be removed. Returns
+        a function to remove it.
+        """
+        self._listeners.append(listener)
+
+        def remove_listener() -> None:
+            self._listeners.remove(listener)
+
+        return remove_listener
+
+    async def async_reconcile(self, _now: datetime | None = None) -> None:
+        """Compare the children with the account and apply differences."""
+        async with self._lock:
+            if self.account is not None:
+                if self.account.child_names is None:
+                    # Not checked yet
+                    return
+                account_children = dict(self.account.child_names)
+                # The check of a child removed from the account fails, so
+                # only children still in the account hold reconciling back
+                if any(
+                    _failing(coordinator)
+                    for child_id, coordinator in self.coordinators.items()
+                    if child_id in account_children
+                ):
+                    return
+            else:
+                if self.coordinators and all(
+                    _failing(coordinator) for coordinator in self.coordinators.values()
+                ):
+                    # Leave the request budget to the polls while the API fails
+                    return
+                try:
+                    children = await self.api.get_children(
+                        self.entry.data[CONF_USER_ID],
+                        self.entry.data[CONF_PAIR_ID],
+                        self.entry.data[CONF_PAIR_TOKEN],
+                    )
+                except (Allow2ConnectionError, Allow2AuthError) as err:
+                    _LOGGER.debug("Could not get the children of the account: %s", err)
+                    return
+                account_children = {child["id"]: child["name"] for child in children}
+            self._runs += 1
+            self._last_run = dt_util.utcnow()
+            await self._async_apply(account_children)
+
+    async def _async_apply(self, account: dict[int, str]) -> None:
+        """Add, remove and rename children to match the account."""
+        configured: dict[int, str] = {
+            child["id"]: child.get("name", f"Child {child['id']}")
+            for child in self.entry.data.get(CONF_CHILDREN, [])
+        }
+        if not account and configured:
+            # An account without children is more likely a bad response
+            _LOGGER.debug("Ignoring an empty children list of the account")
+            return
+
+        added = [child_id for child_id in account if child_id not in configured]
+        removed = [child_id for child_id in configured if child_id not in account]
+        renamed = [
+            child_id
+            for child_id, name in account.items()
+            if child_id in configured and configured[child_id] != name
+        ]
+        if not (added or removed or renamed):
+            return
+        _LOGGER.info(
+            "Children of the Allow2 account changed: %d added, %d removed, %d renamed",
+            len(added),
+            len(removed),
+            len(renamed),
+        )
+
+        # The update listener only reloads the entry on option changes
+        self.hass.config_entries.async_update_entry(
+            self.entry,
+            data={
+                **self.entry.data,
+                CONF_CHILDREN: [
+                    {"id": child_id, "name": name} for child_id, name in account.items()
+                ],
+            },
+        )
+
+        for child_id in removed:
+            await self._async_remove_child(child_id)
+        for child_id in renamed:
+            self._async_rename_child(child_id, account[child_id])
+        if added:
+            await self._async_add_children({child_id: account[child_id] for child_id in added})
+
+    async def _async_add_children(self, children: dict[int, str]) -> None:
+        """Create coordinators of new children, fetch them and add entities."""
+        for child_id, name in children.items():
+            coordinator = self._create_coordinator(child_id, name)
+            if self.account is not None:
+                coordinator.account = self.account
+            else:
+                # Without an account coordinator every child polls on its own
+                coordinator.poll_interval = coordinator.update_interval = SCAN_INTERVAL
+            self.coordinators[child_id] = coordinator
+
+        if self.account is not None:
+            await self.account.async_refresh()
+        else:
+            await asyncio.gather(
+                *(self.coordinators[child_id].async_refresh() for child_id in children)
+            )
+
+        for child_id in children:
+            self._added += 1
+            for listener in list(self._listeners):
+                listener(child_id, True)
+
+    async def _async_remove_child(self, child_id: int) -> None:
+        """Remove the coordinator, entities and device of a child."""
+        coordinator = self.coordinators.pop(child_id, None)
+        if coordinator is None:
+            return
+        if self.account is not None:
+            self.account.absent.discard(child_id)
+        self._removed += 1
+        for listener in list(self._listeners):
+            listener(child_id, False)
+        await coordinator.async_shutdown()
+        self._snapshots.async_remove_child(child_id)
+
+        registry = dr.async_get(self.hass)
+        device = registry.async_get_device(
+            identifiers={(DOMAIN, f"{self.entry.entry_id}_{child_id}")}
+        )
+        if device is not None:
+            registry.async_remove_device(device.id)
+
+    @callback
+    def _async_rename_child(self, child_id: int, name: str) -> None:
+        """Rename the coordinator and device of a child."""
+        coordinator = self.coordinators.get(child_id)
+        if coordinator is None:
+            return
+        self._renamed += 1
+        coordinator.child_name = name
+        registry = dr.async_get(self.hass)
+        device = registry.async_get_device(
+            identifiers={(DOMAIN, f"{self.entry.entry_id}_{child_id}")}
+        )
+        if device is not None:
+            registry.async_update_device(device.id, name=name)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return reconciliation statistics."""
+        return {
+            "runs": self._runs,
+            "added": self._added,
+            "removed": self._removed,
+            "renamed": self._renamed,
+            "last_run": self._last_run.isoformat() if self._last_run else None,
+        }
+
+
+def _failing(coordinator: Allow2DataUpdateCoordinator) -> bool:
+    """Return True if the last refresh of a child failed."""
+    return coordinator.is_stale or not coordinator.last_update_success
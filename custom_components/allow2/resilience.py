@@ -0,0 +1,151 @@
+"""Retry and circuit breaker policies for the Allow2 API client."""
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+STATE_CLOSED = "closed"
+STATE_OPEN = "open"
+STATE_HALF_OPEN = "half_open"
+
+
+@dataclass(frozen=True, slots=True)
+class RetryPolicy:
+    """Bounded retries with jittered exponential backoff."""
+
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float | None:
+        """Return the delay before retrying after a failed attempt.
+
+        Uses "full jitter": a random delay up to the exponential backoff
+        for the attempt. A server supplied Retry-After is honoured as is.
+
+        Args:
+            attempt: Number of the attempt that failed, starting at 1
+            retry_after: Delay requested by the server, in seconds
+
+        Returns:
+            Seconds to wait, or None if the request should not be retried
+        """
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None:
+            return retry_after if retry_after <= self.max_delay else None
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """Circuit breaker for one API host.
+
+    After ``failure_threshold`` consecutive failures the circuit opens
+    and requests fail fast. Once ``reset_timeout`` has passed a single
+    probe request is let through; its outcome closes the circuit again
+    or re-opens it.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """Initialize the circuit breaker."""
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._clock = clock
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._open_until = 0.0
+        self._probe_in_flight = False
+        self._times_opened = 0
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        """Return the circuit state."""
+        if self._state == STATE_OPEN and self._clock() >= self._open_until:
+            return STATE_HALF_OPEN
+        return self._state
+
+    def allow_request(self) -> bool:
+        """Return True if a request may be sent now."""
+        state = self.state
+        if state == STATE_CLOSED:
+            return True
+        if state == STATE_HALF_OPEN and not self._probe_in_flight:
+            self._state = STATE_HALF_OPEN
+            self._probe_in_flight = True
+            return True
+        self._rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Record a successful request."""
+        self._state = STATE_CLOSED
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def abandon(self) -> None:
+        """Forget a request that ended without an outcome, e.g. cancelled."""
+        self._probe_in_flight = False
+
+    def record_failure(self, retry_after: float | None = None) -> None:
+        """Record a failed request.
+
+        Args:
+            retry_after: Delay requested by the server; keeps the circuit
+                open at least this long once it opens
+        """
+        self._failures += 1
+        self._probe_in_flight = False
+        if self._state == STATE_HALF_OPEN or self._failures >= self.failure_threshold:
+            if self._state != STATE_OPEN:
+                self._times_opened += 1
+            now = self._clock()
+            self._state = STATE_OPEN
+            self._opened_at = now
+            self._open_until = now + max(self.reset_timeout, retry_after or 0)
+
+    @property
+    def retry_in(self) -> float:
+        """Return seconds until the circuit lets a probe through."""
+        if self._state != STATE_OPEN:
+            return 0.0
+        return max(0.0, self._open_until - self._clock())
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return circuit statistics."""
+        return {
+            "state": self.state,
+            "consecutive_failures": self._failures,
+            "times_opened": self._times_opened,
+            "rejected": self._rejected,
+            "retry_in": round(self.retry_in, 1),
+        }
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header into seconds from now."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=UTC)
+    return max(0.0, (when - datetime.now(UTC)).total_seconds())
@@ -0,0 +1,230 @@
+"""Adaptive poll scheduling for the Allow2 integration.
+
+Status changes that can be predicted from the last check, such as a
+time block ending or the quota of an activity in use running out, get
+a one-shot wakeup at the predicted moment that re-verifies with the
+server. Regular polls catch everything else; they only back off to the
+maximum interval while nothing can change without a predicted
+transition.
+
+Regular polls of all children and config entries are spread over the
+poll interval by a shared PollScheduler, so coordinators created
+together do not fire together.
+"""
+from __future__ import annotations
+
+import math
+import random
+import time
+from collections.abc import Callable, Collection, Hashable, Iterable
+from datetime import datetime, timedelta
+from typing import Any
+
+from .api import ActivityStatus
+
+# Check this long after a predicted transition so the server has flipped state
+EXPIRY_GUARD = timedelta(seconds=2)
+
+# Random delay added to each poll, as a fraction of the poll interval
+POLL_JITTER = 0.02
+
+
+def next_transition(
+    activities: Iterable[ActivityStatus],
+    now: datetime,
+    quota_threshold: int = 0,
+    in_use: Collection[int] = (),
+) -> datetime | None:
+    """Return when to re-verify the next predicted status change.
+
+    - A time block with a known end flips at its end.
+    - An allowed activity in use is blocked when its quota runs out, and
+      its quota is low when it drops below ``quota_threshold``.
+
+    The quota of an idle activity does not move, so it predicts nothing;
+    regular polls notice when it starts being used.
+
+    Args:
+        activities: Last fetched status of the activities
+        now: Current time
+        quota_threshold: Remaining seconds below which a quota is low
+        in_use: IDs of the activities whose quota is counting down
+
+    Returns:
+        The earliest predicted transition plus EXPIRY_GUARD, or None if
+        no transition can be predicted
+    """
+    transition: datetime | None = None
+
+    for activity in activities:
+        candidates: list[datetime] = []
+        if activity.time_block_ends is not None:
+            ends = datetime.fromtimestamp(activity.time_block_ends, now.tzinfo)
+            if ends > now:
+                candidates.append(ends)
+        if (
+            activity.activity_id in in_use
+            and activity.allowed
+            and not activity.banned
+            and activity.remaining_seconds is not None
+            and activity.remaining_seconds > 0
+        ):
+            candidates.append(now + timedelta(seconds=activity.remaining_seconds))
+            if activity.remaining_seconds > quota_threshold > 0:
+                candidates.append(
+                    now
+                    + timedelta(seconds=activity.remaining_seconds - quota_threshold)
+                )
+
+        for candidate in candidates:
+            if transition is None or candidate < transition:
+                transition = candidate
+
+    return None if transition is None else transition + EXPIRY_GUARD
+
+
+def next_poll_interval(
+    activities: Iterable[ActivityStatus],
+    default_interval: timedelta,
+    min_interval: timedelta,
+    max_interval: timedelta,
+    in_use: Collection[int] = (),
+) -> timedelta:
+    """Return the delay until the next regular poll for a set of activities.
+
+    Predictable transitions are re-verified by the wakeup from
+    next_transition(), so only activities that can change without a
+    predicted transition poll at ``default_interval``:
+
+    - Activities whose time block end is unknown; the check response
+      omits it, so a block may start or end at any time.
+    - Idle activities with a quota left, which may start being used and
+      run out.
+
+    Banned activities, and activities whose quota is used up or in use
+    and whose time block end is known, only change when changed on the
+    server, so they ask for ``max_interval``.
+
+    The result is clamped to ``[min_interval, max_interval]``.
+
+    Args:
+        activities: Last fetched status of the activities
+        default_interval: Poll interval while a change is unpredictable
+        min_interval: Shortest poll interval
+        max_interval: Longest poll interval
+        in_use: IDs of the activities whose quota is counting down
+    """
+    interval = max_interval
+
+    for activity in activities:
+        if activity.banned:
+            continue
+        remaining = activity.remaining_seconds
+        if (activity.time_block_ends is None and remaining != 0) or (
+            remaining is not None
+            and remaining > 0
+            and activity.activity_id not in in_use
+        ):
+            interval = min(interval, default_interval)
+
+    return max(min_interval, min(interval, max_interval))
+
+
+class PollScheduler:
+    """Spread regular polls evenly over their interval.
+
+    Every registered poller gets a slot: a fixed phase within any poll
+    interval. Phases follow the van der Corput sequence, so they stay
+    evenly spread as pollers are added, and a removed poller's slot is
+    reused by the next one. Each poll is scheduled for the next
+    occurrence of its phase on a grid anchored at a fixed time, plus a
+    little jitter, instead of a fixed delay after the previous poll
+    ended. A slow request therefore does not shift later polls.
+    """
+
+    def __init__(
+        self,
+        jitter: float = POLL_JITTER,
+        clock: Callable[[], float] = time.monotonic,
+        rng: random.Random | None = None,
+    ) -> None:
+        """Initialize the scheduler.
+
+        Args:
+            jitter: Maximum random delay added to a poll, as a fraction
+                of its interval
+            clock: Monotonic clock in seconds
+            rng: Random number generator for the jitter
+        """
+        self.jitter = jitter
+        self._clock = clock
+        self._rng = rng or random.Random()
+        self._slots: dict[Hashable, int] = {}
+        self._planned: dict[Hashable, float] = {}
+        self._scheduled = 0
+        self._late = 0
+        self._max_lateness = 0.0
+
+    def phase(self, key: Hashable) -> float:
+        """Return the phase of a poller's slot as a fraction of the interval.
+
+        A poller gets the first free slot when it is first seen.
+        """
+        if key not in self._slots:
+            taken = set(self._slots.values())
+            self._slots[key] = next(
+                index for index in range(len(taken) + 1) if index not in taken
+            )
+        return _van_der_corput(self._slots[key])
+
+    def release(self, key: Hashable) -> None:
+        """Free the slot of a poller that stopped polling."""
+        self._slots.pop(key, None)
+        self._planned.pop(key, None)
+
+    def delay(self, key: Hashable, interval: timedelta) -> timedelta:
+        """Return the delay until a poller's next poll in its slot.
+
+        The next slot is at least half an interval away, so a poll that
+        ran early does not run again right away. A poll that ran late,
+        e.g. after a slow request, goes back to its slot.
+        """
+        period = interval.total_seconds()
+        now = self._clock()
+        planned = self._planned.get(key)
+        if planned is not None and now > planned:
+            lateness = now - planned
+            self._max_lateness = max(self._max_lateness, lateness)
+            if lateness > period * self.jitter:
+                self._late += 1
+
+        offset = self.phase(key) * period
+        target = math.floor((now - offset) / period) * period + offset + period
+        if target - now < period / 2:
+            target += period
+        target += self._rng.uniform(0, period * self.jitter)
+        self._planned[key] = target
+        self._scheduled += 1
+        return timedelta(seconds=target - now)
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return scheduling statistics."""
+        return {
+            "slots": len(self._slots),
+            "jitter": self.jitter,
+            "scheduled": self._scheduled,
+            "late": self._late,
+            "max_lateness": round(self._max_lateness, 3),
+        }
+
+
+def _van_der_corput(index: int) -> float:
+    """Return the index-th element of the base 2 van der Corput sequence."""
+    phase = 0.0
+    denominator = 1.0
+    while index:
+        denominator *= 2
+        index, bit = divmod(index, 2)
+        phase += bit / denominator
+    return phase
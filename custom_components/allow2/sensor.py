@@ -14,11 +14,18 @@ from homeassistant.components.sensor import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import UnitOfTime
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.device_registry import DeviceEntryType, DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
+from homeassistant.util import dt as dt_util
 
-from .const import ACTIVITIES, DOMAIN
+from .api import ActivityStatus
+from .catalog import ActivityCatalog
+from .const import DOMAIN
+from .countdown import round_remaining
+from .reconciler import Allow2ChildReconciler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -32,32 +39,63 @@ async def async_setup_entry(
     data = hass.data[DOMAIN][entry.entry_id]
     coordinators = data.get("coordinators", {})
     children: list[dict[str, Any]] = data.get("children", [])
+    catalog: ActivityCatalog = data["catalog"]
+    reconciler: Allow2ChildReconciler = data["reconciler"]
+    entities: dict[tuple[int, int], Allow2RemainingTimeSensor] = {}
 
-    entities: list[Allow2RemainingTimeSensor] = []
+    @callback
+    def async_add_activities(child_id: int, activities: dict[int, str]) -> None:
+        """Add entities for activities of a child."""
+        coordinator = coordinators[child_id]
+        new_entities = {
+            (child_id, activity_id): Allow2RemainingTimeSensor(
+                coordinator=coordinator,
+                child_id=child_id,
+                child_name=coordinator.child_name,
+                activity_id=activity_id,
+                activity_name=activity_name,
+                entry_id=entry.entry_id,
+            )
+            for activity_id, activity_name in activities.items()
+            # A new child's first discovery may have added them already
+            if (child_id, activity_id) not in entities
+        }
+        entities.update(new_entities)
+        async_add_entities(new_entities.values())
+
+    @callback
+    def async_activities_changed(
+        child_id: int, added: dict[int, str], removed: list[int]
+    ) -> None:
+        """Add and remove entities when a child's activities change."""
+        if child_id not in coordinators:
+            return
+        async_add_activities(child_id, added)
+        registry = er.async_get(hass)
+        for activity_id in removed:
+            entity = entities.pop((child_id, activity_id), None)
+            if entity is not None and entity.registry_entry is not None:
+                registry.async_remove(entity.entity_id)
+
+    @callback
+    def async_child_changed(child_id: int, added: bool) -> None:
+        """Add and remove entities of children added to or removed from the account."""
+        if added:
+            async_add_activities(child_id, catalog.activities(child_id))
+            return
+        registry = er.async_get(hass)
+        for key in [key for key in entities if key[0] == child_id]:
+            entity = entities.pop(key)
+            if entity.registry_entry is not None:
+                registry.async_remove(entity.entity_id)
 
     for child in children:
         child_id = child.get("id")
-        child_name = child.get("name", f"Child {child_id}")
+        if child_id and child_id in coordinators:
+            async_add_activities(child_id, catalog.activities(child_id))
 
-        if not child_id or child_id not in coordinators:
-            continue
-
-        coordinator = coordinators[child_id]
-
-        # Create sensors for common activities
-        for activity_id, activity_name in ACTIVITIES.items():
-            entities.append(
-                Allow2RemainingTimeSensor(
-                    coordinator=coordinator,
-                    child_id=child_id,
-                    child_name=child_name,
-                    activity_id=activity_id,
-                    activity_name=activity_name,
-                    entry_id=entry.entry_id,
-                )
-            )
-
-    async_add_entities(entities)
+    entry.async_on_unload(catalog.add_listener(async_activities_changed))
+    entry.async_on_unload(reconciler.add_listener(async_child_changed))
 
 
 class Allow2RemainingTimeSensor(CoordinatorEntity, SensorEntity):
@@ -67,6 +105,10 @@ class Allow2RemainingTimeSensor(CoordinatorEntity, SensorEntity):
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfTime.SECONDS
     _attr_has_entity_name = True
+    # Static attributes are kept out of the recorded state history
+    _unrecorded_attributes = frozenset(
+        {"child_id", "child_name", "activity_id", "activity_name"}
+    )
 
     def __init__(
         self,
@@ -78,45 +120,113 @@ class Allow2RemainingTimeSensor(CoordinatorEntity, SensorEntity):
         entry_id: str,
     ) -> None:
         """Initialize the sensor."""
-        super().__init__(coordinator)
+        super().__init__(coordinator, context=activity_id)
         self._child_id = child_id
         self._child_name = child_name
         self._activity_id = activity_id
         self._activity_name = activity_name
 
+        # State and attributes computed once per coordinator update
+        self._value: int | None = None
+        self._attributes: dict[str, Any] = {}
+        self._static_attributes = {
+            "child_id": child_id,
+            "child_name": child_name,
+            "activity_id": activity_id,
+            "activity_name": activity_name,
+        }
+
         # Entity attributes
         self._attr_unique_id = f"{entry_id}_{child_id}_{activity_id}_remaining"
-        self._attr_name = f"{child_name} {activity_name} Remaining"
+        self._attr_name = f"{activity_name} Remaining"
+        self._attr_device_info = DeviceInfo(
+            identifiers={(DOMAIN, f"{entry_id}_{child_id}")},
+            name=child_name,
+            manufacturer="Allow2",
+            entry_type=DeviceEntryType.SERVICE,
+        )
+
+    async def async_added_to_hass(self) -> None:
+        """Compute the initial state and subscribe to local countdown ticks."""
+        self._update_attrs()
+        await super().async_added_to_hass()
+        if self.coordinator.countdown is not None:
+            self.async_on_remove(
+                self.coordinator.countdown.add_listener(
+                    self._child_id, self._activity_id, self._handle_countdown_tick
+                )
+            )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Recompute state and attributes from the new coordinator data."""
+        self._update_attrs()
+        super()._handle_coordinator_update()
+
+    @callback
+    def _handle_countdown_tick(self) -> None:
+        """Recompute the remaining time counted down locally."""
+        self._value = self._remaining(None)
+        self.async_write_ha_state()
 
     @property
     def native_value(self) -> int | None:
         """Return the remaining time in seconds."""
+        return self._value
+
+    @property
+    def available(self) -> bool:
+        """Return True while fresh or not too stale data is available."""
+        return self.coordinator.data_available
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return additional attributes."""
+        return self._attributes
+
+    def _remaining(self, activity: ActivityStatus | None) -> int | None:
+        """Return the remaining time in seconds.
+
+        Between polls, time of an activity in use is counted down locally.
+        The value is rounded up to the configured remaining time step.
+        """
         if not self.coordinator.data:
             return None
 
-        activities = self.coordinator.data.get("activities", {})
-        activity = activities.get(self._activity_id)
+        if self.coordinator.countdown is not None:
+            remaining = self.coordinator.countdown.remaining(
+                self._child_id, self._activity_id
+            )
+        elif activity:
+            remaining = activity.remaining_seconds
+        else:
+            return None
 
-        if activity:
-            return activity.remaining_seconds
+        return round_remaining(remaining, self.coordinator.remaining_step)
 
-        return None
+    def _update_attrs(self) -> None:
+        """Compute state and attributes once per coordinator update.
 
-    @property
-    def extra_state_attributes(self) -> dict[str, Any]:
-        """Return additional attributes."""
-        attrs = {
-            "child_id": self._child_id,
-            "child_name": self._child_name,
-            "activity_id": self._activity_id,
-            "activity_name": self._activity_name,
-        }
+        The properties return them without recomputing on each read.
+        """
+        activity = (
+            self.coordinator.activities.get(self._activity_id)
+            if self.coordinator.data
+            else None
+        )
+        self._value = self._remaining(activity)
+        attrs: dict[str, Any] = dict(self._static_attributes)
+        self._attributes = attrs
 
         if not self.coordinator.data:
-            return attrs
+            return
 
-        activities = self.coordinator.data.get("activities", {})
-        activity = activities.get(self._activity_id)
+        if self.coordinator.is_stale:
+            # Serving the last good data while the API is unreachable
+            last_fetched = self.coordinator.last_fetched
+            attrs["last_fetched"] = last_fetched.isoformat()
+            attrs["data_age"] = int((dt_util.utcnow() - last_fetched).total_seconds())
+            attrs["evaluated_locally"] = self.coordinator.evaluated_locally
 
         if activity:
             attrs.update({
@@ -124,5 +234,3 @@ class Allow2RemainingTimeSensor(CoordinatorEntity, SensorEntity):
                 "banned": activity.banned,
                 "time_block_allowed": activity.time_block_allowed,
             })
-
-        return attrs
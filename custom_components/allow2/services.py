@@ -0,0 +1,157 @@
+"""Services of the Allow2 integration."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any, Final
+
+import voluptuous as vol
+from homeassistant.core import (
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
+)
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .api import Allow2AuthError, Allow2ConnectionError
+from .catalog import ActivityCatalog
+from .const import DOMAIN
+
+SERVICE_LOG_USAGE: Final = "log_usage"
+SERVICE_CHECK: Final = "check"
+
+ATTR_CHILD_ID: Final = "child_id"
+ATTR_ACTIVITY_ID: Final = "activity_id"
+ATTR_ACTIVITY_IDS: Final = "activity_ids"
+ATTR_DURATION: Final = "duration"
+ATTR_MAX_AGE: Final = "max_age"
+
+# Age of polled data the check service answers from by default
+DEFAULT_CHECK_MAX_AGE: Final = timedelta(seconds=60)
+
+LOG_USAGE_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_CHILD_ID): cv.positive_int,
+        vol.Required(ATTR_ACTIVITY_ID): cv.positive_int,
+        vol.Optional(ATTR_DURATION): vol.All(
+            cv.time_period, cv.positive_timedelta
+        ),
+    }
+)
+
+CHECK_SCHEMA: Final = vol.Schema(
+    {
+        vol.Required(ATTR_CHILD_ID): cv.positive_int,
+        vol.Required(ATTR_ACTIVITY_IDS): vol.All(
+            cv.ensure_list, vol.Length(min=1), [cv.positive_int]
+        ),
+        vol.Optional(ATTR_MAX_AGE, default=DEFAULT_CHECK_MAX_AGE): vol.All(
+            cv.time_period, cv.positive_timedelta
+        ),
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    @callback
+    def async_log_usage(call: ServiceCall) -> None:
+        """Queue usage of an activity to be logged in Allow2."""
+        data = _entry_data_of_child(hass, call.data[ATTR_CHILD_ID])
+        _validate_activities(data, call.data[ATTR_CHILD_ID], [call.data[ATTR_ACTIVITY_ID]])
+        duration = call.data.get(ATTR_DURATION)
+        data["usage"].async_record(
+            call.data[ATTR_CHILD_ID],
+            call.data[ATTR_ACTIVITY_ID],
+            duration.total_seconds() if duration is not None else None,
+        )
+
+    async def async_check(call: ServiceCall) -> ServiceResponse:
+        """Return whether activities of a child are allowed right now."""
+        child_id = call.data[ATTR_CHILD_ID]
+        data = _entry_data_of_child(hass, child_id)
+        _validate_activities(data, child_id, call.data[ATTR_ACTIVITY_IDS])
+        coordinator = data["coordinators"][child_id]
+        try:
+            activities, fetched, cached = await coordinator.async_check(
+                sorted(set(call.data[ATTR_ACTIVITY_IDS])), call.data[ATTR_MAX_AGE]
+            )
+        except (Allow2ConnectionError, Allow2AuthError) as err:
+            raise HomeAssistantError(f"Could not check Allow2: {err}") from err
+
+        response: list[dict[str, Any]] = []
+        for activity_id, activity in activities.items():
+            remaining = activity.remaining_seconds
+            if cached and coordinator.countdown is not None:
+                # Time of an activity in use is counted down since the poll
+                remaining = coordinator.countdown.remaining(child_id, activity_id)
+            response.append(
+                {
+                    "activity_id": activity_id,
+                    "name": activity.name,
+                    # As the binary sensor, a ban blocks the activity
+                    "allowed": activity.allowed and not activity.banned,
+                    "banned": activity.banned,
+                    "remaining_seconds": remaining,
+                    "time_block_allowed": activity.time_block_allowed,
+                }
+            )
+        return {
+            "child_id": child_id,
+            "child_name": coordinator.child_name,
+            "allowed": all(activity["allowed"] for activity in response),
+            "cached": cached,
+            "age": round((dt_util.utcnow() - fetched).total_seconds(), 1),
+            "activities": response,
+        }
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_LOG_USAGE, async_log_usage, schema=LOG_USAGE_SCHEMA
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_CHECK,
+        async_check,
+        schema=CHECK_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _entry_data_of_child(hass: HomeAssistant, child_id: int) -> dict[str, Any]:
+    """Return the data of the loaded config entry with a child.
+
+    Raises:
+        ServiceValidationError: If no loaded config entry has the child
+    """
+    for entry in hass.config_entries.async_entries(DOMAIN):
+        data = hass.data.get(DOMAIN, {}).get(entry.entry_id)
+        if data is not None and child_id in data["coordinators"]:
+            return data
+    raise ServiceValidationError(f"No Allow2 child with ID {child_id} is set up")
+
+
+def _validate_activities(
+    data: dict[str, Any], child_id: int, activity_ids: list[int]
+) -> None:
+    """Check that the activities are known to the entry of a child.
+
+    Activities are known by name to the catalog of the entry, which
+    includes those discovered from the checks, or configured for the
+    child.
+
+    Raises:
+        ServiceValidationError: If an activity is unknown
+    """
+    catalog: ActivityCatalog = data["catalog"]
+    known = {*catalog.names, *catalog.activities(child_id)}
+    unknown = sorted(set(activity_ids) - known)
+    if unknown:
+        raise ServiceValidationError(
+            f"Unknown Allow2 activity ID {', '.join(map(str, unknown))} "
+            f"for child {child_id}"
+        )
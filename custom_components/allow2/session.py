@@ -0,0 +1,109 @@
+"""Dedicated HTTP session of the Allow2 API client.
+
+The shared Home Assistant session keeps idle connections for 15
+seconds, so with checks minutes apart nearly every check opens a new
+connection with a fresh TLS handshake. The dedicated session keeps
+connections to the API alive across the regular poll interval, caches
+DNS lookups for as long and caps the connections per host. A trace
+config counts how often connections are reused.
+"""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+from aiohttp import hdrs
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.util import ssl as ssl_util
+
+# Seconds an idle connection outlives the regular poll interval
+KEEPALIVE_MARGIN = 30
+
+
+class ConnectionStats:
+    """Count created and reused connections of a session."""
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self._created = 0
+        self._reused = 0
+        self._queued = 0
+        self._dns_hits = 0
+        self._dns_misses = 0
+
+    def trace_config(self) -> aiohttp.TraceConfig:
+        """Return a trace config counting into these statistics."""
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._on_created)
+        trace_config.on_connection_reuseconn.append(self._on_reused)
+        trace_config.on_connection_queued_start.append(self._on_queued)
+        trace_config.on_dns_cache_hit.append(self._on_dns_hit)
+        trace_config.on_dns_cache_miss.append(self._on_dns_miss)
+        return trace_config
+
+    async def _on_created(
+        self, _session: aiohttp.ClientSession, _context: SimpleNamespace, _params: Any
+    ) -> None:
+        self._created += 1
+
+    async def _on_reused(
+        self, _session: aiohttp.ClientSession, _context: SimpleNamespace, _params: Any
+    ) -> None:
+        self._reused += 1
+
+    async def _on_queued(
+        self, _session: aiohttp.ClientSession, _context: SimpleNamespace, _params: Any
+    ) -> None:
+        self._queued += 1
+
+    async def _on_dns_hit(
+        self, _session: aiohttp.ClientSession, _context: SimpleNamespace, _params: Any
+    ) -> None:
+        self._dns_hits += 1
+
+    async def _on_dns_miss(
+        self, _session: aiohttp.ClientSession, _context: SimpleNamespace, _params: Any
+    ) -> None:
+        self._dns_misses += 1
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return connection statistics."""
+        connections = self._created + self._reused
+        return {
+            "created": self._created,
+            "reused": self._reused,
+            "reuse_ratio": round(self._reused / connections, 3) if connections else None,
+            "queued": self._queued,
+            "dns_cache_hits": self._dns_hits,
+            "dns_cache_misses": self._dns_misses,
+        }
+
+
+def create_session(
+    keepalive_timeout: float,
+    limit_per_host: int,
+    stats: ConnectionStats,
+) -> aiohttp.ClientSession:
+    """Create a session tuned for polling the Allow2 API.
+
+    The caller closes the session when it is no longer used.
+
+    Args:
+        keepalive_timeout: Seconds to keep idle connections and cached
+            DNS lookups
+        limit_per_host: Maximum number of connections to the API host
+        stats: Statistics to count connections into
+    """
+    connector = aiohttp.TCPConnector(
+        limit_per_host=limit_per_host,
+        keepalive_timeout=keepalive_timeout,
+        ttl_dns_cache=int(keepalive_timeout),
+        ssl=ssl_util.get_default_context(),
+    )
+    return aiohttp.ClientSession(
+        connector=connector,
+        headers={hdrs.USER_AGENT: SERVER_SOFTWARE},
+        trace_configs=[stats.trace_config()],
+    )
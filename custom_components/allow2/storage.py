@@ -0,0 +1,110 @@
+"""Persisted last known state of Allow2 children."""
+from __future__ import annotations
+
+import logging
+from dataclasses import asdict
+from datetime import datetime
+from typing import Any, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import ActivityStatus
+from .catalog import ActivityCatalog
+from .const import DOMAIN
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION: Final = 1
+
+# Delay in seconds to batch snapshot writes of several children
+SAVE_DELAY: Final = 30
+
+
+class Allow2SnapshotStore:
+    """Store of the last good check data of each child of a config entry.
+
+    Snapshots let entities restore their state at startup, before the
+    first check completes. The store also keeps the discovered
+    activities of the children, so they are not discovered again on
+    every restart.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        catalog: ActivityCatalog | None = None,
+    ) -> None:
+        """Initialize the store."""
+        self._store: Store[dict[str, Any]] = Store(
+            hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}"
+        )
+        self._catalog = catalog
+        self._children: dict[str, dict[str, Any]] = {}
+
+    async def async_load(self) -> dict[int, tuple[datetime, dict[str, Any]]]:
+        """Load the snapshots.
+
+        Returns:
+            Fetch time and coordinator data by child ID
+        """
+        stored = await self._store.async_load()
+        if not stored:
+            return {}
+
+        self._children = stored.get("children", {})
+        if self._catalog is not None and "catalog" in stored:
+            self._catalog.restore(stored["catalog"])
+        snapshots: dict[int, tuple[datetime, dict[str, Any]]] = {}
+        for child_id, snapshot in self._children.items():
+            try:
+                fetched = dt_util.parse_datetime(snapshot["fetched"])
+                data = {
+                    "allowed": snapshot["allowed"],
+                    "activities": {
+                        activity["activity_id"]: ActivityStatus(**activity)
+                        for activity in snapshot["activities"]
+                    },
+                }
+            except (KeyError, TypeError) as err:
+                _LOGGER.debug("Ignoring invalid snapshot of child %s: %s", child_id, err)
+                continue
+            if fetched is not None:
+                snapshots[int(child_id)] = (fetched, data)
+        return snapshots
+
+    @callback
+    def async_update(
+        self, child_id: int, fetched: datetime, data: dict[str, Any]
+    ) -> None:
+        """Record the last good data of a child and schedule a save."""
+        self._children[str(child_id)] = {
+            "fetched": fetched.isoformat(),
+            "allowed": data["allowed"],
+            "activities": [asdict(activity) for activity in data["activities"].values()],
+        }
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_remove_child(self, child_id: int) -> None:
+        """Forget the snapshot of a removed child and schedule a save."""
+        if self._children.pop(str(child_id), None) is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save the snapshots now."""
+        await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        """Remove the stored snapshots."""
+        await self._store.async_remove()
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        data: dict[str, Any] = {"children": self._children}
+        if self._catalog is not None:
+            data["catalog"] = self._catalog.as_dict()
+        return data
@@ -0,0 +1,206 @@
+"""Write-behind queue of usage reported to Allow2.
+
+Allow2 counts usage from logged checks made while an activity is in
+use. Usage reported through the ``allow2.log_usage`` service is
+collected per child and activity and sent once per interval, as one
+logged check per child covering all of its activities in use, however
+often the usage was reported. Each check logs at most one interval of
+usage per activity, longer usage is logged over the following
+intervals. Pending usage is kept in Home Assistant storage, so it
+survives restarts, and is flushed when the config entry is unloaded.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any, Final
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+from homeassistant.util import dt as dt_util
+
+from .api import Allow2Error
+from .const import DOMAIN
+from .storage import SAVE_DELAY
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION: Final = 1
+
+# Interval between logged checks of a child, the request rate Allow2
+# recommends
+USAGE_LOG_INTERVAL: Final = timedelta(minutes=1)
+# Most usage in seconds kept pending per child and activity
+MAX_PENDING_USAGE: Final = 86400
+
+UsageSender = Callable[[int, list[int]], Awaitable[Any]]
+
+
+class UsageLogQueue:
+    """Pending usage of the children of a config entry."""
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        entry_id: str,
+        send: UsageSender,
+        interval: timedelta = USAGE_LOG_INTERVAL,
+    ) -> None:
+        """Initialize the queue.
+
+        Args:
+            hass: Home Assistant instance
+            entry_id: ID of the config entry, naming the store
+            send: Coroutine function sending a logged check, taking the
+                child ID and the IDs of the activities in use
+            interval: Usage logged per activity by one check
+        """
+        self._store = _usage_store(hass, entry_id)
+        self._send = send
+        self._interval = interval.total_seconds()
+        # Seconds of usage not yet logged by child ID and activity ID
+        self._pending: dict[int, dict[int, float]] = {}
+        self._lock = asyncio.Lock()
+        self._events = 0
+        self._checks = 0
+        self._failed = 0
+        self._logged = 0.0
+        self._last_flush: datetime | None = None
+
+    async def async_load(self) -> None:
+        """Load the usage pending before a restart."""
+        stored = await self._store.async_load()
+        if not stored:
+            return
+        for child_id, activities in stored.get("pending", {}).items():
+            for activity_id, seconds in activities.items():
+                self._add(int(child_id), int(activity_id), seconds)
+
+    @callback
+    def async_record(
+        self, child_id: int, activity_id: int, duration: float | None = None
+    ) -> None:
+        """Record usage of an activity and schedule a save.
+
+        Args:
+            child_id: ID of the child
+            activity_id: ID of the activity in use
+            duration: Seconds of usage to log, or None to log the
+                activity as in use during the current interval
+        """
+        self._events += 1
+        if duration is None:
+            # Repeated reports within an interval are logged once
+            pending = self._pending.get(child_id, {}).get(activity_id, 0.0)
+            duration = max(0.0, self._interval - pending)
+        self._add(child_id, activity_id, duration)
+        self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    @callback
+    def async_remove_child(self, child_id: int) -> None:
+        """Drop the pending usage of a removed child and schedule a save."""
+        if self._pending.pop(child_id, None) is not None:
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self, _now: datetime | None = None) -> None:
+        """Send one logged check per child with pending usage.
+
+        Usage of a check that fails stays pending for the next flush.
+        """
+        async with self._lock:
+            if not self._pending:
+                return
+            children = {
+                child_id: sorted(activities)
+                for child_id, activities in self._pending.items()
+            }
+            results = await asyncio.gather(
+                *(
+                    self._send(child_id, activity_ids)
+                    for child_id, activity_ids in children.items()
+                ),
+                return_exceptions=True,
+            )
+            for (child_id, activity_ids), result in zip(children.items(), results):
+                if isinstance(result, Allow2Error):
+                    self._failed += 1
+                    _LOGGER.debug(
+                        "Could not log usage of child %s: %s", child_id, result
+                    )
+                    continue
+                if isinstance(result, BaseException):
+                    raise result
+                self._checks += 1
+                self._drain(child_id, activity_ids)
+            self._last_flush = dt_util.utcnow()
+            self._store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_save(self) -> None:
+        """Save the pending usage now."""
+        await self._store.async_save(self._data_to_save())
+
+    def _add(self, child_id: int, activity_id: int, seconds: float) -> None:
+        """Add usage to the pending usage of an activity."""
+        activities = self._pending.setdefault(child_id, {})
+        activities[activity_id] = min(
+            MAX_PENDING_USAGE, activities.get(activity_id, 0.0) + seconds
+        )
+
+    def _drain(self, child_id: int, activity_ids: list[int]) -> None:
+        """Remove the usage one check logged from the pending usage."""
+        activities = self._pending.get(child_id)
+        if activities is None:
+            # Removed while the check was sent
+            return
+        for activity_id in activity_ids:
+            seconds = activities.pop(activity_id, 0.0)
+            self._logged += min(seconds, self._interval)
+            if seconds > self._interval:
+                activities[activity_id] = seconds - self._interval
+        if not activities:
+            del self._pending[child_id]
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        """Return the data to store."""
+        return {
+            "pending": {
+                str(child_id): {
+                    str(activity_id): seconds
+                    for activity_id, seconds in activities.items()
+                }
+                for child_id, activities in self._pending.items()
+            }
+        }
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return usage logging statistics."""
+        return {
+            "interval": self._interval,
+            "events": self._events,
+            "checks": self._checks,
+            "failed": self._failed,
+            "logged_seconds": round(self._logged),
+            "pending_seconds": round(
+                sum(
+                    seconds
+                    for activities in self._pending.values()
+                    for seconds in activities.values()
+                )
+            ),
+            "pending_children": len(self._pending),
+            "last_flush": self._last_flush.isoformat() if self._last_flush else None,
+        }
+
+
+async def async_remove_usage(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove the stored pending usage of a removed config entry."""
+    await _usage_store(hass, entry_id).async_remove()
+
+
+def _usage_store(hass: HomeAssistant, entry_id: str) -> Store[dict[str, Any]]:
+    """Return the store of the pending usage of a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}.usage")
@@ -0,0 +1 @@
+"""Tests for the Allow2 integration."""
@@ -0,0 +1,162 @@
+"""Helpers for the Allow2 integration tests."""
+from __future__ import annotations
+
+import random
+from typing import Any
+from urllib.parse import urlsplit
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+from benchmarks.standin import StandInServer
+from custom_components.allow2.api import ActivityStatus
+from custom_components.allow2.const import (
+    ACTIVITIES,
+    API_BASE_URL,
+    API_CHECK_ENDPOINT,
+    API_RATE_LIMIT,
+    API_RATE_LIMIT_BURST,
+    CONF_CHILDREN,
+    CONF_DEDICATED_SESSION,
+    CONF_DEVICE_NAME,
+    CONF_DEVICE_TOKEN,
+    CONF_PAIR_ID,
+    CONF_PAIR_TOKEN,
+    CONF_REMAINING_TIME_STEP,
+    CONF_USER_ID,
+    DATA_POLL_SCHEDULER,
+    DATA_RATE_LIMITERS,
+    DOMAIN,
+)
+from custom_components.allow2.ratelimit import TokenBucketLimiter
+from custom_components.allow2.scheduler import PollScheduler
+
+CHECK_URL = f"{API_BASE_URL}{API_CHECK_ENDPOINT}"
+ENTRY_ID = "test_entry"
+
+
+def frozen_clock() -> float:
+    """Return the current, possibly frozen, time in seconds."""
+    return dt_util.utcnow().timestamp()
+
+
+def use_frozen_clocks(hass: HomeAssistant) -> None:
+    """Make the shared poll scheduler and rate limiter follow frozen time.
+
+    Both take their clock when created, before a test freezes time.
+    """
+    data = hass.data.setdefault(DOMAIN, {})
+    data[DATA_POLL_SCHEDULER] = PollScheduler(clock=frozen_clock, rng=random.Random(0))
+    data[DATA_RATE_LIMITERS] = {
+        ("device-token", urlsplit(API_BASE_URL).hostname): TokenBucketLimiter(
+            API_RATE_LIMIT, API_RATE_LIMIT_BURST, clock=frozen_clock
+        )
+    }
+
+
+def make_status(
+    activity_id: int = 1,
+    *,
+    allowed: bool = True,
+    banned: bool = False,
+    remaining: int | None = 3600,
+    time_block_allowed: bool = True,
+    time_block_ends: float | None = None,
+) -> ActivityStatus:
+    """Return the parsed status of an activity."""
+    return ActivityStatus(
+        activity_id,
+        ACTIVITIES.get(activity_id, f"Activity {activity_id}"),
+        allowed,
+        banned,
+        remaining,
+        time_block_allowed,
+        time_block_ends,
+    )
+
+
+def make_activity(activity_id: int, **fields: Any) -> dict[str, Any]:
+    """Return the check response entry of an activity."""
+    return {
+        "id": activity_id,
+        "name": ACTIVITIES.get(activity_id, f"Activity {activity_id}"),
+        "allowed": True,
+        "banned": False,
+        "remaining": 3600,
+        "timeBlockAllowed": True,
+        **fields,
+    }
+
+
+def make_check_response(
+    children: dict[int, dict[int, dict[str, Any]]],
+) -> dict[str, Any]:
+    """Return an account-wide check response.
+
+    Args:
+        children: Check response entries of activities by child ID
+    """
+    return {
+        "allowed": True,
+        "children": {
+            str(child_id): {
+                "name": f"Child {child_id}",
+                "allowed": True,
+                "activities": {
+                    str(activity_id): activity
+                    for activity_id, activity in activities.items()
+                },
+            }
+            for child_id, activities in children.items()
+        },
+        "dayTypes": {"today": {"id": 1, "name": "School Day"}},
+        "subscription": {},
+    }
+
+
+def make_entry(
+    children: tuple[int, ...] = (1,),
+    options: dict[str, Any] | None = None,
+    entry_id: str = ENTRY_ID,
+    pair_id: int = 200,
+) -> MockConfigEntry:
+    """Return a config entry of an account with the given children."""
+    return MockConfigEntry(
+        domain=DOMAIN,
+        entry_id=entry_id,
+        data={
+            CONF_USER_ID: 100,
+            CONF_PAIR_ID: pair_id,
+            CONF_PAIR_TOKEN: "pair-token",
+            CONF_DEVICE_TOKEN: "device-token",
+            CONF_DEVICE_NAME: "Home Assistant",
+            CONF_CHILDREN: [
+                {"id": child_id, "name": f"Child {child_id}"} for child_id in children
+            ],
+        },
+        options={
+            CONF_DEDICATED_SESSION: False,
+            CONF_REMAINING_TIME_STEP: 0,
+            **(options or {}),
+        },
+    )
+
+
+def mock_standin(aioclient_mock: AiohttpClientMocker, server: StandInServer) -> None:
+    """Answer check requests from the state of a stand-in server.
+
+    The server does not need to be started. Give it ``frozen_clock``
+    so its quotas count down with the frozen time of a test.
+    """
+
+    async def respond(
+        method: str, url: str, data: dict[str, Any]
+    ) -> AiohttpClientMockResponse:
+        return AiohttpClientMockResponse(method, url, json=server.check_response(data))
+
+    aioclient_mock.post(CHECK_URL, side_effect=respond)
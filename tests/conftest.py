@@ -0,0 +1,10 @@
+"""Fixtures for the Allow2 integration tests."""
+from __future__ import annotations
+
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def auto_enable_custom_integrations(enable_custom_integrations):  # noqa: ARG001
+    """Enable loading the integration from custom_components."""
+    yield
@@ -0,0 +1,107 @@
+"""Tests for decoding check responses."""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+import pytest
+
+from custom_components.allow2.api import (
+    ActivityStatus,
+    Allow2API,
+    Allow2ResponseError,
+    CheckResult,
+)
+
+from .common import make_activity, make_check_response
+
+
+def _decode(
+    data: Any,
+    activity_ids: list[int] | None = None,
+    child_ids: list[int] | None = None,
+) -> CheckResult:
+    """Decode a check response body made of ``data``."""
+    api = Allow2API(session=None)  # type: ignore[arg-type]
+    return api._decode_check_response(json.dumps(data).encode(), activity_ids, child_ids)
+
+
+def test_missing_fields_fall_back_to_defaults() -> None:
+    """An activity without any field is blocked, without a quota or known block end."""
+    result = _decode({"activities": {"1": {}}})
+
+    assert result.activities == {
+        1: ActivityStatus(1, "Activity 1", False, False, None, False, None)
+    }
+    assert not result.allowed
+    assert result.children == {}
+
+
+@pytest.mark.parametrize(
+    ("fields", "time_block_allowed"),
+    [
+        ({"allowed": True}, True),
+        ({"allowed": False, "banned": True}, True),
+        ({"allowed": False, "remaining": 0}, True),
+        ({"allowed": False, "remaining": 600}, False),
+        ({"allowed": False, "remaining": None}, False),
+        ({"allowed": True, "timeBlockAllowed": False}, False),
+    ],
+)
+def test_time_block_allowed_is_inferred_from_the_verdict(
+    fields: dict[str, Any], time_block_allowed: bool
+) -> None:
+    """Without timeBlockAllowed, only an unexplained block is a time block."""
+    activity = {key: value for key, value in make_activity(1).items() if key != "timeBlockAllowed"}
+
+    result = _decode({"activities": {"1": {**activity, **fields}}}, [1])
+
+    assert result.activities[1].time_block_allowed is time_block_allowed
+
+
+def test_missing_children_and_activities_are_skipped() -> None:
+    """Requested children and activities missing from the response are left out."""
+    response = make_check_response({1: {1: make_activity(1)}})
+
+    result = _decode(response, [1, 2], [1, 2])
+
+    assert list(result.children) == [1]
+    assert list(result.children[1].activities) == [1]
+    assert result.child_names == {1: "Child 1"}
+
+
+def test_only_requested_children_and_activities_are_decoded() -> None:
+    """Children and activities beyond the requested ones are not decoded."""
+    response = make_check_response(
+        {child_id: {1: make_activity(1), 2: make_activity(2)} for child_id in (1, 2)}
+    )
+
+    result = _decode(response, [2], [2])
+
+    assert list(result.children) == [2]
+    assert list(result.children[2].activities) == [2]
+    # Names of every child are kept to reconcile the children
+    assert result.child_names == {1: "Child 1", 2: "Child 2"}
+
+
+def test_malformed_entries_are_skipped() -> None:
+    """Children and activities that are not objects are treated as missing."""
+    response = make_check_response({1: {1: make_activity(1)}})
+    response["children"]["1"]["activities"]["2"] = "blocked"
+    response["children"]["2"] = None
+    response["activities"] = [make_activity(1)]
+
+    result = _decode(response, [1, 2], [1, 2])
+
+    assert list(result.children) == [1]
+    assert list(result.children[1].activities) == [1]
+    assert result.activities == {}
+
+
+@pytest.mark.parametrize("body", [b"", b"<html>Bad gateway</html>", b"[]", b'"ok"'])
+def test_invalid_body_is_a_response_error(body: bytes) -> None:
+    """A body that is not a JSON object is rejected."""
+    api = Allow2API(session=None)  # type: ignore[arg-type]
+
+    with pytest.raises(Allow2ResponseError):
+        api._decode_check_response(body, None, None)
@@ -0,0 +1,28 @@
+"""Regression gate of the parser and entity microbenchmarks.
+
+Deselected by default, run with ``pytest -m benchmark``.
+"""
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from benchmarks import bench_micro
+
+pytestmark = pytest.mark.benchmark
+
+# Ratios of times on a shared runner vary by up to a quarter between runs
+THRESHOLD = 50.0
+REPEAT = 5
+
+
+def test_no_regressions() -> None:
+    """No metric is more than the threshold worse than the stored baseline."""
+    baseline = json.loads(bench_micro.BASELINE.read_text())
+    if (reason := bench_micro.comparable(baseline)) is not None:
+        pytest.skip(f"Not comparable with the {reason}")
+
+    corpus, results = bench_micro.run(REPEAT)
+
+    assert bench_micro.compare(corpus, results, baseline, THRESHOLD, REPEAT) == []
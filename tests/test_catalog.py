@@ -0,0 +1,159 @@
+"""Tests for the discovery of each child's activities."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from benchmarks.standin import StandInServer
+from custom_components.allow2.catalog import PERIOD_HOURS, PERIODS, ActivityCatalog, _has_rules
+from custom_components.allow2.const import ACTIVITIES
+
+from .common import ENTRY_ID, frozen_clock, make_entry, make_status, mock_standin
+
+DAY = 86400
+
+
+class _Clock:
+    """Manually advanced wall clock, starting on the hour."""
+
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0 - 1_700_000_000 % 3600
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _check(rules: set[int]) -> dict:
+    """Return a check of all known activities, with a quota for ``rules``."""
+    return {
+        activity_id: make_status(
+            activity_id, remaining=3600 if activity_id in rules else None
+        )
+        for activity_id in ACTIVITIES
+    }
+
+
+def test_has_rules() -> None:
+    """Any quota, ban or time block counts as a rule."""
+    assert not _has_rules(make_status(1, remaining=None))
+    for status in (
+        make_status(1, remaining=3600),
+        make_status(1, remaining=0, allowed=False),
+        make_status(1, remaining=None, allowed=False, banned=True),
+        make_status(1, remaining=None, allowed=False, time_block_allowed=False),
+        make_status(1, remaining=None, time_block_ends=1_700_000_000.0),
+    ):
+        assert _has_rules(status)
+
+
+def test_schedule_inside_its_window_is_kept() -> None:
+    """Activities without rules in the first discovery keep their entities."""
+    clock = _Clock()
+    catalog = ActivityCatalog(ACTIVITIES, DAY, clock=clock)
+
+    assert catalog.due(1)
+    catalog.update(1, _check(set()))
+
+    assert list(catalog.activities(1)) == list(ACTIVITIES)
+    assert not catalog.due(1)
+    # The next period of the day is checked again
+    clock.now += PERIOD_HOURS * 3600
+    assert catalog.due(1)
+    assert catalog.requested(1) == list(ACTIVITIES)
+
+
+def test_unrestricted_all_day_is_dropped() -> None:
+    """An activity without rules in every period of the day is dropped."""
+    clock = _Clock()
+    catalog = ActivityCatalog(ACTIVITIES, DAY, clock=clock)
+    changes: list[tuple[dict[int, str], list[int]]] = []
+    catalog.add_listener(lambda _child_id, added, removed: changes.append((added, removed)))
+
+    for _ in range(PERIODS):
+        assert catalog.due(1)
+        catalog.update(1, _check({1, 2}))
+        clock.now += PERIOD_HOURS * 3600
+
+    assert list(catalog.activities(1)) == [1, 2]
+    assert catalog.requested(1) == [1, 2]
+    assert changes == [({}, [3, 4, 5, 6])]
+    # Decided children are only discovered again after the interval
+    assert not catalog.due(1)
+    clock.now += DAY
+    assert catalog.due(1)
+
+
+def test_restricted_once_is_kept() -> None:
+    """An activity seen with rules once is never dropped."""
+    clock = _Clock()
+    catalog = ActivityCatalog(ACTIVITIES, DAY, clock=clock)
+
+    catalog.update(1, _check({3}))
+    for _ in range(PERIODS):
+        clock.now += PERIOD_HOURS * 3600
+        catalog.update(1, _check(set()))
+
+    assert list(catalog.activities(1)) == [3]
+
+
+def test_new_rule_adds_activity() -> None:
+    """A dropped activity that gets a rule is added back."""
+    clock = _Clock()
+    catalog = ActivityCatalog(ACTIVITIES, DAY, clock=clock)
+    for _ in range(PERIODS):
+        catalog.update(1, _check({1}))
+        clock.now += PERIOD_HOURS * 3600
+    changes: list[dict[int, str]] = []
+    catalog.add_listener(lambda _child_id, added, _removed: changes.append(added))
+
+    clock.now += DAY
+    catalog.update(1, _check({1, 4}))
+
+    assert list(catalog.activities(1)) == [1, 4]
+    assert changes == [{4: ACTIVITIES[4]}]
+
+
+def test_configured_children_are_not_discovered() -> None:
+    """Configured activities replace discovery for that child."""
+    catalog = ActivityCatalog(ACTIVITIES, DAY, {1: [5]}, clock=_Clock())
+
+    catalog.update(1, _check({1}))
+
+    assert not catalog.due(1)
+    assert list(catalog.activities(1)) == [5]
+
+
+def test_storage_round_trip() -> None:
+    """Discovered activities survive a restart, also from the older format."""
+    clock = _Clock()
+    catalog = ActivityCatalog(ACTIVITIES, DAY, clock=clock)
+    for _ in range(PERIODS - 1):
+        catalog.update(1, _check({2}))
+        clock.now += PERIOD_HOURS * 3600
+
+    restored = ActivityCatalog(ACTIVITIES, DAY, clock=clock)
+    restored.restore(catalog.as_dict())
+    assert restored.activities(1) == catalog.activities(1)
+    restored.update(1, _check({2}))
+    assert list(restored.activities(1)) == [2]
+
+    restored = ActivityCatalog(ACTIVITIES, DAY, clock=clock)
+    restored.restore(
+        {"children": {"1": {"discovered_at": clock.now, "misses": {"1": 0, "3": 1}}}}
+    )
+    assert list(restored.activities(1)) == [1, 3]
+
+
+async def test_setup_without_quotas_creates_entities(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Activities without a quota still get entities at setup."""
+    server = StandInServer(children=1, activities=6, remaining=None, clock=frozen_clock)
+    mock_standin(aioclient_mock, server)
+    entry = make_entry(children=(1000,))
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    assert len(hass.states.async_entity_ids("binary_sensor")) == len(ACTIVITIES)
+    assert await hass.config_entries.async_unload(ENTRY_ID)
@@ -0,0 +1,61 @@
+"""Tests for updating entities from the child coordinators."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from benchmarks.standin import StandInServer
+from custom_components.allow2.binary_sensor import Allow2ActivityAllowedSensor
+from custom_components.allow2.const import ACTIVITIES, CONF_ACCOUNT_POLLING, DOMAIN
+from custom_components.allow2.sensor import Allow2RemainingTimeSensor
+
+from .common import ENTRY_ID, frozen_clock, make_entry, mock_standin
+
+CHILD_ID = 1000
+
+
+async def test_only_changed_entities_are_written(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A refresh writes the entities of changed activities and skips the others."""
+    server = StandInServer(children=1, clock=frozen_clock)
+    mock_standin(aioclient_mock, server)
+    entry = make_entry(children=(CHILD_ID,), options={CONF_ACCOUNT_POLLING: False})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(ENTRY_ID)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][ENTRY_ID]["coordinators"][CHILD_ID]
+    server.set_activity(CHILD_ID, 2, remaining=120)
+
+    written: list[str] = []
+
+    def record_write(entity: Allow2RemainingTimeSensor) -> None:
+        written.append(entity.entity_id)
+
+    with patch.object(
+        Allow2RemainingTimeSensor,
+        "async_write_ha_state",
+        autospec=True,
+        side_effect=record_write,
+    ), patch.object(
+        Allow2ActivityAllowedSensor,
+        "async_write_ha_state",
+        autospec=True,
+        side_effect=record_write,
+    ):
+        await coordinator.async_refresh()
+
+    assert sorted(written) == [
+        "binary_sensor.child_1000_gaming_allowed",
+        "sensor.child_1000_gaming_remaining",
+    ]
+    assert coordinator.listener_stats["last_written"] == 2
+    assert coordinator.listener_stats["last_skipped"] == 2 * (len(ACTIVITIES) - 1)
+
+    # Nothing changed since, so every entity is skipped
+    await coordinator.async_refresh()
+    assert coordinator.listener_stats["last_written"] == 0
+    assert coordinator.listener_stats["last_skipped"] == 2 * len(ACTIVITIES)
+    assert await hass.config_entries.async_unload(ENTRY_ID)
@@ -0,0 +1,114 @@
+"""Tests for the local countdown of remaining time."""
+from __future__ import annotations
+
+from custom_components.allow2.countdown import CountdownEngine, round_remaining
+
+from .common import make_status
+
+
+class _Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_activity_in_use_counts_down() -> None:
+    """An activity whose remaining time dropped counts down between fetches."""
+    clock = _Clock()
+    engine = CountdownEngine(clock)
+
+    engine.reconcile(1, {2: make_status(2, remaining=600)})
+    assert not engine.in_use(1, 2)
+
+    clock.now += 60
+    engine.reconcile(1, {2: make_status(2, remaining=540)})
+    assert engine.in_use(1, 2)
+
+    clock.now += 30
+    assert engine.remaining(1, 2) == 510
+
+
+def test_idle_activity_keeps_its_value() -> None:
+    """An activity whose remaining time did not drop is not counted down."""
+    clock = _Clock()
+    engine = CountdownEngine(clock)
+
+    engine.reconcile(1, {2: make_status(2, remaining=600)})
+    clock.now += 60
+    engine.reconcile(1, {2: make_status(2, remaining=600)})
+    clock.now += 60
+
+    assert not engine.in_use(1, 2)
+    assert engine.remaining(1, 2) == 600
+
+
+def test_blocked_activity_is_not_in_use() -> None:
+    """A drop in remaining time of a blocked activity does not count it down."""
+    clock = _Clock()
+    engine = CountdownEngine(clock)
+
+    engine.reconcile(1, {2: make_status(2, remaining=600)})
+    clock.now += 60
+    engine.reconcile(1, {2: make_status(2, allowed=False, remaining=540)})
+
+    assert not engine.in_use(1, 2)
+
+
+def test_reconcile_reports_drift() -> None:
+    """A fetch correcting the projection reports the difference."""
+    clock = _Clock()
+    engine = CountdownEngine(clock)
+
+    engine.reconcile(1, {2: make_status(2, remaining=600)})
+    clock.now += 60
+    engine.reconcile(1, {2: make_status(2, remaining=540)})
+    clock.now += 60
+    # Projected 480, the server granted two more minutes
+    drift = engine.reconcile(1, {2: make_status(2, remaining=600)})
+
+    assert drift == {2: 120}
+    assert engine.stats["corrections"] == 1
+
+
+def test_countdown_stops_at_zero() -> None:
+    """The projection never drops below zero."""
+    clock = _Clock()
+    engine = CountdownEngine(clock)
+
+    engine.reconcile(1, {2: make_status(2, remaining=100)})
+    clock.now += 10
+    engine.reconcile(1, {2: make_status(2, remaining=90)})
+    clock.now += 1000
+
+    assert engine.remaining(1, 2) == 0
+
+
+def test_tick_notifies_activities_in_use() -> None:
+    """A tick only notifies the listeners of activities counting down."""
+    clock = _Clock()
+    engine = CountdownEngine(clock)
+    ticks: list[int] = []
+    engine.add_listener(1, 2, lambda: ticks.append(2))
+    remove = engine.add_listener(1, 3, lambda: ticks.append(3))
+
+    engine.reconcile(1, {2: make_status(2, remaining=600), 3: make_status(3)})
+    clock.now += 60
+    engine.reconcile(1, {2: make_status(2, remaining=540), 3: make_status(3)})
+    engine.tick()
+    remove()
+    engine.tick()
+
+    assert ticks == [2, 2]
+
+
+def test_round_remaining() -> None:
+    """Remaining time is rounded up to the step, keeping 0 and None."""
+    assert round_remaining(61, 60) == 120
+    assert round_remaining(60, 60) == 60
+    assert round_remaining(0, 60) == 0
+    assert round_remaining(None, 60) is None
+    assert round_remaining(61, 0) == 61
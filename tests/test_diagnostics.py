@@ -0,0 +1,47 @@
+"""Tests for the diagnostics of the integration."""
+from __future__ import annotations
+
+from typing import Any
+
+import pytest
+from homeassistant.components.diagnostics import REDACTED
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.allow2.const import CONF_ACCOUNT_POLLING, CONF_KEEP_RAW_RESPONSE
+from custom_components.allow2.diagnostics import async_get_config_entry_diagnostics
+
+from .common import CHECK_URL, ENTRY_ID, make_activity, make_check_response, make_entry
+
+
+@pytest.mark.parametrize("account_polling", [True, False])
+async def test_raw_response_is_redacted(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, account_polling: bool
+) -> None:
+    """Child names and account IDs of kept raw responses are redacted."""
+    response: dict[str, Any] = make_check_response({1: {1: make_activity(1)}})
+    response["activities"] = response["children"]["1"]["activities"]
+    response["user"] = {"userId": 100, "pairId": 200, "name": "Parent"}
+    aioclient_mock.post(CHECK_URL, json=response)
+    entry = make_entry(
+        options={
+            CONF_KEEP_RAW_RESPONSE: True,
+            CONF_ACCOUNT_POLLING: account_polling,
+        }
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(ENTRY_ID)
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    raw = diagnostics["raw_response"]
+    if not account_polling:
+        raw = raw[1]
+    assert raw["children"]["1"]["name"] == REDACTED
+    assert raw["user"] == {"userId": REDACTED, "pairId": REDACTED, "name": REDACTED}
+    assert raw["children"]["1"]["activities"]["1"]["remaining"] == 3600
+    assert diagnostics["entry"]["data"]["children"] == [{"id": 1, "name": REDACTED}]
+    assert diagnostics["entry"]["data"]["pair_token"] == REDACTED
+    assert "Child 1" not in str(diagnostics)
+    assert await hass.config_entries.async_unload(ENTRY_ID)
@@ -0,0 +1,109 @@
+"""Tests for the detection of activity transitions."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.common import async_capture_events
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.allow2.const import (
+    ACTIVITIES,
+    CONF_QUOTA_LOW_THRESHOLD,
+    DOMAIN,
+    EVENT_ACTIVITY_ALLOWED,
+    EVENT_ACTIVITY_BANNED,
+    EVENT_ACTIVITY_BLOCKED,
+    EVENT_QUOTA_LOW,
+    EVENT_TIME_BLOCK_ENTERED,
+)
+from custom_components.allow2.events import TransitionDetector
+
+from .common import (
+    CHECK_URL,
+    ENTRY_ID,
+    make_activity,
+    make_check_response,
+    make_entry,
+    make_status,
+)
+
+
+class _Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_first_observation_is_not_reported() -> None:
+    """The first status of an activity only records its state."""
+    detector = TransitionDetector()
+
+    assert detector.observe(1, {1: make_status(1, allowed=False, remaining=0)}) == []
+
+
+def test_each_kind_is_reported_once() -> None:
+    """A change is reported once per kind, not on every poll."""
+    detector = TransitionDetector(quota_threshold=600)
+    detector.observe(1, {1: make_status(1, remaining=900)})
+
+    status = make_status(
+        1, allowed=False, banned=True, time_block_allowed=False, remaining=300
+    )
+    transitions = detector.observe(1, {1: status})
+
+    assert sorted(transition.event_type for transition in transitions) == sorted(
+        [EVENT_ACTIVITY_BLOCKED, EVENT_ACTIVITY_BANNED, EVENT_TIME_BLOCK_ENTERED, EVENT_QUOTA_LOW]
+    )
+    assert detector.observe(1, {1: status}) == []
+    assert detector.stats["reported"][EVENT_QUOTA_LOW] == 1
+
+
+def test_changes_are_debounced() -> None:
+    """A change within the window is held back, and dropped if it reverts."""
+    clock = _Clock()
+    detector = TransitionDetector(debounce=30, clock=clock)
+    detector.observe(1, {1: make_status(1)})
+    [blocked] = detector.observe(1, {1: make_status(1, allowed=False, remaining=0)})
+    assert blocked.event_type == EVENT_ACTIVITY_BLOCKED
+
+    clock.now += 10
+    assert detector.observe(1, {1: make_status(1)}) == []
+    assert detector.next_flush(1) == 20
+    clock.now += 20
+    [allowed] = detector.flush(1)
+    assert allowed.event_type == EVENT_ACTIVITY_ALLOWED
+
+    # Blocked and allowed again within the window
+    clock.now += 10
+    detector.observe(1, {1: make_status(1, allowed=False, remaining=0)})
+    detector.observe(1, {1: make_status(1)})
+    clock.now += 30
+    assert detector.flush(1) == []
+    assert detector.stats["suppressed"] == 1
+
+
+async def test_poll_fires_events(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A poll that sees a quota run out fires an event with the child."""
+    activities = {activity_id: make_activity(activity_id) for activity_id in ACTIVITIES}
+    aioclient_mock.post(CHECK_URL, json=make_check_response({1: activities}))
+    entry = make_entry(options={CONF_QUOTA_LOW_THRESHOLD: 0})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    events = async_capture_events(hass, EVENT_ACTIVITY_BLOCKED)
+
+    activities[1] = make_activity(1, allowed=False, remaining=0)
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(CHECK_URL, json=make_check_response({1: activities}))
+    await hass.data[DOMAIN][ENTRY_ID]["account_coordinator"].async_refresh()
+    await hass.async_block_till_done()
+
+    assert [event.data["activity_id"] for event in events] == [1]
+    assert events[0].data["child_id"] == 1
+    assert events[0].data["remaining_seconds"] == 0
+    assert await hass.config_entries.async_unload(ENTRY_ID)
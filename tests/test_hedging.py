@@ -0,0 +1,123 @@
+"""Tests for hedged requests."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+from benchmarks.standin import StandInServer
+from custom_components.allow2.api import Allow2API
+from custom_components.allow2.hedging import MIN_HEDGE_DELAY, MIN_SAMPLES, HedgePolicy
+
+from .common import CHECK_URL
+
+CHILD = 1000
+
+
+class _DelayedStandIn:
+    """Answer checks from a stand-in server, delaying some responses."""
+
+    def __init__(self, aioclient_mock: AiohttpClientMocker, delays: list[float]) -> None:
+        """Delay the n-th response by ``delays[n]`` seconds."""
+        self.server = StandInServer(children=1)
+        self.delays = delays
+        self.requests = 0
+        self.cancelled: list[int] = []
+        aioclient_mock.post(CHECK_URL, side_effect=self._respond)
+
+    async def _respond(
+        self, method: str, url: str, data: dict[str, Any]
+    ) -> AiohttpClientMockResponse:
+        request = self.requests
+        self.requests += 1
+        try:
+            await asyncio.sleep(self.delays[request])
+        except asyncio.CancelledError:
+            self.cancelled.append(request)
+            raise
+        return AiohttpClientMockResponse(
+            method, url, json=self.server.check_response(data)
+        )
+
+
+def _trained_policy(latency: float = 0.01) -> HedgePolicy:
+    """Return a policy that has seen enough fast requests to hedge."""
+    policy = HedgePolicy(95)
+    for _ in range(MIN_SAMPLES):
+        policy.record_latency(latency)
+    return policy
+
+
+async def _async_check(api: Allow2API, log: bool = False) -> Any:
+    """Check the first activity of the stand-in child."""
+    return await api.check(1, 2, "token", CHILD, [1], "UTC", log=log)
+
+
+def test_delay_is_a_percentile_of_the_latencies() -> None:
+    """Requests are hedged after the percentile, once enough latencies were seen."""
+    policy = HedgePolicy(95)
+    for latency in range(1, MIN_SAMPLES):
+        policy.record_latency(latency / 10)
+    assert policy.delay() is None
+
+    policy.record_latency(2.0)
+    assert policy.delay() == 1.9
+    assert _trained_policy().delay() == MIN_HEDGE_DELAY
+
+
+async def test_slow_request_is_hedged(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A copy of a slow check answers first and the original is cancelled."""
+    standin = _DelayedStandIn(aioclient_mock, [10.0, 0.0])
+    policy = _trained_policy()
+    api = Allow2API(async_get_clientsession(hass), hedge_policy=policy)
+
+    result = await asyncio.wait_for(_async_check(api), 2)
+    await asyncio.sleep(0)
+
+    assert result.activities[1].remaining_seconds == 3600
+    assert standin.requests == 2
+    assert standin.cancelled == [0]
+    stats = policy.stats
+    assert stats["hedged"] == 1
+    assert stats["hedge_wins"] == 1
+    # The cancelled request is sampled as at least as slow as the hedge delay
+    assert stats["samples"] == MIN_SAMPLES + 2
+    assert api.stats["requests"] == 2
+
+
+async def test_fast_request_is_not_hedged(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A check answering within the hedge delay is sent once."""
+    standin = _DelayedStandIn(aioclient_mock, [0.0])
+    policy = _trained_policy()
+    api = Allow2API(async_get_clientsession(hass), hedge_policy=policy)
+
+    await _async_check(api)
+
+    assert standin.requests == 1
+    assert policy.stats["hedged"] == 0
+
+
+async def test_logged_check_is_not_hedged(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A slow logged check is waited for, so usage is never recorded twice."""
+    standin = _DelayedStandIn(aioclient_mock, [0.3])
+    policy = _trained_policy()
+    api = Allow2API(async_get_clientsession(hass), hedge_policy=policy)
+
+    result = await _async_check(api, log=True)
+
+    assert result.activities[1].remaining_seconds == 3600
+    assert standin.requests == 1
+    assert standin.cancelled == []
+    assert policy.stats["requests"] == 0
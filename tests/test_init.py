@@ -0,0 +1,181 @@
+"""Tests for setting up and unloading config entries."""
+from __future__ import annotations
+
+import asyncio
+from dataclasses import asdict
+from datetime import timedelta
+from typing import Any
+from unittest.mock import patch
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+from custom_components.allow2.const import (
+    ACTIVITIES,
+    CONF_DEDICATED_SESSION,
+    CONF_MAX_STALENESS,
+    CONF_OFFLINE_ENFORCEMENT,
+    DOMAIN,
+)
+from custom_components.allow2.storage import STORAGE_VERSION
+
+from .common import (
+    CHECK_URL,
+    ENTRY_ID,
+    make_activity,
+    make_check_response,
+    make_entry,
+    make_status,
+)
+
+ALLOWED = "binary_sensor.child_1_internet_allowed"
+
+
+async def test_failed_setup_closes_session(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """The dedicated session is closed when the setup is retried."""
+    aioclient_mock.post(CHECK_URL, json=make_check_response({1: {1: make_activity(1)}}))
+    session = aioclient_mock.create_session(hass.loop)
+    entry = make_entry(options={CONF_DEDICATED_SESSION: True})
+    entry.add_to_hass(hass)
+
+    with patch(
+        "custom_components.allow2.create_session", return_value=session
+    ), patch.object(
+        hass.config_entries,
+        "async_forward_entry_setups",
+        side_effect=ConfigEntryNotReady,
+    ):
+        assert not await hass.config_entries.async_setup(ENTRY_ID)
+        await hass.async_block_till_done()
+
+    assert entry.state is ConfigEntryState.SETUP_RETRY
+    assert session.closed
+
+
+async def test_unload_closes_session(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """The dedicated session is closed when the entry is unloaded."""
+    aioclient_mock.post(CHECK_URL, json=make_check_response({1: {1: make_activity(1)}}))
+    session = aioclient_mock.create_session(hass.loop)
+    entry = make_entry(options={CONF_DEDICATED_SESSION: True})
+    entry.add_to_hass(hass)
+
+    with patch("custom_components.allow2.create_session", return_value=session):
+        assert await hass.config_entries.async_setup(ENTRY_ID)
+        await hass.async_block_till_done()
+    assert not session.closed
+
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+    await hass.async_block_till_done()
+    assert session.closed
+
+
+def _snapshot(age: timedelta) -> dict[str, Any]:
+    """Return the stored snapshot of child 1, fetched ``age`` ago."""
+    return {
+        "version": STORAGE_VERSION,
+        "key": f"{DOMAIN}.{ENTRY_ID}",
+        "data": {
+            "children": {
+                "1": {
+                    "fetched": (dt_util.utcnow() - age).isoformat(),
+                    "allowed": True,
+                    "activities": [
+                        asdict(make_status(activity_id, remaining=1200))
+                        for activity_id in ACTIVITIES
+                    ],
+                }
+            }
+        },
+    }
+
+
+async def _async_setup_offline(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    answer: asyncio.Event | None = None,
+) -> None:
+    """Set up the entry while every check fails, retried without a delay.
+
+    With ``answer``, checks only fail once it is set.
+    """
+
+    async def respond(method: str, url: str, _data: object) -> AiohttpClientMockResponse:
+        if answer is not None:
+            await answer.wait()
+        return AiohttpClientMockResponse(
+            method, url, status=500, headers={"Retry-After": "0"}
+        )
+
+    aioclient_mock.post(CHECK_URL, side_effect=respond)
+    entry = make_entry(
+        options={CONF_OFFLINE_ENFORCEMENT: False, CONF_MAX_STALENESS: 3600}
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(ENTRY_ID)
+    await hass.async_block_till_done()
+
+
+async def test_setup_from_snapshot_while_api_fails(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    hass_storage: dict[str, Any],
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Restored data is shown until it is too old, the first check runs behind it."""
+    hass_storage[f"{DOMAIN}.{ENTRY_ID}"] = _snapshot(timedelta(minutes=10))
+
+    answer = asyncio.Event()
+
+    # Setup does not wait for the first check
+    await _async_setup_offline(hass, aioclient_mock, answer)
+
+    setup_stats = hass.data[DOMAIN][ENTRY_ID]["setup_stats"]
+    assert setup_stats["restored"] == [1]
+    assert "failed" not in setup_stats
+    assert hass.states.get(ALLOWED).state == "on"
+    assert hass.states.get("sensor.child_1_internet_remaining").state == "1200"
+
+    answer.set()
+    await asyncio.wait(hass.config_entries.async_get_entry(ENTRY_ID)._background_tasks)
+    assert setup_stats["failed"] == [1]
+    assert hass.states.get(ALLOWED).state == "on"
+
+    freezer.tick(timedelta(minutes=49))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(ALLOWED).state == "on"
+
+    freezer.tick(timedelta(minutes=2))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    assert hass.states.get(ALLOWED).state == "unavailable"
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_snapshot_older_than_max_staleness_is_not_restored(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    hass_storage: dict[str, Any],
+) -> None:
+    """A snapshot too old to show is ignored and setup waits for the check."""
+    hass_storage[f"{DOMAIN}.{ENTRY_ID}"] = _snapshot(timedelta(hours=2))
+
+    await _async_setup_offline(hass, aioclient_mock)
+
+    setup_stats = hass.data[DOMAIN][ENTRY_ID]["setup_stats"]
+    assert setup_stats["restored"] == []
+    assert setup_stats["failed"] == [1]
+    assert hass.states.get(ALLOWED).state == "unavailable"
+    assert await hass.config_entries.async_unload(ENTRY_ID)
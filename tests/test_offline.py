@@ -0,0 +1,162 @@
+"""Tests for local evaluation of cached status during outages."""
+from __future__ import annotations
+
+from custom_components.allow2.api import Allow2API
+from custom_components.allow2.offline import OfflineEngine
+
+from .common import make_status
+
+
+class _Clock:
+    """Manually advanced wall clock."""
+
+    def __init__(self) -> None:
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_time_block_flips_when_it_ends() -> None:
+    """An activity blocked until a known time is allowed once it passed."""
+    clock = _Clock()
+    engine = OfflineEngine(clock)
+    engine.update(
+        1,
+        {
+            2: make_status(
+                2, allowed=False, time_block_allowed=False, time_block_ends=clock.now + 600
+            )
+        },
+        valid_until=clock.now + 3600,
+    )
+
+    assert not engine.evaluate(1)[2].allowed
+    assert engine.next_transition(1) == 600
+
+    clock.now += 600
+    status = engine.evaluate(1)[2]
+    assert status.allowed
+    assert status.time_block_allowed
+    assert status.time_block_ends is None
+
+
+def test_quota_in_use_runs_out() -> None:
+    """An activity in use is blocked once its quota is counted down."""
+    clock = _Clock()
+    engine = OfflineEngine(clock)
+    engine.update(1, {2: make_status(2, remaining=120)}, valid_until=clock.now + 3600)
+    clock.now += 60
+    engine.update(1, {2: make_status(2, remaining=60)}, valid_until=clock.now + 3600)
+
+    assert engine.next_transition(1) == 60
+    clock.now += 60
+    status = engine.evaluate(1)[2]
+    assert not status.allowed
+    assert status.remaining_seconds == 0
+
+
+def test_banned_activity_stays_blocked() -> None:
+    """A ban is not lifted by a time block ending."""
+    clock = _Clock()
+    engine = OfflineEngine(clock)
+    engine.update(
+        1,
+        {
+            2: make_status(
+                2,
+                allowed=False,
+                banned=True,
+                time_block_allowed=False,
+                time_block_ends=clock.now + 60,
+            )
+        },
+        valid_until=clock.now + 3600,
+    )
+    clock.now += 60
+
+    assert not engine.evaluate(1)[2].allowed
+
+
+def test_cached_status_expires_at_end_of_day() -> None:
+    """Nothing is evaluated once the cached data no longer applies."""
+    clock = _Clock()
+    engine = OfflineEngine(clock)
+    engine.update(1, {2: make_status(2)}, valid_until=clock.now + 60)
+
+    assert engine.can_evaluate(1)
+    clock.now += 60
+    assert not engine.can_evaluate(1)
+    assert engine.evaluate(1) is None
+    assert engine.next_transition(1) is None
+    assert engine.evaluate(2) is None
+
+
+def test_reconnect_reports_mismatches() -> None:
+    """The next fetch after local evaluation reports where it disagreed."""
+    clock = _Clock()
+    engine = OfflineEngine(clock)
+    engine.update(
+        1,
+        {
+            2: make_status(
+                2, allowed=False, time_block_allowed=False, time_block_ends=clock.now + 60
+            ),
+            3: make_status(3),
+        },
+        valid_until=clock.now + 3600,
+    )
+    clock.now += 60
+    engine.evaluate(1)
+
+    # The parent extended the block of activity 2 in the meantime
+    mismatches = engine.update(
+        1,
+        {2: make_status(2, allowed=False, time_block_allowed=False), 3: make_status(3)},
+        valid_until=clock.now + 3600,
+    )
+
+    assert mismatches == [2]
+    assert engine.stats["mismatches"] == 1
+    assert engine.update(1, {3: make_status(3)}, valid_until=clock.now + 3600) == []
+
+
+def test_documented_response_stays_allowed() -> None:
+    """A response without time block fields keeps the verdict of the server."""
+    clock = _Clock()
+    engine = OfflineEngine(clock)
+    result = Allow2API(session=None)._parse_check_response(  # type: ignore[arg-type]
+        {
+            "allowed": True,
+            "activities": {
+                "1": {"id": 1, "name": "Internet", "allowed": True, "remaining": 3600},
+                "3": {"id": 3, "name": "Gaming", "allowed": False, "remaining": 0},
+            },
+        }
+    )
+    engine.update(1, result.activities, valid_until=clock.now + 3600)
+
+    clock.now += 60
+    activities = engine.evaluate(1)
+    assert activities[1].allowed
+    assert activities[1].time_block_allowed
+    assert not activities[3].allowed
+
+
+def test_verdict_is_kept_without_a_known_block_end() -> None:
+    """Only a known time block end overrides the cached verdict."""
+    clock = _Clock()
+    engine = OfflineEngine(clock)
+    engine.update(
+        1,
+        {
+            2: make_status(2, time_block_allowed=False, remaining=None),
+            3: make_status(3, allowed=False, time_block_allowed=False, remaining=None),
+        },
+        valid_until=clock.now + 3600,
+    )
+    clock.now += 600
+
+    activities = engine.evaluate(1)
+    assert activities[2].allowed
+    assert not activities[3].allowed
@@ -0,0 +1,117 @@
+"""Tests for the token bucket rate limiter."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from custom_components.allow2.ratelimit import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_USER,
+    RateLimitExceeded,
+    TokenBucketLimiter,
+)
+
+
+class _Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_burst_then_refill() -> None:
+    """The bucket allows a burst and then refills at the rate."""
+    clock = _Clock()
+    limiter = TokenBucketLimiter(rate=0.5, burst=2, clock=clock)
+
+    assert limiter.try_acquire()
+    assert limiter.try_acquire()
+    assert not limiter.try_acquire()
+
+    clock.now += 1
+    assert not limiter.try_acquire()
+    clock.now += 1
+    assert limiter.try_acquire()
+
+    clock.now += 3600
+    assert limiter.stats["tokens"] == 0
+    limiter.try_acquire()
+    assert limiter.stats["tokens"] == 1
+
+
+async def test_user_requests_are_served_first() -> None:
+    """Queued user requests get a token before queued background requests."""
+    limiter = TokenBucketLimiter(rate=100, burst=1)
+    await limiter.acquire()
+    order: list[str] = []
+
+    async def request(priority: int, name: str) -> None:
+        await limiter.acquire(priority)
+        order.append(name)
+
+    background = asyncio.create_task(request(PRIORITY_BACKGROUND, "background"))
+    await asyncio.sleep(0)
+    user = asyncio.create_task(request(PRIORITY_USER, "user"))
+    await asyncio.gather(background, user)
+
+    assert order == ["user", "background"]
+    assert limiter.stats["queued"] == 2
+
+
+async def test_full_queue_sheds_background_requests() -> None:
+    """A full queue sheds new background requests and makes room for users."""
+    limiter = TokenBucketLimiter(rate=100, burst=1, max_queue=2)
+    await limiter.acquire()
+    outcome: dict[str, str] = {}
+
+    async def request(priority: int, name: str) -> None:
+        try:
+            await limiter.acquire(priority)
+        except RateLimitExceeded:
+            outcome[name] = "shed"
+        else:
+            outcome[name] = "sent"
+
+    tasks = [
+        asyncio.create_task(request(PRIORITY_BACKGROUND, name))
+        for name in ("first", "second")
+    ]
+    await asyncio.sleep(0)
+    tasks.append(asyncio.create_task(request(PRIORITY_BACKGROUND, "third")))
+    tasks.append(asyncio.create_task(request(PRIORITY_USER, "user")))
+    await asyncio.gather(*tasks)
+
+    assert outcome == {"first": "sent", "second": "shed", "third": "shed", "user": "sent"}
+    assert limiter.stats["shed"] == 2
+    assert limiter.queue_depth == 0
+
+
+async def test_full_queue_of_user_requests_sheds_users() -> None:
+    """A user request is shed when only user requests are queued."""
+    limiter = TokenBucketLimiter(rate=100, burst=1, max_queue=1)
+    await limiter.acquire()
+    queued = asyncio.create_task(limiter.acquire(PRIORITY_USER))
+    await asyncio.sleep(0)
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(PRIORITY_USER)
+    await queued
+
+
+async def test_cancelled_request_gives_up_its_place() -> None:
+    """A request cancelled while queued does not take a token."""
+    limiter = TokenBucketLimiter(rate=100, burst=1)
+    await limiter.acquire()
+    cancelled = asyncio.create_task(limiter.acquire())
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    await waiting
+
+    assert limiter.stats["acquired"] == 2
+    assert limiter.queue_depth == 0
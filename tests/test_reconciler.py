@@ -0,0 +1,164 @@
+"""Tests for reconciling the children of an entry with the account."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+from custom_components.allow2.const import (
+    ACTIVITIES,
+    CONF_ACCOUNT_POLLING,
+    CONF_CHILDREN,
+    DOMAIN,
+)
+
+from .common import CHECK_URL, ENTRY_ID, make_activity, make_check_response, make_entry
+
+
+def _response(children: dict[int, str]) -> dict[str, Any]:
+    """Return a check response of the account's children by name."""
+    response = make_check_response(
+        {
+            child_id: {activity_id: make_activity(activity_id) for activity_id in ACTIVITIES}
+            for child_id in children
+        }
+    )
+    for child_id, name in children.items():
+        response["children"][str(child_id)]["name"] = name
+    return response
+
+
+async def _async_setup(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, **options: Any
+) -> None:
+    """Set up an entry paired with child 1."""
+    aioclient_mock.post(CHECK_URL, json=_response({1: "Child 1"}))
+    entry = make_entry(children=(1,), options=options)
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+def _respond(aioclient_mock: AiohttpClientMocker, children: dict[int, str]) -> None:
+    """Answer further checks with the given children."""
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(CHECK_URL, json=_response(children))
+
+
+async def test_account_mode_reconciles_from_polls(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """In account mode the children of the last poll are used, no request."""
+    await _async_setup(hass, aioclient_mock)
+    data = hass.data[DOMAIN][ENTRY_ID]
+    reconciler = data["reconciler"]
+
+    _respond(aioclient_mock, {1: "Renamed", 2: "Child 2"})
+    await reconciler.async_reconcile()
+    assert aioclient_mock.call_count == 0
+    assert reconciler.stats["added"] == 0
+
+    await data["account_coordinator"].async_refresh()
+    await reconciler.async_reconcile()
+    await hass.async_block_till_done()
+
+    entry = hass.config_entries.async_get_entry(ENTRY_ID)
+    assert [child["id"] for child in entry.data[CONF_CHILDREN]] == [1, 2]
+    assert set(data["coordinators"]) == {1, 2}
+    device = dr.async_get(hass).async_get_device(identifiers={(DOMAIN, f"{ENTRY_ID}_1")})
+    assert device.name == "Renamed"
+    assert reconciler.stats["added"] == 1
+    assert reconciler.stats["renamed"] == 1
+
+    # The poll and the refresh of the added child
+    calls = aioclient_mock.call_count
+    await reconciler.async_reconcile()
+    assert aioclient_mock.call_count == calls
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_account_mode_removes_children(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A child missing from the account is removed with its device."""
+    aioclient_mock.post(CHECK_URL, json=_response({1: "Child 1", 2: "Child 2"}))
+    entry = make_entry(children=(1, 2))
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN][ENTRY_ID]
+
+    _respond(aioclient_mock, {2: "Child 2"})
+    await data["account_coordinator"].async_refresh()
+    await data["reconciler"].async_reconcile()
+    await hass.async_block_till_done()
+
+    assert set(data["coordinators"]) == {2}
+    assert (
+        dr.async_get(hass).async_get_device(identifiers={(DOMAIN, f"{ENTRY_ID}_1")})
+        is None
+    )
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_account_mode_removes_children_whose_check_fails(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A child missing from the account whose own check fails is removed."""
+    aioclient_mock.post(CHECK_URL, json=_response({1: "Child 1", 2: "Child 2"}))
+    entry = make_entry(children=(1, 2))
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    data = hass.data[DOMAIN][ENTRY_ID]
+    account = data["account_coordinator"]
+
+    async def respond(
+        method: str, url: str, form: dict[str, Any]
+    ) -> AiohttpClientMockResponse:
+        if "childId" in form:
+            return AiohttpClientMockResponse(method, url, json={"error": "child_not_found"})
+        return AiohttpClientMockResponse(method, url, json=_response({1: "Child 1"}))
+
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(CHECK_URL, side_effect=respond)
+    await account.async_refresh()
+    assert account.absent == {2}
+    assert not data["coordinators"][2].last_update_success
+    # The child is not checked on its own again
+    await account.async_refresh()
+    assert ["childId" in call[2] for call in aioclient_mock.mock_calls] == [
+        False,
+        True,
+        False,
+    ]
+
+    await data["reconciler"].async_reconcile()
+    await hass.async_block_till_done()
+
+    assert set(data["coordinators"]) == {1}
+    assert account.absent == set()
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_per_child_mode_asks_the_api(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Without account polling the children are fetched from the API."""
+    await _async_setup(hass, aioclient_mock, **{CONF_ACCOUNT_POLLING: False})
+    data = hass.data[DOMAIN][ENTRY_ID]
+
+    _respond(aioclient_mock, {1: "Child 1", 2: "Child 2"})
+    await data["reconciler"].async_reconcile()
+    await hass.async_block_till_done()
+
+    assert set(data["coordinators"]) == {1, 2}
+    # The children, then the first check of the added child
+    assert aioclient_mock.call_count == 2
+    assert "childId" not in aioclient_mock.mock_calls[0][2]
+    assert await hass.config_entries.async_unload(ENTRY_ID)
@@ -0,0 +1,178 @@
+"""Tests for the retry policy and circuit breaker."""
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+from aiohttp import ClientError
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+from custom_components.allow2.api import (
+    Allow2API,
+    Allow2CircuitOpenError,
+    Allow2ConnectionError,
+)
+from custom_components.allow2.resilience import (
+    STATE_CLOSED,
+    STATE_HALF_OPEN,
+    STATE_OPEN,
+    CircuitBreaker,
+    RetryPolicy,
+    parse_retry_after,
+)
+
+from .common import CHECK_URL, make_activity, make_check_response
+
+
+class _Clock:
+    """Manually advanced monotonic clock."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_retry_delay_is_bounded() -> None:
+    """Delays grow exponentially up to the cap and stop after the last attempt."""
+    policy = RetryPolicy(max_attempts=4, base_delay=1.0, max_delay=3.0)
+
+    for _ in range(100):
+        assert 0 <= policy.delay(1) <= 1.0
+        assert 0 <= policy.delay(2) <= 2.0
+        assert 0 <= policy.delay(3) <= 3.0
+    assert policy.delay(4) is None
+
+
+def test_retry_honours_retry_after() -> None:
+    """A Retry-After within the cap is used as is, a longer one stops retrying."""
+    policy = RetryPolicy(max_attempts=3, max_delay=30.0)
+
+    assert policy.delay(1, retry_after=12.0) == 12.0
+    assert policy.delay(1, retry_after=31.0) is None
+    assert policy.delay(3, retry_after=1.0) is None
+
+
+def test_parse_retry_after() -> None:
+    """Retry-After is parsed from seconds and from HTTP dates."""
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("-5") == 0.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_circuit_opens_after_consecutive_failures() -> None:
+    """The circuit opens at the threshold and fails fast until the timeout."""
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60, clock=clock)
+
+    breaker.record_failure()
+    breaker.record_success()
+    for _ in range(2):
+        breaker.record_failure()
+    assert breaker.state == STATE_CLOSED
+
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+    assert not breaker.allow_request()
+    assert breaker.retry_in == 60
+
+    clock.now += 60
+    assert breaker.state == STATE_HALF_OPEN
+
+
+def test_half_open_lets_one_probe_through() -> None:
+    """Only one probe is sent while half open; its outcome decides the state."""
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+    breaker.record_failure()
+    clock.now += 60
+
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+    breaker.record_failure()
+    assert breaker.state == STATE_OPEN
+
+    clock.now += 60
+    assert breaker.allow_request()
+    breaker.record_success()
+    assert breaker.state == STATE_CLOSED
+    assert breaker.stats["times_opened"] == 2
+
+
+def test_circuit_stays_open_for_retry_after() -> None:
+    """A longer Retry-After keeps the circuit open past the reset timeout."""
+    clock = _Clock()
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=60, clock=clock)
+
+    breaker.record_failure(retry_after=300)
+    clock.now += 60
+
+    assert breaker.state == STATE_OPEN
+    assert breaker.retry_in == 240
+
+
+async def test_transient_errors_are_retried(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Unlogged checks are retried after HTTP 503 until one succeeds."""
+    attempts = 0
+
+    async def respond(method: str, url: str, _data: object) -> AiohttpClientMockResponse:
+        nonlocal attempts
+        attempts += 1
+        if attempts < 3:
+            return AiohttpClientMockResponse(
+                method, url, status=503, headers={"Retry-After": "0"}
+            )
+        return AiohttpClientMockResponse(
+            method, url, json=make_check_response({1: {1: make_activity(1)}})
+        )
+
+    aioclient_mock.post(CHECK_URL, side_effect=respond)
+    api = Allow2API(async_get_clientsession(hass))
+
+    result = await api.check(100, 200, "pair-token", None, [1], log=False)
+
+    assert result.children[1].activities[1].remaining_seconds == 3600
+    assert api.stats["retries"] == 2
+
+
+async def test_logged_checks_are_not_retried(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A logged check fails on the first transient error."""
+    aioclient_mock.post(CHECK_URL, status=503)
+    api = Allow2API(async_get_clientsession(hass))
+
+    with pytest.raises(Allow2ConnectionError):
+        await api.check(100, 200, "pair-token", None, [1], log=True)
+
+    assert aioclient_mock.call_count == 1
+
+
+async def test_open_circuit_fails_fast(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Once the circuit is open requests fail without reaching the API."""
+    aioclient_mock.post(CHECK_URL, exc=ClientError("unreachable"))
+    api = Allow2API(
+        async_get_clientsession(hass),
+        retry_policy=RetryPolicy(max_attempts=2),
+        circuit_breakers={"api.allow2.com": CircuitBreaker(failure_threshold=3)},
+    )
+
+    with patch("custom_components.allow2.api.asyncio.sleep"):
+        with pytest.raises(Allow2ConnectionError):
+            await api.check(100, 200, "pair-token", None, [1], log=False)
+        with pytest.raises(Allow2CircuitOpenError):
+            await api.check(100, 200, "pair-token", None, [1], log=False)
+
+    assert aioclient_mock.call_count == 3
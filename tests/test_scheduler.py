@@ -0,0 +1,384 @@
+"""Tests for poll intervals and transition wakeups."""
+from __future__ import annotations
+
+from datetime import timedelta
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt as dt_util
+from pytest_homeassistant_custom_component.common import async_fire_time_changed
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from benchmarks.standin import StandInServer
+from custom_components.allow2.const import (
+    CONF_ACCOUNT_POLLING,
+    CONF_CHILD_ACTIVITIES,
+    CONF_QUOTA_LOW_THRESHOLD,
+    DATA_POLL_SCHEDULER,
+    DOMAIN,
+)
+from custom_components.allow2.coordinator import TransitionWakeup
+from custom_components.allow2.countdown import CountdownEngine
+from custom_components.allow2.scheduler import (
+    EXPIRY_GUARD,
+    PollScheduler,
+    next_poll_interval,
+    next_transition,
+)
+
+from .common import (
+    ENTRY_ID,
+    frozen_clock,
+    make_entry,
+    make_status,
+    mock_standin,
+    use_frozen_clocks,
+)
+
+DEFAULT = timedelta(minutes=5)
+MIN = timedelta(seconds=30)
+MAX = timedelta(hours=1)
+CHILD_ID = 1000
+
+
+@pytest.fixture(autouse=True)
+def _start_time(freezer: FrozenDateTimeFactory) -> None:
+    """Start at a fixed time, as poll slots are on a grid anchored to the clock."""
+    freezer.move_to("2026-01-05 12:00:00+00:00")
+
+
+def test_idle_quota_predicts_nothing() -> None:
+    """The quota of an idle activity does not run out on its own."""
+    now = dt_util.utcnow()
+
+    assert next_transition([make_status(1, remaining=5)], now) is None
+
+
+def test_quota_in_use_runs_out() -> None:
+    """The quota of an activity in use runs out after its remaining time."""
+    now = dt_util.utcnow()
+
+    assert next_transition([make_status(1, remaining=120)], now, in_use={1}) == (
+        now + timedelta(seconds=120) + EXPIRY_GUARD
+    )
+    for status in (
+        make_status(1, remaining=0),
+        make_status(1, remaining=None),
+        make_status(1, allowed=False, remaining=120),
+        make_status(1, banned=True, remaining=120),
+    ):
+        assert next_transition([status], now, in_use={1}) is None
+
+
+def test_quota_low_is_predicted_in_use() -> None:
+    """Only a quota in use is predicted to drop below the low threshold."""
+    now = dt_util.utcnow()
+    status = make_status(1, remaining=601)
+
+    assert next_transition([status], now, quota_threshold=600) is None
+    assert next_transition([status], now, quota_threshold=600, in_use={1}) == (
+        now + timedelta(seconds=1) + EXPIRY_GUARD
+    )
+    assert next_transition(
+        [make_status(1, remaining=500)], now, quota_threshold=600, in_use={1}
+    ) == now + timedelta(seconds=500) + EXPIRY_GUARD
+
+
+def test_time_block_end_is_predicted() -> None:
+    """A known time block end is a transition, the earliest one wins."""
+    now = dt_util.utcnow()
+    ends = now + timedelta(minutes=10)
+    activities = [
+        make_status(1, remaining=None, time_block_ends=ends.timestamp()),
+        make_status(2, remaining=900),
+    ]
+
+    assert next_transition(activities, now, in_use={2}) == ends + EXPIRY_GUARD
+    assert next_transition(
+        [make_status(1, time_block_ends=(now - timedelta(minutes=1)).timestamp())], now
+    ) is None
+
+
+def test_unknown_time_block_end_polls_at_default() -> None:
+    """A time block may start or end at any time when its end is unknown."""
+    for status in (
+        make_status(1, remaining=None),
+        make_status(1, allowed=False, time_block_allowed=False, remaining=None),
+        make_status(1, remaining=600),
+    ):
+        assert next_poll_interval([status], DEFAULT, MIN, MAX, in_use={1}) == DEFAULT
+
+
+def test_idle_quota_polls_at_default() -> None:
+    """An idle quota may start being used, so it is polled at the default."""
+    ends = (dt_util.utcnow() + timedelta(hours=2)).timestamp()
+    status = make_status(1, remaining=600, time_block_ends=ends)
+
+    assert next_poll_interval([status], DEFAULT, MIN, MAX) == DEFAULT
+    assert next_poll_interval([status], DEFAULT, MIN, MAX, in_use={1}) == MAX
+
+
+def test_nothing_unpredicted_polls_at_max() -> None:
+    """Banned and used up activities only change on the server."""
+    activities = [
+        make_status(1, allowed=False, banned=True, remaining=None),
+        make_status(2, allowed=False, remaining=0),
+    ]
+
+    assert next_poll_interval(activities, DEFAULT, MIN, MAX) == MAX
+    assert next_poll_interval([], DEFAULT, MIN, MAX) == MAX
+
+
+def test_poll_interval_is_clamped() -> None:
+    """The interval stays within the configured bounds."""
+    status = make_status(1, remaining=None)
+
+    assert next_poll_interval([status], timedelta(seconds=5), MIN, MAX) == MIN
+    assert next_poll_interval([status], DEFAULT, MIN, timedelta(minutes=2)) == (
+        timedelta(minutes=2)
+    )
+
+
+def test_slots_follow_van_der_corput() -> None:
+    """Phases stay evenly spread as pollers come, and freed slots are reused."""
+    scheduler = PollScheduler()
+
+    assert [scheduler.phase(key) for key in "abcde"] == [0, 0.5, 0.25, 0.75, 0.125]
+    scheduler.release("b")
+    scheduler.release("unknown")
+    assert scheduler.stats["slots"] == 4
+    assert scheduler.phase("f") == 0.5
+    assert scheduler.phase("g") == 0.625
+
+
+def test_polls_land_in_their_slot() -> None:
+    """Polls are on a grid of the interval at their phase, never right away."""
+    clock = MagicMock(return_value=10_000.0)
+    scheduler = PollScheduler(jitter=0, clock=clock)
+    scheduler.phase("a")
+
+    for now in (10_000.0, 10_250.0, 10_301.0, 10_599.0):
+        clock.return_value = now
+        delay = scheduler.delay("b", DEFAULT).total_seconds()
+        # Slot "b" is half an interval into the grid
+        assert (now + delay) % 300 == pytest.approx(150)
+        assert 150 <= delay <= 450
+
+
+async def test_entries_share_poll_slots(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Children of all entries get their own slot, freed when an entry unloads."""
+    use_frozen_clocks(hass)
+    mock_standin(aioclient_mock, StandInServer(children=2, clock=frozen_clock))
+    scheduler: PollScheduler = hass.data[DOMAIN][DATA_POLL_SCHEDULER]
+    entries = [
+        make_entry(
+            children=(1000, 1001),
+            options={CONF_ACCOUNT_POLLING: False},
+            entry_id=f"entry_{pair_id}",
+            pair_id=pair_id,
+        )
+        for pair_id in (200, 201, 202)
+    ]
+    for entry in entries[:2]:
+        entry.add_to_hass(hass)
+        assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    def phases(entry_id: str) -> set[float]:
+        return {
+            scheduler.phase(coordinator.poll_key)
+            for coordinator in hass.data[DOMAIN][entry_id]["coordinators"].values()
+        }
+
+    assert scheduler.stats["slots"] == 4
+    assert phases("entry_200") | phases("entry_201") == {0, 0.25, 0.5, 0.75}
+    freed = phases("entry_200")
+
+    assert await hass.config_entries.async_unload("entry_200")
+    assert scheduler.stats["slots"] == 2
+
+    entries[2].add_to_hass(hass)
+    assert await hass.config_entries.async_setup("entry_202")
+    await hass.async_block_till_done()
+    assert phases("entry_202") == freed
+    assert scheduler.stats["slots"] == 4
+    for entry_id in ("entry_201", "entry_202"):
+        assert await hass.config_entries.async_unload(entry_id)
+    assert scheduler.stats["slots"] == 0
+
+
+async def test_wakeup_needs_an_activity_in_use(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+) -> None:
+    """Only a quota the countdown sees in use schedules a wakeup."""
+    countdown = CountdownEngine(frozen_clock)
+    wakeup = TransitionWakeup(MagicMock(hass=hass), MIN, countdown)
+
+    countdown.reconcile(CHILD_ID, {1: make_status(1, remaining=300)})
+    wakeup.async_schedule({CHILD_ID: [make_status(1, remaining=300)]})
+    assert wakeup.scheduled is None
+
+    freezer.tick(60)
+    countdown.reconcile(CHILD_ID, {1: make_status(1, remaining=240)})
+    wakeup.async_schedule({CHILD_ID: [make_status(1, remaining=240)]})
+    assert wakeup.scheduled == dt_util.utcnow() + timedelta(seconds=240) + EXPIRY_GUARD
+    wakeup.async_cancel()
+
+
+async def test_wakeup_is_not_sooner_than_min_interval(hass: HomeAssistant) -> None:
+    """A transition due right away is re-checked after the minimum interval."""
+    wakeup = TransitionWakeup(MagicMock(hass=hass), MIN)
+    now = dt_util.utcnow()
+    ends = (now + timedelta(seconds=3)).timestamp()
+
+    wakeup.async_schedule({CHILD_ID: [make_status(1, time_block_ends=ends)]})
+
+    assert wakeup.scheduled is not None
+    assert wakeup.scheduled - now >= MIN
+    wakeup.async_cancel()
+
+
+async def _async_run(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory, seconds: int
+) -> None:
+    """Let simulated time pass, firing every timer on the way."""
+    for _ in range(seconds):
+        freezer.tick(1)
+        async_fire_time_changed(hass)
+        await hass.async_block_till_done()
+
+
+async def _async_setup(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    server: StandInServer,
+    **options: Any,
+) -> None:
+    """Set up an entry whose only child is checked for activity 1."""
+    use_frozen_clocks(hass)
+    mock_standin(aioclient_mock, server)
+    entry = make_entry(
+        children=(CHILD_ID,),
+        options={CONF_CHILD_ACTIVITIES: {str(CHILD_ID): [1]}, **options},
+    )
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def test_idle_quota_about_to_run_out_is_not_rechecked(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """An idle activity with seconds left is only polled regularly."""
+    server = StandInServer(
+        children=1, activities=1, remaining=5, clock=frozen_clock
+    )
+    await _async_setup(hass, aioclient_mock, server)
+
+    await _async_run(hass, freezer, 1800)
+
+    # The setup check, then one poll every 5 minutes
+    assert aioclient_mock.call_count <= 7
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_idle_quota_above_threshold_is_not_rechecked(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """An idle quota just above the low threshold is only polled regularly."""
+    server = StandInServer(
+        children=1, activities=1, remaining=601, clock=frozen_clock
+    )
+    await _async_setup(hass, aioclient_mock, server, **{CONF_QUOTA_LOW_THRESHOLD: 600})
+
+    await _async_run(hass, freezer, 1800)
+
+    assert aioclient_mock.call_count <= 7
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_quota_in_use_is_rechecked_when_it_gets_low(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """A quota in use is re-checked when it drops below the low threshold."""
+    server = StandInServer(
+        children=1, activities=1, remaining=1200, clock=frozen_clock
+    )
+    server.set_activity(CHILD_ID, 1, in_use=True)
+    await _async_setup(hass, aioclient_mock, server, **{CONF_QUOTA_LOW_THRESHOLD: 600})
+    account = hass.data[DOMAIN][ENTRY_ID]["account_coordinator"]
+    child = hass.data[DOMAIN][ENTRY_ID]["coordinators"][CHILD_ID]
+
+    await _async_run(hass, freezer, 480)
+    assert child.countdown.in_use(CHILD_ID, 1)
+    assert account.wakeup.scheduled is not None
+    due = int((account.wakeup.scheduled - dt_util.utcnow()).total_seconds())
+
+    # A regular poll just before it moves the wakeup to the minimum interval
+    await _async_run(hass, freezer, due + int(MIN.total_seconds()) + 1)
+    assert account.wakeup.fired == 1
+    assert 560 <= child.data["activities"][1].remaining_seconds < 600
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_quota_in_use_is_rechecked_when_it_runs_out(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Once an activity is seen in use, the end of its quota is re-checked."""
+    server = StandInServer(
+        children=1, activities=1, remaining=1200, clock=frozen_clock
+    )
+    server.set_activity(CHILD_ID, 1, in_use=True)
+    await _async_setup(hass, aioclient_mock, server, **{CONF_QUOTA_LOW_THRESHOLD: 0})
+    account = hass.data[DOMAIN][ENTRY_ID]["account_coordinator"]
+    child = hass.data[DOMAIN][ENTRY_ID]["coordinators"][CHILD_ID]
+
+    # The first regular poll, in the poll slot of the child, sees the
+    # quota counting down
+    await _async_run(hass, freezer, 480)
+    assert child.countdown.in_use(CHILD_ID, 1)
+    assert account.wakeup.scheduled is not None
+    due = int((account.wakeup.scheduled - dt_util.utcnow()).total_seconds())
+
+    await _async_run(hass, freezer, due - 1)
+    assert child.data["activities"][1].allowed
+    # A regular poll just before it moves the wakeup to the minimum interval
+    await _async_run(hass, freezer, int(MIN.total_seconds()) + 2)
+    assert not child.data["activities"][1].allowed
+    assert account.wakeup.fired == 1
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_time_block_of_unknown_end_is_noticed(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """A time block starting while the quota is unused is seen within a poll."""
+    server = StandInServer(
+        children=1, activities=1, remaining=None, clock=frozen_clock
+    )
+    await _async_setup(hass, aioclient_mock, server)
+    coordinator = hass.data[DOMAIN][ENTRY_ID]["account_coordinator"]
+    assert coordinator.poll_interval == DEFAULT
+
+    server.set_activity(CHILD_ID, 1, time_block_allowed=False)
+    # The first poll slot is at most one and a half intervals away
+    await _async_run(hass, freezer, 480)
+
+    child = hass.data[DOMAIN][ENTRY_ID]["coordinators"][CHILD_ID]
+    assert not child.data["activities"][1].allowed
+    assert await hass.config_entries.async_unload(ENTRY_ID)
@@ -0,0 +1,218 @@
+"""Tests for the services of the integration."""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from typing import Any
+
+import pytest
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ServiceValidationError
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.allow2.const import (
+    ACTIVITIES,
+    CONF_ACCOUNT_POLLING,
+    CONF_ACTIVITY_REFRESH_INTERVAL,
+    CONF_CHECK_CACHE_TTL,
+    CONF_CHILD_ACTIVITIES,
+    DOMAIN,
+)
+from custom_components.allow2.services import SERVICE_CHECK
+
+from .common import (
+    CHECK_URL,
+    ENTRY_ID,
+    frozen_clock,
+    make_activity,
+    make_check_response,
+    make_entry,
+)
+
+
+def _respond(
+    aioclient_mock: AiohttpClientMocker,
+    activity_ids: Iterable[int] = ACTIVITIES,
+    **fields: Any,
+) -> None:
+    """Answer checks of child 1 with ``activity_ids``, and ``fields`` for activity 1."""
+    activities = {activity_id: make_activity(activity_id) for activity_id in activity_ids}
+    activities[1] = make_activity(1, **fields)
+    response = make_check_response({1: activities})
+    # A check of one child has the activities at the top level
+    response["allowed"] = all(
+        activity["allowed"] and not activity["banned"] for activity in activities.values()
+    )
+    response["activities"] = response["children"]["1"]["activities"]
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(CHECK_URL, json=response)
+
+
+async def _async_setup(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    activity_ids: Iterable[int] = ACTIVITIES,
+    **options: Any,
+) -> None:
+    """Set up an entry whose child 1 is polled on its own."""
+    _respond(aioclient_mock, activity_ids)
+    entry = make_entry(options={CONF_ACCOUNT_POLLING: False, **options})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+
+async def _async_check(hass: HomeAssistant, **data: Any) -> dict[str, Any]:
+    """Call the check service for activity 1 of child 1."""
+    return await hass.services.async_call(
+        DOMAIN,
+        SERVICE_CHECK,
+        {"child_id": 1, "activity_ids": [1], **data},
+        blocking=True,
+        return_response=True,
+    )
+
+
+async def test_check_answers_from_polled_data(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Recent data answers a check without a request."""
+    await _async_setup(hass, aioclient_mock)
+    aioclient_mock.clear_requests()
+
+    response = await _async_check(hass)
+
+    assert aioclient_mock.call_count == 0
+    assert response["cached"]
+    assert response["allowed"]
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_check_without_max_age_skips_cache(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A max age of 0 is never answered from the cache of the API client."""
+    await _async_setup(hass, aioclient_mock, **{CONF_CHECK_CACHE_TTL: 30})
+    aioclient_mock.clear_requests()
+    _respond(aioclient_mock)
+
+    for _ in range(2):
+        response = await _async_check(hass, max_age=0)
+        assert not response["cached"]
+
+    assert aioclient_mock.call_count == 2
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_checking_one_activity_keeps_others_old(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """A check of one activity does not make the others look fresh."""
+    await _async_setup(hass, aioclient_mock)
+    freezer.tick(3000)
+    _respond(aioclient_mock, remaining=10)
+
+    await _async_check(hass, activity_ids=[4], max_age=0)
+    response = await _async_check(hass, max_age=60)
+
+    assert aioclient_mock.call_count == 2
+    assert not response["cached"]
+    assert response["activities"][0]["remaining_seconds"] == 10
+    # The checked activity is answered from the data now
+    response = await _async_check(hass, activity_ids=[4], max_age=60)
+    assert response["cached"]
+    assert aioclient_mock.call_count == 2
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_checking_one_activity_does_not_discover(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Activities are only discovered from a check of all of them."""
+    await _async_setup(hass, aioclient_mock, **{CONF_ACTIVITY_REFRESH_INTERVAL: 60})
+    catalog = hass.data[DOMAIN][ENTRY_ID]["catalog"]
+    # The catalog takes its clock when created, before time was frozen
+    catalog._clock = frozen_clock
+    freezer.tick(3000)
+    assert catalog.due(1)
+
+    await _async_check(hass, activity_ids=[4], max_age=0)
+
+    assert catalog.due(1)
+    assert catalog.stats["discoveries"] == 1
+    assert list(catalog.activities(1)) == list(ACTIVITIES)
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_check_rejects_unknown_activity(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """An activity unknown to the entry is rejected before any request."""
+    await _async_setup(hass, aioclient_mock)
+    aioclient_mock.clear_requests()
+
+    with pytest.raises(ServiceValidationError, match="99"):
+        await _async_check(hass, activity_ids=[99], max_age=0)
+
+    assert aioclient_mock.call_count == 0
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_check_configured_activity(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """An activity beyond the built-in ones can be checked once configured."""
+    await _async_setup(
+        hass, aioclient_mock, (1, 7), **{CONF_CHILD_ACTIVITIES: {"1": [1, 7]}}
+    )
+
+    response = await _async_check(hass, activity_ids=[7], max_age=0)
+
+    assert response["activities"][0]["activity_id"] == 7
+    assert response["activities"][0]["name"] == "Activity 7"
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_check_reports_ban(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A banned activity is not allowed, as with the binary sensor."""
+    await _async_setup(hass, aioclient_mock)
+    _respond(aioclient_mock, banned=True)
+
+    response = await _async_check(hass, max_age=0)
+
+    assert not response["allowed"]
+    assert response["activities"][0]["allowed"] is False
+    assert response["activities"][0]["banned"] is True
+    assert hass.states.get("binary_sensor.child_1_internet_allowed").state == "off"
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+
+async def test_check_replaces_stale_data(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """A check made because the data is stale updates the entities."""
+    await _async_setup(hass, aioclient_mock)
+    coordinator = hass.data[DOMAIN][ENTRY_ID]["coordinators"][1]
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(CHECK_URL, status=500)
+    await coordinator.async_refresh()
+    assert coordinator.is_stale
+
+    _respond(aioclient_mock, allowed=False, remaining=0)
+    response = await _async_check(hass)
+    await hass.async_block_till_done()
+
+    assert not response["cached"]
+    assert not coordinator.is_stale
+    assert aioclient_mock.mock_calls[0][2]["activities"] == ",".join(
+        str(activity_id) for activity_id in sorted(ACTIVITIES)
+    )
+    assert hass.states.get("binary_sensor.child_1_internet_allowed").state == "off"
+    assert hass.states.get("binary_sensor.child_1_gaming_allowed").state == "on"
+    assert await hass.config_entries.async_unload(ENTRY_ID)
@@ -0,0 +1,134 @@
+"""Tests for coalescing and caching of unlogged checks."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from aiohttp import ClientError
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from pytest_homeassistant_custom_component.test_util.aiohttp import (
+    AiohttpClientMocker,
+    AiohttpClientMockResponse,
+)
+
+from custom_components.allow2.api import Allow2API, Allow2ConnectionError
+from custom_components.allow2.resilience import RetryPolicy
+
+from .common import CHECK_URL, make_activity, make_check_response
+
+
+def _slow_check(response: dict | None = None):
+    """Return a mock handler answering a check after a short delay."""
+
+    async def respond(method: str, url: str, _data: object) -> AiohttpClientMockResponse:
+        await asyncio.sleep(0.01)
+        if response is None:
+            raise ClientError("unreachable")
+        return AiohttpClientMockResponse(method, url, json=response)
+
+    return respond
+
+
+async def test_concurrent_checks_share_one_request(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Identical unlogged checks in flight together send one request."""
+    aioclient_mock.post(
+        CHECK_URL, side_effect=_slow_check(make_check_response({1: {1: make_activity(1)}}))
+    )
+    api = Allow2API(async_get_clientsession(hass))
+
+    results = await asyncio.gather(
+        *(api.check(100, 200, "pair-token", None, [1], log=False) for _ in range(5))
+    )
+
+    assert aioclient_mock.call_count == 1
+    assert all(result is results[0] for result in results)
+    assert api.stats["cache"]["coalesced"] == 4
+
+    # Without a TTL nothing is kept once the request finished
+    await api.check(100, 200, "pair-token", None, [1], log=False)
+    assert aioclient_mock.call_count == 2
+
+
+async def test_different_checks_are_not_shared(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Checks of different activities or logged checks send their own request."""
+    aioclient_mock.post(
+        CHECK_URL,
+        side_effect=_slow_check(
+            make_check_response({1: {1: make_activity(1), 2: make_activity(2)}})
+        ),
+    )
+    api = Allow2API(async_get_clientsession(hass))
+
+    await asyncio.gather(
+        api.check(100, 200, "pair-token", None, [1], log=False),
+        api.check(100, 200, "pair-token", None, [1, 2], log=False),
+        api.check(100, 200, "pair-token", None, [1], log=True),
+    )
+
+    assert aioclient_mock.call_count == 3
+
+
+async def test_failure_is_shared(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker
+) -> None:
+    """Every caller sharing a failed request gets the error."""
+    aioclient_mock.post(CHECK_URL, side_effect=_slow_check())
+    api = Allow2API(
+        async_get_clientsession(hass), retry_policy=RetryPolicy(max_attempts=1)
+    )
+
+    results = await asyncio.gather(
+        *(api.check(100, 200, "pair-token", None, [1], log=False) for _ in range(3)),
+        return_exceptions=True,
+    )
+
+    assert aioclient_mock.call_count == 1
+    assert all(isinstance(result, Allow2ConnectionError) for result in results)
+
+
+async def test_ttl_cache(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """With a TTL repeated unlogged checks are answered from the cache."""
+    aioclient_mock.post(CHECK_URL, json=make_check_response({1: {1: make_activity(1)}}))
+    api = Allow2API(async_get_clientsession(hass), cache_ttl=30)
+
+    first = await api.check(100, 200, "pair-token", None, [1], log=False)
+    freezer.tick(29)
+    assert await api.check(100, 200, "pair-token", None, [1], log=False) is first
+    assert aioclient_mock.call_count == 1
+    assert api.stats["cache"]["hits"] == 1
+
+    await api.check(100, 200, "pair-token", None, [1], log=True)
+    assert aioclient_mock.call_count == 2
+
+    freezer.tick(2)
+    await api.check(100, 200, "pair-token", None, [1], log=False)
+    assert aioclient_mock.call_count == 3
+
+
+@pytest.mark.parametrize("cache_ttl", [0, 30])
+async def test_failures_are_not_cached(
+    hass: HomeAssistant, aioclient_mock: AiohttpClientMocker, cache_ttl: float
+) -> None:
+    """A failed check is sent again by the next caller."""
+    aioclient_mock.post(CHECK_URL, exc=ClientError("unreachable"))
+    api = Allow2API(
+        async_get_clientsession(hass),
+        retry_policy=RetryPolicy(max_attempts=1),
+        cache_ttl=cache_ttl,
+    )
+
+    for _ in range(2):
+        with pytest.raises(Allow2ConnectionError):
+            await api.check(100, 200, "pair-token", None, [1], log=False)
+
+    assert aioclient_mock.call_count == 2
@@ -0,0 +1,101 @@
+"""Tests for batching usage into logged checks."""
+from __future__ import annotations
+
+from typing import Any
+
+from freezegun.api import FrozenDateTimeFactory
+from homeassistant.core import HomeAssistant
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.allow2.api import Allow2ConnectionError
+from custom_components.allow2.const import ACTIVITIES, CONF_ACCOUNT_POLLING, DOMAIN
+from custom_components.allow2.services import SERVICE_LOG_USAGE
+from custom_components.allow2.usage import UsageLogQueue
+
+from .common import CHECK_URL, ENTRY_ID, make_activity, make_check_response, make_entry
+
+
+class _Sender:
+    """Record logged checks, failing those of the given children."""
+
+    def __init__(self) -> None:
+        self.sent: list[tuple[int, list[int]]] = []
+        self.failing: set[int] = set()
+
+    async def __call__(self, child_id: int, activity_ids: list[int]) -> None:
+        if child_id in self.failing:
+            raise Allow2ConnectionError("Connection failed")
+        self.sent.append((child_id, activity_ids))
+
+
+async def test_usage_is_batched_per_child(hass: HomeAssistant) -> None:
+    """One check per child logs an interval of each activity in use."""
+    sender = _Sender()
+    queue = UsageLogQueue(hass, ENTRY_ID, sender)
+    queue.async_record(1, 3)
+    queue.async_record(1, 3)
+    queue.async_record(1, 1, 90)
+    queue.async_record(2, 1)
+
+    await queue.async_flush()
+
+    assert sorted(sender.sent) == [(1, [1, 3]), (2, [1])]
+    # Usage longer than an interval is logged over several checks
+    assert queue.stats["pending_seconds"] == 30
+    assert queue.stats["events"] == 4
+    await queue.async_flush()
+    assert sender.sent[-1] == (1, [1])
+    assert queue.stats["pending_children"] == 0
+    assert queue.stats["logged_seconds"] == 210
+
+
+async def test_failed_check_keeps_usage(hass: HomeAssistant) -> None:
+    """Usage of a check that fails is sent with the next flush."""
+    sender = _Sender()
+    sender.failing.add(1)
+    queue = UsageLogQueue(hass, ENTRY_ID, sender)
+    queue.async_record(1, 2)
+    queue.async_record(2, 2)
+
+    await queue.async_flush()
+    assert sender.sent == [(2, [2])]
+    assert queue.stats["failed"] == 1
+    assert queue.stats["pending_seconds"] == 60
+
+    sender.failing.clear()
+    await queue.async_flush()
+    assert sender.sent[-1] == (1, [2])
+    assert queue.stats["pending_children"] == 0
+
+
+async def test_unload_flushes_usage(
+    hass: HomeAssistant,
+    aioclient_mock: AiohttpClientMocker,
+    freezer: FrozenDateTimeFactory,
+) -> None:
+    """Pending usage is logged on unload, refreshing only what it checked."""
+    activities = {activity_id: make_activity(activity_id) for activity_id in ACTIVITIES}
+    response: dict[str, Any] = make_check_response({1: activities})
+    response["activities"] = response["children"]["1"]["activities"]
+    aioclient_mock.post(CHECK_URL, json=response)
+    entry = make_entry(options={CONF_ACCOUNT_POLLING: False})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[DOMAIN][ENTRY_ID]["coordinators"][1]
+    polled = coordinator.last_fetched
+
+    await hass.services.async_call(
+        DOMAIN, SERVICE_LOG_USAGE, {"child_id": 1, "activity_id": 3}, blocking=True
+    )
+    aioclient_mock.clear_requests()
+    aioclient_mock.post(CHECK_URL, json=response)
+    freezer.tick(600)
+    assert await hass.config_entries.async_unload(ENTRY_ID)
+
+    assert aioclient_mock.call_count == 1
+    form = aioclient_mock.mock_calls[0][2]
+    assert (form["log"], form["childId"], form["activities"]) == ("true", 1, "3")
+    assert coordinator.fetched_at[3] > polled
+    assert coordinator.fetched_at[1] == polled
+    assert coordinator.last_fetched == polled